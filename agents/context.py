@@ -0,0 +1,158 @@
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, List, Tuple
+
+# Shown in place of history that no longer fits. It is constant so the
+# rendered prefix stays identical between turns.
+OMITTED_MARKER = "[Earlier conversation omitted]"
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap local token estimate (~4 characters per token for English text)"""
+    return (len(text) + 3) // 4
+
+
+@dataclass
+class _Entry:
+    seq: int
+    line: str
+    tokens: int
+
+
+class ContextBuilder:
+    """Fits an AgentMemory session's history into a prompt token budget.
+
+    Rendered lines are cached, so each build only fetches and renders the
+    messages added since the previous one and appends them to the cached
+    text. Once the budget is exceeded the oldest lines are dropped down to
+    ``low_water_ratio`` of the budget, which leaves room for several more
+    turns before the prefix has to shift again. The newest ``keep_recent``
+    messages are never dropped or shortened; older ones are clipped to
+    ``max_message_tokens``.
+
+    When the memory keeps rolling summaries (``summarize_after``), the
+    context is the stored summaries followed by the messages after them;
+    it is rebuilt only when a compaction changes the summary set.
+    """
+
+    def __init__(
+        self,
+        memory,
+        max_tokens: int = 1500,
+        keep_recent: int = 4,
+        max_message_tokens: int = 300,
+        low_water_ratio: float = 0.75,
+        estimator: Callable[[str], int] = estimate_tokens
+    ):
+        self.memory = memory
+        self.max_tokens = max_tokens
+        self.keep_recent = keep_recent
+        self.max_message_tokens = max_message_tokens
+        self.low_water_ratio = low_water_ratio
+        self.estimator = estimator
+        self._entries: Deque[_Entry] = deque()
+        self._tokens = 0
+        self._last_seq = -1
+        self._omitted = False
+        self._rendered = ""
+        self._summary_spans: Tuple = ()
+
+    @property
+    def tokens(self) -> int:
+        """Estimated tokens of the last rendered context"""
+        return self._tokens + (self.estimator(OMITTED_MARKER) if self._omitted else 0)
+
+    def render_message(self, message: Dict) -> str:
+        return f"{message['role']}: {message['content']}"
+
+    def _clip(self, entry: _Entry) -> _Entry:
+        if entry.tokens <= self.max_message_tokens:
+            return entry
+        chars = self.max_message_tokens * 4
+        line = entry.line[:chars].rstrip() + " ..."
+        return _Entry(entry.seq, line, self.estimator(line))
+
+    async def _fetch_new(self) -> List[Dict]:
+        return await self.memory.get_messages_since(self._last_seq, limit=-1)
+
+    async def _sync_summaries(self) -> bool:
+        """Reload summaries after a compaction; returns True if they changed"""
+        summaries = await self.memory.get_summaries()
+        spans = tuple((s["start_seq"], s["end_seq"]) for s in summaries)
+        if spans == self._summary_spans:
+            return False
+        self.reset()
+        self._summary_spans = spans
+        for summary in summaries:
+            line = f"[Summary of messages {summary['start_seq']}-{summary['end_seq']}]\n{summary['content']}"
+            self._entries.append(_Entry(summary["end_seq"], line, self.estimator(line)))
+            self._tokens += self._entries[-1].tokens
+            self._last_seq = summary["end_seq"]
+        return True
+
+    async def build(self) -> str:
+        """Return the history that fits the budget, rendering only new messages"""
+        rebuilt = False
+        if getattr(self.memory, "summarize_after", None):
+            rebuilt = await self._sync_summaries()
+        new_messages = await self._fetch_new()
+        appended: List[str] = []
+        for message in new_messages:
+            line = self.render_message(message)
+            self._entries.append(_Entry(message["seq"], line, self.estimator(line)))
+            self._tokens += self._entries[-1].tokens
+            self._last_seq = message["seq"]
+            appended.append(line)
+
+        # Messages that just left the verbatim tail are clipped
+        for index in range(max(0, len(self._entries) - self.keep_recent - len(appended)),
+                           max(0, len(self._entries) - self.keep_recent)):
+            entry = self._entries[index]
+            clipped = self._clip(entry)
+            if clipped is not entry:
+                self._entries[index] = clipped
+                self._tokens += clipped.tokens - entry.tokens
+                appended = None  # an earlier line changed, re-render
+
+        if self._tokens > self.max_tokens:
+            self._shrink()
+            appended = None
+
+        if rebuilt:
+            appended = None
+
+        if appended is None:
+            self._rendered = self._render()
+        elif appended:
+            block = "\n".join(appended)
+            self._rendered = f"{self._rendered}\n{block}" if self._rendered else self._render()
+        return self._rendered
+
+    def _shrink(self):
+        target = int(self.max_tokens * self.low_water_ratio)
+        while self._tokens > target and len(self._entries) > self.keep_recent:
+            self._tokens -= self._entries.popleft().tokens
+            self._omitted = True
+        # The verbatim tail alone is over budget: keep as much of it as fits
+        while self._tokens > self.max_tokens and len(self._entries) > 1:
+            self._tokens -= self._entries.popleft().tokens
+            self._omitted = True
+        if self._tokens > self.max_tokens:
+            entry = self._entries[0]
+            line = entry.line[:self.max_tokens * 4].rstrip() + " ..."
+            self._entries[0] = _Entry(entry.seq, line, self.estimator(line))
+            self._tokens = self._entries[0].tokens
+
+    def _render(self) -> str:
+        lines = [entry.line for entry in self._entries]
+        if self._omitted:
+            lines.insert(0, OMITTED_MARKER)
+        return "\n".join(lines)
+
+    def reset(self):
+        self._entries.clear()
+        self._tokens = 0
+        self._last_seq = -1
+        self._omitted = False
+        self._rendered = ""
+        self._summary_spans = ()
@@ -0,0 +1,97 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+logger = logging.getLogger("db")
+
+
+@dataclass
+class EngineConfig:
+    pool_size: int = 5
+    max_overflow: int = 5
+    pool_timeout: float = 30.0
+    busy_timeout_ms: int = 5000
+    mmap_size: int = 256 * 1024 * 1024
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+
+
+@dataclass
+class Database:
+    url: str
+    engine: AsyncEngine
+    async_session: async_sessionmaker
+    loop: Optional[asyncio.AbstractEventLoop] = None
+    schema_ready: bool = False
+    init_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+DEFAULT_ENGINE_CONFIG = EngineConfig()
+
+_databases: Dict[str, Database] = {}
+
+
+def sqlite_url(db_path: str) -> str:
+    return f"sqlite+aiosqlite:///{db_path}"
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def _create_database(url: str, config: EngineConfig) -> Database:
+    engine = create_async_engine(
+        url,
+        pool_size=config.pool_size,
+        max_overflow=config.max_overflow,
+        pool_timeout=config.pool_timeout,
+        connect_args={"check_same_thread": False}
+    )
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA journal_mode={config.journal_mode}")
+        cursor.execute(f"PRAGMA synchronous={config.synchronous}")
+        cursor.execute(f"PRAGMA mmap_size={config.mmap_size}")
+        cursor.execute(f"PRAGMA busy_timeout={config.busy_timeout_ms}")
+        cursor.close()
+
+    return Database(
+        url=url,
+        engine=engine,
+        async_session=async_sessionmaker(engine, expire_on_commit=False, autoflush=False),
+        loop=_running_loop()
+    )
+
+
+def get_database(url: str, config: EngineConfig = None) -> Database:
+    """Return the shared engine and sessionmaker for ``url``, creating them once"""
+    database = _databases.get(url)
+    loop = _running_loop()
+    if database is not None and database.loop is not None and loop is not None and database.loop is not loop:
+        # Pooled aiosqlite connections belong to the loop that opened them;
+        # a registry entry left by an earlier asyncio.run() is dropped
+        logger.debug(f"Event loop changed, re-creating engine for {url}")
+        database = None
+    if database is None:
+        database = _create_database(url, config or DEFAULT_ENGINE_CONFIG)
+        _databases[url] = database
+    elif database.loop is None:
+        database.loop = loop
+    return database
+
+
+async def dispose_engines():
+    """Dispose every registered engine (call once at shutdown)"""
+    loop = _running_loop()
+    for url, database in list(_databases.items()):
+        if database.loop is None or database.loop is loop:
+            await database.engine.dispose()
+        _databases.pop(url, None)
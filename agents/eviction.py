@@ -0,0 +1,116 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+logger = logging.getLogger("eviction")
+
+
+@dataclass
+class EvictionPolicy:
+    max_sessions: int = 1000
+    max_storage_mb: float = 100
+    # Once a limit is crossed, evict until usage is back under this fraction of it
+    low_water_ratio: float = 0.9
+    # Amortised mode: check the limits once every N writes
+    check_every: int = 100
+    # Background mode: check every N seconds instead of on the write path
+    interval: Optional[float] = None
+    batch_size: int = 500
+
+
+class SessionEvictor:
+    """Evicts least-recently-updated sessions once storage limits are exceeded.
+
+    Session and byte totals come from the ``storage_stats`` row that
+    triggers keep current (see migrations v2), and candidates are read off
+    the ``last_updated`` index, so a check costs the same however many
+    sessions are stored.
+    """
+
+    def __init__(self, async_session: async_sessionmaker, policy: EvictionPolicy = None):
+        self.async_session = async_session
+        self.policy = policy or EvictionPolicy()
+        self.writes_since_check = 0
+        self.evicted_sessions = 0
+        self.loop = asyncio.get_running_loop()
+        self._task: Optional[asyncio.Task] = None
+        if self.policy.interval:
+            self._task = self.loop.create_task(self._run())
+
+    @property
+    def max_bytes(self) -> int:
+        return int(self.policy.max_storage_mb * 1024 * 1024)
+
+    async def after_write(self, session: AsyncSession, writes: int = 1):
+        """Called inside the writer's transaction; evicts every ``check_every`` writes"""
+        if self._task is not None:
+            return
+        self.writes_since_check += writes
+        if self.writes_since_check >= self.policy.check_every:
+            self.writes_since_check = 0
+            await self.evict(session)
+
+    async def stats(self, session: AsyncSession) -> Tuple[int, int]:
+        row = (await session.execute(text("SELECT sessions, bytes FROM storage_stats WHERE id = 1"))).first()
+        return (row[0], row[1]) if row else (0, 0)
+
+    async def evict(self, session: AsyncSession) -> int:
+        """Evict oldest sessions in batches until under the low-water mark"""
+        sessions, stored = await self.stats(session)
+        if sessions <= self.policy.max_sessions and stored <= self.max_bytes:
+            return 0
+
+        target_sessions = int(self.policy.max_sessions * self.policy.low_water_ratio)
+        target_bytes = int(self.max_bytes * self.policy.low_water_ratio)
+        evicted = 0
+        while sessions > target_sessions or stored > target_bytes:
+            candidates = (await session.execute(
+                text("SELECT session_id, size_bytes FROM conversations ORDER BY last_updated LIMIT :limit"),
+                {"limit": self.policy.batch_size}
+            )).all()
+            if not candidates:
+                break
+
+            victims: List[str] = []
+            for session_id, size in candidates:
+                if sessions <= target_sessions and stored <= target_bytes:
+                    break
+                victims.append(session_id)
+                sessions -= 1
+                stored -= size or 0
+
+            await self._delete(session, victims)
+            evicted += len(victims)
+
+        self.evicted_sessions += evicted
+        logger.debug(f"Evicted {evicted} sessions ({sessions} left, {stored / 1024 / 1024:.1f}MB)")
+        return evicted
+
+    async def _delete(self, session: AsyncSession, session_ids: List[str]):
+        params = {f"s{i}": session_id for i, session_id in enumerate(session_ids)}
+        placeholders = ", ".join(f":{key}" for key in params)
+        await session.execute(text(f"DELETE FROM messages WHERE session_id IN ({placeholders})"), params)
+        await session.execute(text(f"DELETE FROM summaries WHERE session_id IN ({placeholders})"), params)
+        await session.execute(text(f"DELETE FROM conversations WHERE session_id IN ({placeholders})"), params)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.policy.interval)
+            try:
+                async with self.async_session() as session:
+                    async with session.begin():
+                        await self.evict(session)
+            except Exception as e:
+                logger.error(f"Background eviction failed: {type(e).__name__} - {str(e)}")
+
+    async def aclose(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
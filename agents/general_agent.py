@@ -1,96 +1,276 @@
-import os
-import httpx
+import asyncio
+import time
 from dotenv import load_dotenv
-from pydantic import BaseModel, Field
-from typing import Literal, Dict, List, Optional, Tuple
-from pathlib import Path
-import yaml
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
 from datetime import datetime
 import uuid
-from utils.rate_limiter import EnhancedRateLimiter, RateLimitConfig
+from utils.rate_limiter import PrepaidSlot
 from agents.memory import AgentMemory
 from agents.schemas import AgentResponse
+from agents.llm_client import DEEPSEEK_LIMITER, get_llm_client
+from agents.llm_cache import DEFAULT_TEMPERATURE, CompletionCache, cache_key, get_completion_cache
+from agents.single_flight import get_single_flight
+from agents.micro_batch import MicroBatcher, get_micro_batcher
+from agents.context import ContextBuilder
+from utils import tracing
 
 load_dotenv()
 
-DEEPSEEK_LIMITER = EnhancedRateLimiter(RateLimitConfig(max_calls=5, period=1.0))
-
 class GeneralAgent:
-    def __init__(self, persona_manager, conversation_id: str = None, agent_id: str = None):
+    def __init__(
+        self,
+        persona_manager,
+        conversation_id: str = None,
+        agent_id: str = None,
+        memory: AgentMemory = None,
+        context_tokens: int = 1500,
+        cache: Union[bool, CompletionCache, None] = None,
+        force_cache: bool = False,
+        llm_params: Dict = None,
+        coalesce: Optional[bool] = None,
+        priority: str = "standard",
+        batch: Union[bool, MicroBatcher] = False
+    ):
         self.persona_manager = persona_manager
         self.current_scenario = None
         self.current_persona = None
+        self.rules = None
+        self.persona_name = None
         self.agent_id = agent_id or str(uuid.uuid4())
-        self.memory = AgentMemory(
+        self.memory = memory or AgentMemory(
             session_id=f"{conversation_id or str(uuid.uuid4())}_{self.agent_id}"
         )
+        self.context_tokens = context_tokens
+        self._context: Optional[ContextBuilder] = None
         self.conversation_history: List[Tuple[str, str]] = []
+        # None defers to the scenario's ``cache`` flag
+        self.cache = cache
+        self.force_cache = force_cache
+        self._llm_params = llm_params or {}
+        # Share identical in-flight requests: None does so only for
+        # temperature 0, True also for sampled requests
+        self.coalesce = coalesce
+        # DEEPSEEK_LIMITER lane: "interactive", "standard" or "background"
+        self.limiter = DEEPSEEK_LIMITER.lane(priority)
+        # Send requests through a micro-batcher (True uses the shared one)
+        self.batch = batch
+        # Next turn's history and limiter slot, fetched ahead by prefetch()
+        self._prefetch: Optional[asyncio.Task] = None
+        self._prepaid: Optional[PrepaidSlot] = None
+        self._writes = 0  # memory writes so far; a prefetch made before one is stale
+
+    @property
+    def context(self) -> ContextBuilder:
+        """Token-budgeted view of this agent's memory, cached between turns"""
+        if self._context is None or self._context.memory is not self.memory:
+            self._context = ContextBuilder(self.memory, max_tokens=self.context_tokens)
+        return self._context
+
+    @property
+    def completion_cache(self) -> Optional[CompletionCache]:
+        if isinstance(self.cache, CompletionCache):
+            return self.cache
+        enabled = self.cache if self.cache is not None else getattr(self.current_scenario, "cache", False)
+        return get_completion_cache() if enabled else None
+
+    @property
+    def batcher(self) -> Optional[MicroBatcher]:
+        if isinstance(self.batch, MicroBatcher):
+            return self.batch
+        return get_micro_batcher() if self.batch else None
+
+    @property
+    def llm_params(self) -> Dict:
+        """Scenario request parameters, overridden by the agent's own"""
+        return {**getattr(self.current_scenario, "llm_params", {}), **self._llm_params}
 
     async def assign_role(self, scenario_name: str, persona_name: str):
         scenario = self.persona_manager.load_scenario(scenario_name)
         self.current_scenario = scenario
         self.current_persona = scenario.personas[persona_name]
+        self.persona_name = persona_name
+        self.memory.scenario = scenario_name
+        # Triggers, action and emotion keywords compiled into one matcher
+        self.rules = scenario.rules(persona_name)
         print(f"Assigned {persona_name} role in {scenario_name} scenario")
         print(f"Traits: {self.current_persona['traits']}")
 
+    def prefetch(self) -> asyncio.Task:
+        """Start the parts of the next turn that don't depend on its input.
+
+        Reads the history and takes a rate-limiter slot in the background,
+        so the turn itself only has to assemble the prompt and send it. Call
+        it once the agent's previous turn has finished, e.g. while another
+        agent is speaking.
+        """
+        if self._prefetch is None:
+            self._prefetch = asyncio.ensure_future(self._fetch_ahead(self._writes))
+        return self._prefetch
+
+    def cancel_prefetch(self):
+        """Drop a prefetch that won't be used, e.g. because the conversation ended"""
+        if self._prefetch is not None:
+            self._prefetch.cancel()
+            self._prefetch = None
+        self._prepaid = None
+
+    async def _fetch_ahead(self, writes: int) -> Tuple[str, int]:
+        with tracing.span("prefetch", agent=self.agent_id):
+            history = await self.context.build()
+            if self.limiter is not None:
+                with tracing.span("limiter_wait", prefetch=True):
+                    await self.limiter.wait()
+                self._prepaid = PrepaidSlot(self.limiter)
+        return history, writes
+
+    async def _history(self) -> str:
+        if self._prefetch is not None:
+            prefetch, self._prefetch = self._prefetch, None
+            history, writes = await prefetch
+            if writes == self._writes:
+                return history
+        return await self.context.build()
+
+    def _turn_limiter(self):
+        """The limiter for this turn's request, using a prefetched slot once.
+
+        Taken once per turn, after the prefetch has been awaited, so a slot
+        the turn doesn't spend (a cache hit, a coalesced call) goes with it
+        instead of paying for a later turn.
+        """
+        prepaid, self._prepaid = self._prepaid, None
+        return prepaid if prepaid is not None else self.limiter
+
+    async def _remember(self, role: str, content):
+        self._writes += 1
+        await self.memory.add_message(role, content)
+
     async def execute(self, input_text: str, sender_role: str = None) -> AgentResponse:
+        with tracing.span("turn", agent=self.agent_id, persona=self.persona_name):
+            prompt = await self._prepare_turn(input_text, sender_role)
+            llm_response = await self._query_llm(prompt, self._turn_limiter())
+            response = self._build_response(input_text, llm_response)
+            with tracing.span("memory_write"):
+                await self._remember(self.persona_name, response)
+            return response
+
+    async def execute_stream(self, input_text: str, sender_role: str = None) -> AsyncIterator[Union[str, AgentResponse]]:
+        """Streaming variant of execute.
+
+        Yields text chunks as the LLM produces them, then yields the final
+        AgentResponse (emotion, action and confidence need the full reply).
+        """
+        # A span cannot stay open across yields, so the turn is timed by hand
+        start = time.perf_counter()
+        prompt = await self._prepare_turn(input_text, sender_role)
+        chunks: List[str] = []
+        async for chunk in self._query_llm_stream(prompt, self._turn_limiter()):
+            chunks.append(chunk)
+            yield chunk
+        response = self._build_response(input_text, "".join(chunks))
+        with tracing.span("memory_write"):
+            await self._remember(self.persona_name, response)
+        tracing.record("turn", time.perf_counter() - start, agent=self.agent_id, persona=self.persona_name, stream=True)
+        yield response
+
+    async def _prepare_turn(self, input_text: str, sender_role: str = None) -> str:
         if not self.current_persona:
             raise ValueError("No persona assigned")
 
-        # Store incoming message with sender context
-        sender = sender_role or "user"
-        await self.memory.add_message(sender, input_text)
+        with tracing.span("prompt_build"):
+            # History is rendered before the incoming message is stored, since
+            # the prompt carries that message separately as [INPUT]
+            history = await self._history()
+
+            # Check story arc triggers
+            for trigger in self.rules.matched_triggers(str(input_text)):
+                print(f"Story progression: {trigger}")
 
-        # Check story arc triggers
-        input_text_str = str(input_text)  # Ensure we have a string
-        for arc in self.current_scenario.story_arc:
-            if arc['trigger'].lower() in input_text_str.lower():
-                print(f"Story progression: {arc['trigger']}")
+            prompt = self._build_prompt(input_text, history)
 
-        prompt = self._build_prompt(input_text)
-        llm_response = await self._query_llm(prompt)
+        # Store incoming message with sender context
+        with tracing.span("memory_write"):
+            await self._remember(sender_role or "user", input_text)
+        return prompt
 
+    def _build_response(self, input_text: str, llm_response: str) -> AgentResponse:
         # Build response with only required fields
-        response_data = {
-            "response": llm_response,
-            "confidence": self._calculate_confidence(input_text),
-            "action": self._determine_action(input_text),
-            "emotion": self._detect_emotion(llm_response),
-            "timestamp": datetime.now()
-        }
-
-        # Filter to only include fields defined in AgentResponse schema
-        valid_fields = AgentResponse.__fields__.keys()
-        filtered_data = {
-            k: v for k, v in response_data.items()
-            if k in valid_fields
-        }
-
-        return AgentResponse(**filtered_data)
-
-    def _build_prompt(self, input_text: str) -> str:
+        with tracing.span("scoring"):
+            response_data = {
+                "response": llm_response,
+                "confidence": self._calculate_confidence(input_text),
+                "action": self._determine_action(input_text),
+                "emotion": self._detect_emotion(llm_response),
+                "timestamp": datetime.now()
+            }
+
+        with tracing.span("validation"):
+            # Filter to only include fields defined in AgentResponse schema
+            valid_fields = AgentResponse.__fields__.keys()
+            filtered_data = {
+                k: v for k, v in response_data.items()
+                if k in valid_fields
+            }
+
+            return AgentResponse(**filtered_data)
+
+    def _build_prompt(self, input_text: str, history: str = "") -> str:
         return f"""
         [ROLE] {self.current_persona['role_type']}
         [INSTRUCTIONS] {self.current_persona['instructions']}
         [TRAITS] {self.current_persona['traits']}
+        [HISTORY] {history or "None"}
         [INPUT] {input_text}
         """
 
-    async def _query_llm(self, prompt: str) -> str:
-        await DEEPSEEK_LIMITER.wait()
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                "https://api.deepseek.com/v1/chat/completions",
-                headers={"Authorization": f"Bearer {os.getenv('DEEPSEEK_API_KEY')}"},
-                json={
-                    "model": "deepseek-chat",
-                    "messages": [{"role": "user", "content": prompt}],
-                    "max_tokens": 500
-                }
-            )
-            response.raise_for_status()
-            return response.json()["choices"][0]["message"]["content"]
+    async def _query_llm(self, prompt: str, limiter) -> str:
+        params = self.llm_params
+        cache = self.completion_cache
+        if cache is None:
+            return await self._call_llm(prompt, params, limiter)
+        return await cache.get_or_call(
+            params.get("model", get_llm_client().config.model),
+            prompt,
+            params,
+            lambda: self._call_llm(prompt, params, limiter),
+            force=self.force_cache
+        )
+
+    async def _call_llm(self, prompt: str, params: Dict, limiter) -> str:
+        client = get_llm_client()
+        if self.coalesce is False or (self.coalesce is None and params.get("temperature", DEFAULT_TEMPERATURE) != 0):
+            return await self._send(prompt, params, limiter)
+        # Concurrent identical requests share one upstream call and limiter slot
+        key = cache_key(params.get("model", client.config.model), prompt, params)
+        return await get_single_flight().do(key, lambda: self._send(prompt, params, limiter))
+
+    async def _send(self, prompt: str, params: Dict, limiter) -> str:
+        batcher = self.batcher
+        if batcher is not None:
+            return await batcher.submit(prompt, limiter=limiter, **params)
+        return await get_llm_client().chat_completion(prompt, limiter=limiter, **params)
+
+    async def _query_llm_stream(self, prompt: str, limiter) -> AsyncIterator[str]:
+        params = self.llm_params
+        cache = self.completion_cache
+        key = None
+        if cache is not None:
+            if cache.cacheable(params, self.force_cache):
+                key = cache_key(params.get("model", get_llm_client().config.model), prompt, params)
+                cached = await cache.get(key)
+                if cached is not None:
+                    # A hit needs no API call and arrives as one chunk
+                    yield cached
+                    return
+            else:
+                cache.stats.bypassed += 1
+
+        chunks = []
+        async for chunk in get_llm_client().stream_chat_completion(prompt, limiter=limiter, **params):
+            chunks.append(chunk)
+            yield chunk
+        if key is not None:
+            await cache.set(key, "".join(chunks))
 
     def _calculate_confidence(self, query: str) -> float:
         base = 0.7
@@ -100,19 +280,7 @@ class GeneralAgent:
 
     def _determine_action(self, query: str) -> str:
         query_str = str(query)  # Handle both strings and AgentResponse objects
-        query_lower = query_str.lower()
-        if 'manager' in query_lower and 'escalate' in self.current_persona.get('allowed_actions', []):
-            return 'escalate'
-        if 'transfer' in query_lower and 'redirect' in self.current_persona.get('allowed_actions', []):
-            return 'redirect'
-        return 'respond'
+        return self.rules.action(query_str, self.current_persona.get('allowed_actions', []))
 
     def _detect_emotion(self, response: str) -> str:
-        response_lower = response.lower()
-        if any(word in response_lower for word in ["sorry", "apologize", "regret"]):
-            return "frustrated"
-        if "!" in response_lower and any(word in response_lower for word in ["happy", "great"]):
-            return "happy"
-        if any(word in response_lower for word in ["angry", "unacceptable"]):
-            return "angry"
-        return "neutral"
\ No newline at end of file
+        return self.rules.emotion(response)
\ No newline at end of file
@@ -0,0 +1,244 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from sqlalchemy import Column, Float, MetaData, String, Table, Text, delete, select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from agents.db import Database, get_database, sqlite_url
+from utils import tracing
+
+# Temperature DeepSeek applies when a request doesn't set one
+DEFAULT_TEMPERATURE = 1.0
+
+_metadata = MetaData()
+
+completions = Table(
+    "llm_cache",
+    _metadata,
+    Column("key", String, primary_key=True),
+    Column("content", Text, nullable=False),
+    Column("created", Float, nullable=False, index=True),
+    Column("expires", Float, nullable=False),
+    sqlite_with_rowid=False
+)
+
+# Entry and byte totals of the disk tier, kept current by triggers (like
+# memory's storage_stats) so a store never has to count the table
+_DISK_STATS_DDL = (
+    "CREATE INDEX IF NOT EXISTS ix_llm_cache_expires ON llm_cache (expires)",
+    "CREATE TABLE IF NOT EXISTS llm_cache_stats ("
+    "id INTEGER PRIMARY KEY CHECK (id = 1), entries INTEGER NOT NULL, bytes INTEGER NOT NULL)",
+    "INSERT OR IGNORE INTO llm_cache_stats (id, entries, bytes) VALUES "
+    "(1, (SELECT COUNT(*) FROM llm_cache), "
+    "(SELECT COALESCE(SUM(length(CAST(content AS BLOB))), 0) FROM llm_cache))",
+    "CREATE TRIGGER IF NOT EXISTS llm_cache_stats_insert AFTER INSERT ON llm_cache BEGIN "
+    "UPDATE llm_cache_stats SET entries = entries + 1, "
+    "bytes = bytes + length(CAST(NEW.content AS BLOB)) WHERE id = 1; END",
+    "CREATE TRIGGER IF NOT EXISTS llm_cache_stats_delete AFTER DELETE ON llm_cache BEGIN "
+    "UPDATE llm_cache_stats SET entries = entries - 1, "
+    "bytes = bytes - length(CAST(OLD.content AS BLOB)) WHERE id = 1; END",
+    "CREATE TRIGGER IF NOT EXISTS llm_cache_stats_update AFTER UPDATE OF content ON llm_cache BEGIN "
+    "UPDATE llm_cache_stats SET "
+    "bytes = bytes + length(CAST(NEW.content AS BLOB)) - length(CAST(OLD.content AS BLOB)) WHERE id = 1; END",
+)
+
+
+@dataclass
+class CacheConfig:
+    max_entries: int = 1024
+    max_bytes: int = 16 * 1024 * 1024
+    ttl: float = 24 * 3600.0  # seconds
+    db_path: Optional[str] = None  # optional on-disk tier
+    max_disk_entries: int = 100_000
+    max_disk_bytes: int = 256 * 1024 * 1024
+    default_temperature: float = DEFAULT_TEMPERATURE
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    bypassed: int = 0
+    stores: int = 0
+    evictions: int = 0
+    bytes: int = 0       # UTF-8 bytes of text currently held in memory
+    hit_bytes: int = 0   # text served from cache instead of the API
+
+    def as_dict(self) -> Dict:
+        return asdict(self)
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapse indentation and runs of whitespace so cosmetic edits share a key"""
+    lines = (" ".join(line.split()) for line in prompt.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def cache_key(model: str, prompt: str, params: Dict) -> str:
+    material = json.dumps(
+        {"model": model, "params": params, "prompt": normalize_prompt(prompt)},
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+class CompletionCache:
+    """LRU + TTL cache of chat completions, optionally backed by SQLite.
+
+    Only deterministic requests are cached: anything sampled at a non-zero
+    temperature is passed through unless ``force`` is set.
+    """
+
+    def __init__(self, config: CacheConfig = None):
+        self.config = config or CacheConfig()
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[str, Tuple[float, str, int]]" = OrderedDict()
+        self._disk_ready = False
+
+    def cacheable(self, params: Dict, force: bool = False) -> bool:
+        if force:
+            return True
+        return params.get("temperature", self.config.default_temperature) == 0
+
+    @property
+    def database(self) -> Optional[Database]:
+        if not self.config.db_path:
+            return None
+        return get_database(sqlite_url(self.config.db_path))
+
+    async def _ensure_disk(self) -> Optional[Database]:
+        database = self.database
+        if database is not None and not self._disk_ready:
+            async with database.engine.begin() as conn:
+                await conn.run_sync(_metadata.create_all)
+                for statement in _DISK_STATS_DDL:
+                    await conn.exec_driver_sql(statement)
+            self._disk_ready = True
+        return database
+
+    async def get(self, key: str) -> Optional[str]:
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires, content, size = entry
+            if expires > now:
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+                tracing.count("cache.hit")
+                self.stats.hit_bytes += size
+                return content
+            self._discard(key)
+
+        database = await self._ensure_disk()
+        if database is not None:
+            async with database.async_session() as session:
+                row = (await session.execute(
+                    select(completions.c.content, completions.c.expires)
+                    .where(completions.c.key == key, completions.c.expires > time.time())
+                )).first()
+            if row is not None:
+                self.stats.hits += 1
+                self.stats.disk_hits += 1
+                tracing.count("cache.hit")
+                self.stats.hit_bytes += len(row.content.encode())
+                self._remember(key, row.content, row.expires - time.time())
+                return row.content
+
+        self.stats.misses += 1
+        tracing.count("cache.miss")
+        return None
+
+    async def set(self, key: str, content: str):
+        self.stats.stores += 1
+        self._remember(key, content, self.config.ttl)
+
+        database = await self._ensure_disk()
+        if database is None:
+            return
+        now = time.time()
+        statement = sqlite_insert(completions).values(
+            key=key, content=content, created=now, expires=now + self.config.ttl
+        )
+        async with database.async_session() as session:
+            async with session.begin():
+                await session.execute(statement.on_conflict_do_update(
+                    index_elements=[completions.c.key],
+                    set_={"content": content, "created": now, "expires": now + self.config.ttl}
+                ))
+                await self._evict_disk(session, now)
+
+    async def _evict_disk(self, session, now: float, batch: int = 100):
+        """Bring the disk tier back under its limits: expired rows first, then the oldest"""
+        stats = text("SELECT entries, bytes FROM llm_cache_stats WHERE id = 1")
+        entries, stored = (await session.execute(stats)).one()
+        if entries <= self.config.max_disk_entries and stored <= self.config.max_disk_bytes:
+            return
+        await session.execute(delete(completions).where(completions.c.expires <= now))
+        entries, stored = (await session.execute(stats)).one()
+        while entries > self.config.max_disk_entries or (stored > self.config.max_disk_bytes and entries):
+            excess = max(entries - self.config.max_disk_entries, 0) or batch
+            oldest = select(completions.c.key).order_by(completions.c.created).limit(excess)
+            await session.execute(delete(completions).where(completions.c.key.in_(oldest)))
+            entries, stored = (await session.execute(stats)).one()
+
+    def _remember(self, key: str, content: str, ttl: float):
+        size = len(content.encode())
+        if size > self.config.max_bytes:
+            return
+        self._discard(key)
+        self._entries[key] = (time.monotonic() + ttl, content, size)
+        self.stats.bytes += size
+        while len(self._entries) > self.config.max_entries or self.stats.bytes > self.config.max_bytes:
+            oldest = next(iter(self._entries))
+            self._discard(oldest)
+            self.stats.evictions += 1
+
+    def _discard(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.stats.bytes -= entry[2]
+
+    async def get_or_call(
+        self,
+        model: str,
+        prompt: str,
+        params: Dict,
+        call: Callable[[], Awaitable[str]],
+        force: bool = False
+    ) -> str:
+        """Return the cached completion, or await ``call()`` and cache its result"""
+        if not self.cacheable(params, force):
+            self.stats.bypassed += 1
+            return await call()
+        key = cache_key(model, prompt, params)
+        content = await self.get(key)
+        if content is None:
+            content = await call()
+            await self.set(key, content)
+        return content
+
+    def clear(self):
+        self._entries.clear()
+        self.stats.bytes = 0
+
+
+_shared_cache: Optional[CompletionCache] = None
+
+
+def get_completion_cache() -> CompletionCache:
+    """Return the process-wide completion cache, creating it on first use"""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = CompletionCache()
+    return _shared_cache
+
+
+def configure_completion_cache(config: CacheConfig) -> CompletionCache:
+    """Replace the process-wide cache (e.g. to add the SQLite tier)"""
+    global _shared_cache
+    _shared_cache = CompletionCache(config)
+    return _shared_cache
@@ -0,0 +1,247 @@
+import asyncio
+import json
+import os
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import AsyncIterator, List, Optional, Union
+import httpx
+from dotenv import load_dotenv
+from agents.llm_transport import build_transport
+from utils import tracing
+from utils.rate_limiter import THROTTLE_STATUSES, PriorityRateLimiter, RateLimitConfig, parse_duration
+
+load_dotenv()
+
+try:
+    import h2  # noqa: F401 - only needed so httpx can negotiate HTTP/2
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger("llm_client")
+
+# The one DeepSeek quota for every agent in the process. Set
+# DEEPSEEK_LIMITER_PATH to share it between worker processes.
+# The rate starts at DEEPSEEK_RATE_LIMIT calls/sec, adapts to 429/503s
+# and may climb to DEEPSEEK_MAX_RATE.
+DEEPSEEK_RATE_LIMIT = int(os.getenv("DEEPSEEK_RATE_LIMIT", 5))
+DEEPSEEK_LIMITER = PriorityRateLimiter(
+    RateLimitConfig(
+        max_calls=DEEPSEEK_RATE_LIMIT,
+        period=1.0,
+        shared_path=os.getenv("DEEPSEEK_LIMITER_PATH"),
+        adaptive=True,
+        max_rate=float(os.getenv("DEEPSEEK_MAX_RATE", DEEPSEEK_RATE_LIMIT))
+    )
+)
+
+
+@dataclass
+class LLMClientConfig:
+    base_url: str = field(default_factory=lambda: os.getenv("DEEPSEEK_API_BASE", "https://api.deepseek.com/v1"))
+    api_key: Optional[str] = field(default_factory=lambda: os.getenv("DEEPSEEK_API_KEY"))
+    model: str = "deepseek-chat"
+    max_tokens: int = 500
+    http2: bool = True
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    timeout: float = 30.0
+    connect_timeout: float = 10.0
+    # Extra attempts after a 429/503 before the error is raised
+    throttle_retries: int = 3
+    # "http", "record:PATH", "replay:PATH" or an httpx transport (see llm_transport)
+    transport: Union[str, httpx.AsyncBaseTransport] = field(default_factory=lambda: os.getenv("LLM_TRANSPORT", "http"))
+
+
+class LLMClient:
+    """Pooled, keep-alive HTTP client shared by every agent in the process"""
+
+    def __init__(self, config: LLMClientConfig = None):
+        self.config = config or LLMClientConfig()
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _build_client(self) -> httpx.AsyncClient:
+        use_http2 = self.config.http2 and HTTP2_AVAILABLE
+        if self.config.http2 and not HTTP2_AVAILABLE:
+            logger.debug("h2 not installed, falling back to HTTP/1.1 keep-alive")
+        http = httpx.AsyncHTTPTransport(
+            http2=use_http2,
+            limits=httpx.Limits(
+                max_connections=self.config.max_connections,
+                max_keepalive_connections=self.config.max_keepalive_connections,
+                keepalive_expiry=self.config.keepalive_expiry
+            )
+        )
+        return httpx.AsyncClient(
+            base_url=self.config.base_url,
+            transport=build_transport(self.config.transport, http),
+            timeout=httpx.Timeout(self.config.timeout, connect=self.config.connect_timeout),
+            headers={"Authorization": f"Bearer {self.config.api_key}"}
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Lazily open the pool, re-opening it if the event loop changed"""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            # Connections are bound to the loop that opened them, so a pool
+            # left over from a previous asyncio.run() cannot be reused
+            self._client = self._build_client()
+            self._loop = loop
+        return self._client
+
+    async def start(self) -> "LLMClient":
+        self.client
+        return self
+
+    async def aclose(self):
+        if self._client is not None and not self._client.is_closed:
+            if self._loop is asyncio.get_running_loop():
+                await self._client.aclose()
+        self._client = None
+        self._loop = None
+
+    async def warm_up(self, connections: int = 1):
+        """Open ``connections`` pooled connections ahead of the first real call,
+        so its latency doesn't include the TCP/TLS handshake"""
+        async def touch():
+            try:
+                await self.client.get("/models")
+            except Exception as e:  # any answer, even an error status, leaves a warm connection
+                logger.debug(f"Warm-up request failed: {type(e).__name__} - {e}")
+
+        with tracing.span("llm_warm_up", connections=connections):
+            await asyncio.gather(*(touch() for _ in range(connections)))
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+    def build_payload(self, prompt: str, **params) -> dict:
+        payload = {
+            "model": self.config.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": self.config.max_tokens
+        }
+        payload.update(params)
+        return payload
+
+    async def _throttled(self, response: httpx.Response, attempt: int, limiter) -> bool:
+        """Report the response to the limiter; True if the request should be retried"""
+        if limiter is not None:
+            limiter.observe(response.status_code, response.headers)
+        if response.status_code not in THROTTLE_STATUSES or attempt >= self.config.throttle_retries:
+            return False
+        logger.debug(f"Upstream returned {response.status_code}, retrying (attempt {attempt + 1})")
+        tracing.count("llm.retries")
+        if limiter is None:
+            retry_after = parse_duration(response.headers.get("retry-after"))
+            await asyncio.sleep(retry_after if retry_after is not None else 2 ** attempt)
+        return True
+
+    async def _post(self, path: str, payload: dict, limiter=None) -> dict:
+        for attempt in range(self.config.throttle_retries + 1):
+            if limiter is not None:
+                with tracing.span("limiter_wait"):
+                    await limiter.wait()
+            with tracing.span("llm_call", attempt=attempt) as span:
+                response = await self.client.post(path, json=payload)
+                span.set("status", response.status_code)
+            if not await self._throttled(response, attempt, limiter):
+                break
+        response.raise_for_status()
+        data = response.json()
+        usage = data.get("usage")
+        if usage:
+            tracing.count("tokens.prompt", usage.get("prompt_tokens", 0))
+            tracing.count("tokens.completion", usage.get("completion_tokens", 0))
+        return data
+
+    async def chat_completion(self, prompt: str, limiter=None, **params) -> str:
+        """Send one chat completion over the shared pool and return the text.
+
+        With a ``limiter``, each attempt waits for a slot and the response
+        is fed back to it; 429/503 responses are retried after Retry-After.
+        """
+        data = await self._post("/chat/completions", self.build_payload(prompt, **params), limiter)
+        return data["choices"][0]["message"]["content"]
+
+    async def batch_completion(self, prompts: List[str], limiter=None, **params) -> List[str]:
+        """Complete several prompts in one request to the legacy /completions
+        endpoint, which OpenAI-compatible local servers (vLLM, llama.cpp)
+        accept with a list of prompts. Takes one limiter slot for the lot.
+        """
+        payload = {"model": self.config.model, "prompt": list(prompts), "max_tokens": self.config.max_tokens}
+        payload.update(params)
+        data = await self._post("/completions", payload, limiter)
+        choices = sorted(data["choices"], key=lambda choice: choice["index"])
+        if len(choices) != len(prompts):
+            raise ValueError(f"Expected {len(prompts)} completions, got {len(choices)}")
+        return [choice["text"] for choice in choices]
+
+    async def stream_chat_completion(self, prompt: str, limiter=None, **params) -> AsyncIterator[str]:
+        """Yield content deltas as the provider's SSE chunks arrive"""
+        payload = self.build_payload(prompt, stream=True, **params)
+        for attempt in range(self.config.throttle_retries + 1):
+            if limiter is not None:
+                with tracing.span("limiter_wait"):
+                    await limiter.wait()
+            # The stream spans yields, so it is timed by hand rather than with a span
+            start = time.perf_counter()
+            first_token = None
+            chunks = 0
+            async with self.client.stream("POST", "/chat/completions", json=payload) as response:
+                if await self._throttled(response, attempt, limiter):
+                    tracing.record("llm_call", time.perf_counter() - start, attempt=attempt,
+                                   status=response.status_code, stream=True)
+                    continue
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    delta = json.loads(data)["choices"][0].get("delta", {})
+                    if delta.get("content"):
+                        if first_token is None:
+                            first_token = time.perf_counter() - start
+                        chunks += 1
+                        yield delta["content"]
+            tracing.record("llm_call", time.perf_counter() - start, attempt=attempt, status=response.status_code,
+                           stream=True, ttft=first_token)
+            tracing.count("tokens.completion", chunks)
+            return
+
+
+_shared_client: Optional[LLMClient] = None
+
+
+def get_llm_client() -> LLMClient:
+    """Return the process-wide LLM client, creating it on first use"""
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = LLMClient()
+    return _shared_client
+
+
+async def startup_llm_client(config: LLMClientConfig = None) -> LLMClient:
+    """Configure and open the shared client (call once at application start)"""
+    global _shared_client
+    if _shared_client is not None:
+        await _shared_client.aclose()
+    _shared_client = LLMClient(config)
+    return await _shared_client.start()
+
+
+async def shutdown_llm_client():
+    """Close the shared client and release pooled connections"""
+    global _shared_client
+    if _shared_client is not None:
+        await _shared_client.aclose()
+        _shared_client = None
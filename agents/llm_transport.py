@@ -0,0 +1,190 @@
+"""
+Pluggable transports for the shared LLM client
+
+``LLMClientConfig.transport`` (or ``LLM_TRANSPORT``) picks how requests
+leave the process:
+
+- ``http`` (default): the pooled keep-alive connection to ``base_url``
+- ``record:PATH``: same, and every exchange is appended to PATH
+- ``replay:PATH``: answer from the exchanges in PATH, no network at all
+
+Recordings are JSONL (gzip-compressed when PATH ends in ``.gz``), one
+exchange per line, keyed by method, path and request body; the API key is
+never written. Point ``DEEPSEEK_API_BASE`` at ``python -m utils.llm_stub``
+for a local server instead.
+"""
+
+import asyncio
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+import httpx
+
+logger = logging.getLogger("llm_transport")
+
+# Response headers worth replaying; the rest are connection details
+_KEPT_HEADERS = ("content-type", "content-encoding", "retry-after")
+
+
+class ReplayMissError(LookupError):
+    """A replayed request has no recorded exchange"""
+
+
+def request_key(method: str, path: str, body: bytes) -> str:
+    """Stable key of a request: JSON bodies are compared with sorted keys"""
+    try:
+        body = json.dumps(json.loads(body), sort_keys=True, separators=(",", ":")).encode()
+    except ValueError:
+        pass
+    return hashlib.sha256(method.encode() + b" " + path.encode() + b"\n" + body).hexdigest()
+
+
+def _open(path: str, mode: str):
+    return gzip.open(path, mode, encoding="utf-8") if path.endswith(".gz") else open(path, mode, encoding="utf-8")
+
+
+def _encode_body(record: Dict, body: bytes, encoded: bool):
+    if not encoded:
+        try:
+            record["body"] = body.decode("utf-8")
+            return
+        except UnicodeDecodeError:
+            pass
+    record["body_b64"] = base64.b64encode(body).decode("ascii")
+
+
+def _decode_body(record: Dict) -> bytes:
+    if "body_b64" in record:
+        return base64.b64decode(record["body_b64"])
+    return record.get("body", "").encode("utf-8")
+
+
+class _TeeStream(httpx.AsyncByteStream):
+    """Pass response chunks through, keeping a copy for the recording"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, on_close):
+        self._stream = stream
+        self._on_close = on_close
+        self._chunks: List[bytes] = []
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            self._chunks.append(chunk)
+            yield chunk
+
+    async def aclose(self):
+        await self._stream.aclose()
+        self._on_close(b"".join(self._chunks))
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Forward requests to ``inner`` and append each exchange to ``path``"""
+
+    def __init__(self, path: str, inner: httpx.AsyncBaseTransport):
+        self.path = path
+        self.inner = inner
+        self.recorded = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        start = time.perf_counter()
+        response = await self.inner.handle_async_request(request)
+
+        def record(content: bytes):
+            entry = {
+                "key": request_key(request.method, request.url.path, body),
+                "method": request.method,
+                "path": request.url.path,
+                "request": body.decode("utf-8", "replace"),
+                "status": response.status_code,
+                "headers": {
+                    name: value for name, value in response.headers.items()
+                    if name in _KEPT_HEADERS or name.startswith("x-ratelimit-")
+                },
+                "elapsed": round(time.perf_counter() - start, 4),
+            }
+            _encode_body(entry, content, "content-encoding" in response.headers)
+            with _open(self.path, "at") as f:
+                f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            self.recorded += 1
+
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=_TeeStream(response.stream, record),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self):
+        await self.inner.aclose()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Serve recorded exchanges back without touching the network.
+
+    Identical requests are answered in the order they were recorded, the
+    last answer repeating once they run out. Requests with no recording go
+    to ``fallback`` when one is given, otherwise raise ReplayMissError.
+    With ``realtime`` each answer takes as long as it did when recorded.
+    """
+
+    def __init__(self, path: str, fallback: Optional[httpx.AsyncBaseTransport] = None, realtime: bool = False):
+        self.path = path
+        self.fallback = fallback
+        self.realtime = realtime
+        self.hits = 0
+        self.misses = 0
+        self._exchanges: Dict[str, List[Dict]] = defaultdict(list)
+        self._served: Dict[str, int] = defaultdict(int)
+        with _open(path, "rt") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._exchanges[entry["key"]].append(entry)
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._exchanges.values())
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        key = request_key(request.method, request.url.path, body)
+        entries = self._exchanges.get(key)
+        if not entries:
+            self.misses += 1
+            if self.fallback is not None:
+                return await self.fallback.handle_async_request(request)
+            raise ReplayMissError(f"No recorded exchange for {request.method} {request.url.path} in {self.path}")
+
+        index = min(self._served[key], len(entries) - 1)
+        self._served[key] += 1
+        entry = entries[index]
+        self.hits += 1
+        if self.realtime and entry.get("elapsed"):
+            await asyncio.sleep(entry["elapsed"])
+        return httpx.Response(entry["status"], headers=entry["headers"], content=_decode_body(entry))
+
+    async def aclose(self):
+        if self.fallback is not None:
+            await self.fallback.aclose()
+
+
+def build_transport(spec, http: httpx.AsyncBaseTransport) -> httpx.AsyncBaseTransport:
+    """Resolve a transport spec ("http", "record:PATH", "replay:PATH" or a
+    transport instance) around the pooled ``http`` transport"""
+    if isinstance(spec, httpx.AsyncBaseTransport):
+        return spec
+    kind, _, path = (spec or "http").partition(":")
+    if kind == "http":
+        return http
+    if not path:
+        raise ValueError(f"Transport {spec!r} needs a file path, e.g. {kind}:llm_recording.jsonl.gz")
+    if kind == "record":
+        return RecordingTransport(path, http)
+    if kind == "replay":
+        return ReplayTransport(path)
+    raise ValueError(f"Unknown LLM transport {spec!r}; expected http, record:PATH or replay:PATH")
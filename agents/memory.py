@@ -1,156 +1,583 @@
+import asyncio
 import json
-from sqlalchemy import Column, String, Text, DateTime, func
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy import Column, String, Text, DateTime, Integer, func, select, delete, insert, literal
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from datetime import datetime
-from typing import List, Dict, Optional
-import os
-from pathlib import Path
-import yaml
-from pydantic import BaseModel
+from typing import List, Dict, Optional, Tuple
+import uuid
+from agents import migrations
+from agents.db import Database, get_database, sqlite_url, dispose_engines
+from agents.write_behind import WriteBehindQueue
+from agents.eviction import EvictionPolicy, SessionEvictor
+from agents.summarizer import ExtractiveSummarizer, Summarizer
+from agents.search import MessageSearch, SearchHit
+# Formerly duplicated here; kept importable from agents.memory
+from agents.persona_manager import PersonaManager, Scenario  # noqa: F401
 
 Base = declarative_base()
 
-class Scenario(BaseModel):
-    scenario: str
-    description: str
-    personas: Dict[str, Dict]
-    story_arc: List[Dict]
+# One write-behind queue per database file, shared by every AgentMemory
+# that opted in, so a flush batches many sessions into one transaction
+_write_behind_queues: Dict[str, WriteBehindQueue] = {}
 
-class PersonaManager:
-    def __init__(self, scenario_dir: str = "scenarios"):
-        self.scenario_dir = Path(scenario_dir)
-        self.loaded_scenarios: Dict[str, Scenario] = {}
+# Likewise one evictor per database, so limits are checked against the
+# database's totals rather than per AgentMemory instance
+_evictors: Dict[str, SessionEvictor] = {}
 
-    def load_scenario(self, scenario_name: str) -> Scenario:
-        filepath = self.scenario_dir / f"{scenario_name}.yaml"
-        with open(filepath) as f:
-            data = yaml.safe_load(f)
-            scenario = Scenario(**data)
-            self.loaded_scenarios[scenario_name] = scenario
-            return scenario
-
-    def get_persona(self, scenario_name: str, persona_name: str) -> Dict:
-        return self.loaded_scenarios[scenario_name].personas[persona_name]
-
-    def get_story_arc(self, scenario_name: str) -> List[Dict]:
-        return self.loaded_scenarios[scenario_name].story_arc
+# Background compactions still running, awaited by shutdown_memory()
+_compaction_tasks = set()
 
 class Conversation(Base):
     __tablename__ = "conversations"
     
     session_id = Column(String(64), primary_key=True, nullable=False)
     history = Column(Text, default="[]", nullable=False)
-    last_updated = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_updated = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
     size_kb = Column(String(10), default="0.00", nullable=False)
+    message_count = Column(Integer, default=0, nullable=False)
+    size_bytes = Column(Integer, default=0, nullable=False)
+    scenario = Column(String(64), nullable=True, index=True)
 
     def get_history(self) -> List[Dict]:
+        """Legacy JSON blob; messages now live in the messages table"""
         return json.loads(self.history or "[]")
 
+class Message(Base):
+    """One conversation turn, appended with a single INSERT"""
+    __tablename__ = "messages"
+    # The (session_id, seq) primary key is the clustered index, so a
+    # session's messages are stored together and read as a range scan
+    __table_args__ = {"sqlite_with_rowid": False}
+
+    session_id = Column(String(64), primary_key=True, nullable=False)
+    seq = Column(Integer, primary_key=True, nullable=False)
+    role = Column(String(64), nullable=False)
+    content = Column(Text, nullable=False)
+    metadata_json = Column("metadata", Text, nullable=True)
+    timestamp = Column(String(32), nullable=True)
+
+    def to_dict(self) -> Dict:
+        message = {"seq": self.seq, "role": self.role, "content": self.content, "timestamp": self.timestamp}
+        if self.metadata_json:
+            message["metadata"] = json.loads(self.metadata_json)
+        return message
+
+class Summary(Base):
+    """Condensed record standing in for a compacted range of messages"""
+    __tablename__ = "summaries"
+    __table_args__ = {"sqlite_with_rowid": False}
+
+    session_id = Column(String(64), primary_key=True, nullable=False)
+    start_seq = Column(Integer, primary_key=True, nullable=False)
+    end_seq = Column(Integer, nullable=False)
+    # 0 summarises messages, n > 0 summarises level n-1 summaries
+    level = Column(Integer, default=0, nullable=False)
+    content = Column(Text, nullable=False)
+    created = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def to_dict(self) -> Dict:
+        return {
+            "start_seq": self.start_seq,
+            "end_seq": self.end_seq,
+            "level": self.level,
+            "content": self.content
+        }
+
 class AgentMemory:
     async def initialize_db(self):
-        async with self.engine.begin() as conn:
+        database = self.database
+        async with database.engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(migrations.upgrade)
+        database.schema_ready = True
+
+    async def _ensure_db(self):
+        # Schema setup runs once per database, not once per AgentMemory
+        database = self.database
+        if not database.schema_ready:
+            async with database.init_lock:
+                if not database.schema_ready:
+                    await self.initialize_db()
 
-    def __init__(self, session_id: str = None, max_sessions=1000, max_storage_mb=100):
+    def __init__(
+        self,
+        session_id: str = None,
+        max_sessions=1000,
+        max_storage_mb=100,
+        db_path: str = "agent_memory.db",
+        prune_every: int = 100,
+        prune_interval: Optional[float] = None,
+        low_water_ratio: float = 0.9,
+        write_behind: bool = False,
+        flush_batch_size: int = 200,
+        flush_interval: float = 0.5,
+        summarize_after: Optional[int] = None,
+        keep_recent_messages: int = 20,
+        max_summaries: int = 8,
+        summarizer: Summarizer = None,
+        scenario: Optional[str] = None
+    ):
         self.session_id = session_id or str(uuid.uuid4())
+        # Recorded on the session row so searches can filter by scenario
+        self.scenario = scenario
         self.max_sessions = max_sessions
         self.max_storage_mb = max_storage_mb
-        self.db_path = "agent_memory.db"
-        self.engine = create_async_engine(
-            f"sqlite+aiosqlite:///{self.db_path}",
-            connect_args={"check_same_thread": False}
-        )
-        self.async_session = async_sessionmaker(
-            self.engine,
-            expire_on_commit=False,
-            autoflush=False
-        )
+        self.prune_every = prune_every
+        self.prune_interval = prune_interval
+        self.low_water_ratio = low_water_ratio
+        self.db_path = db_path
+        self.write_behind = write_behind
+        self.flush_batch_size = flush_batch_size
+        self.flush_interval = flush_interval
+        # Hierarchical mode: past summarize_after stored messages, everything
+        # but the newest keep_recent_messages is folded into a summary
+        self.summarize_after = summarize_after
+        self.keep_recent_messages = keep_recent_messages
+        self.max_summaries = max_summaries
+        self.summarizer = summarizer or ExtractiveSummarizer()
+        if keep_recent_messages < 1:
+            # A compaction always leaves the newest message verbatim
+            raise ValueError("keep_recent_messages must be at least 1")
+        self._live_messages: Optional[int] = None
+        self._compaction_task: Optional[asyncio.Task] = None
+
+    @property
+    def database(self) -> Database:
+        """Shared engine/sessionmaker for this database file (see agents/db.py)"""
+        return get_database(sqlite_url(self.db_path))
+
+    @property
+    def engine(self) -> AsyncEngine:
+        return self.database.engine
+
+    @property
+    def async_session(self) -> async_sessionmaker:
+        return self.database.async_session
+
+    async def get_context(self) -> str:
+        """Returns the full formatted conversation history.
 
-    def get_context(self) -> str:
-        """Returns formatted conversation history"""
-        conv = self.db.get(Conversation, self.session_id)
-        if not conv:
+        Prompts should use agents.context.ContextBuilder, which fits the
+        history into a token budget instead.
+        """
+        history = await self.get_messages_since(-1, limit=-1)
+        if not history:
             return "No conversation history"
-            
-        history = conv.get_history()
         return "\n".join(
             f"{msg['role']}: {msg['content']}"
             for msg in history
         )
 
-    def _calculate_size(self):
-        return os.path.getsize(self.db_path) / 1024 / 1024
-
-    async def _prune_sessions(self, session):
-        from sqlalchemy import select, func
-        from sqlalchemy import delete
-        
-        # Size-based pruning
-        if self._calculate_size() > self.max_storage_mb:
-            stmt = select(Conversation).order_by(Conversation.last_updated).limit(1)
-            oldest = (await session.execute(stmt)).scalar()
-            if oldest:
-                await session.delete(oldest)
-        
-        # Count-based pruning
-        count = (await session.execute(select(func.count()).select_from(Conversation))).scalar()
-        if count > self.max_sessions:
-            to_remove = count - self.max_sessions
-            stmt = select(Conversation).order_by(Conversation.last_updated).limit(to_remove)
-            oldest = await session.execute(stmt)
-            for conv in oldest.scalars():
-                await session.delete(conv)
-        
-        await session.commit()
+    def _evictor(self) -> SessionEvictor:
+        evictor = _evictors.get(self.db_path)
+        if evictor is None or evictor.loop is not asyncio.get_running_loop():
+            evictor = SessionEvictor(self.async_session, EvictionPolicy(
+                max_sessions=self.max_sessions,
+                max_storage_mb=self.max_storage_mb,
+                low_water_ratio=self.low_water_ratio,
+                check_every=self.prune_every,
+                interval=self.prune_interval
+            ))
+            _evictors[self.db_path] = evictor
+        return evictor
+
+    async def _prune_sessions(self, session, writes: int = 1):
+        await self._evictor().after_write(session, writes)
 
     async def get_messages(self, limit: int = 10, offset: int = 0) -> List[Dict]:
-        """Retrieve conversation messages with pagination"""
+        """Retrieve conversation messages with pagination.
+
+        ``offset`` counts the session's live messages, so after a compaction
+        page 0 still starts at the oldest message kept.
+        """
+        await self._ensure_db()
+        # Snapshot unflushed rows before querying so a flush that commits
+        # in between cannot hide them from this read
+        unflushed = self._pending_rows()
+        async with self.async_session() as session:
+            pending = await self._number_pending(session, unflushed)
+            conditions = [Message.session_id == self.session_id]
+            if pending:
+                # Unflushed rows always follow committed ones
+                conditions.append(Message.seq < pending[0][0])
+            result = await session.execute(
+                select(Message).where(*conditions).order_by(Message.seq).offset(offset).limit(limit)
+            )
+            page = [msg.to_dict() for msg in result.scalars()]
+            if pending and len(page) < limit:
+                committed = offset + len(page) if page else (await session.execute(
+                    select(func.count()).select_from(Message).where(*conditions)
+                )).scalar()
+                skip = max(0, offset - committed)
+                page += [self._row_to_dict(row, seq) for seq, row in pending[skip:skip + limit - len(page)]]
+        return page
+
+    async def get_messages_since(self, seq: int, limit: int = 100) -> List[Dict]:
+        """Messages with a seq greater than ``seq``, oldest first (limit -1 for all)"""
+        await self._ensure_db()
+        unflushed = self._pending_rows()
         async with self.async_session() as session:
-            conv = await session.get(Conversation, self.session_id)
-            if not conv:
-                return []
-                
-            history = conv.get_history()
-            return history[offset:offset+limit]
+            pending = await self._number_pending(session, unflushed)
+            stmt = (
+                select(Message)
+                .where(Message.session_id == self.session_id, Message.seq > seq)
+                .order_by(Message.seq)
+            )
+            if limit >= 0:
+                # Unflushed rows always follow committed ones, so limiting
+                # the committed part first cannot skip any of them
+                stmt = stmt.limit(limit)
+            result = await session.execute(stmt)
+            messages = {msg.seq: msg.to_dict() for msg in result.scalars()}
+
+        for pending_seq, row in pending:
+            if pending_seq > seq:
+                messages.setdefault(pending_seq, self._row_to_dict(row, pending_seq))
+        messages = [messages[key] for key in sorted(messages)]
+        return messages if limit < 0 else messages[:limit]
+
+    async def _number_pending(self, session, unflushed: List[Dict]) -> List[Tuple[int, Dict]]:
+        """Pair unflushed rows with their seq: the final one for rows whose
+        flush has just committed, otherwise the one the flush will give them"""
+        if all("seq" in row for row in unflushed):
+            return [(row["seq"], row) for row in unflushed]
+        count = (await session.execute(
+            select(Conversation.message_count).where(Conversation.session_id == self.session_id)
+        )).scalar()
+        next_seq = max([count or 0] + [row["seq"] + 1 for row in unflushed if "seq" in row])
+        numbered = []
+        for row in unflushed:
+            if "seq" in row:
+                numbered.append((row["seq"], row))
+            else:
+                numbered.append((next_seq, row))
+                next_seq += 1
+        return numbered
+
+    def _row_to_dict(self, row: Dict, seq: int) -> Dict:
+        message = {"seq": seq, "role": row["role"], "content": row["content"], "timestamp": row["timestamp"]}
+        if row["metadata"]:
+            message["metadata"] = json.loads(row["metadata"])
+        return message
+
+    def _serialize(self, role: str, content) -> Dict:
+        # Handle AgentResponse objects
+        if hasattr(content, 'response'):
+            return {
+                "role": role,
+                "content": content.response,
+                "metadata": {
+                    "confidence": content.confidence,
+                    "action": content.action,
+                    "emotion": content.emotion
+                },
+                "timestamp": str(datetime.now())
+            }
+        return {
+            "role": role,
+            "content": str(content),
+            "timestamp": str(datetime.now())
+        }
 
     async def add_message(self, role: str, content: str):
+        await self._ensure_db()
+        message = self._serialize(role, content)
+        if self.write_behind:
+            await self._enqueue(message)
+            self._note_appended()
+            return
+
+        size = len(message["content"].encode())
+        now = datetime.utcnow()
+
+        # The session's message counter only ever goes up, so a seq is never
+        # reused once compaction has deleted the rows below it
+        next_seq = func.coalesce(
+            select(Conversation.message_count)
+            .where(Conversation.session_id == self.session_id)
+            .scalar_subquery(),
+            0
+        )
+        insert_message = insert(Message).from_select(
+            ["session_id", "seq", "role", "content", "metadata", "timestamp"],
+            select(
+                literal(self.session_id),
+                next_seq,
+                literal(message["role"]),
+                literal(message["content"]),
+                literal(json.dumps(message["metadata"]) if "metadata" in message else None, Text),
+                literal(message["timestamp"])
+            )
+        )
         async with self.async_session() as session:
             async with session.begin():
-                conv = await session.get(Conversation, self.session_id) or Conversation(
-                    session_id=self.session_id,
-                    history="[]"
-                )
-                
-                history = conv.get_history()
-                # Handle AgentResponse objects
-                if hasattr(content, 'response'):
-                    serialized = {
-                        "role": role,
-                        "content": content.response,
-                        "metadata": {
-                            "confidence": content.confidence,
-                            "action": content.action,
-                            "emotion": content.emotion
-                        },
-                        "timestamp": str(datetime.now())
-                    }
-                else:
-                    serialized = {
-                        "role": role,
-                        "content": str(content),
-                        "timestamp": str(datetime.now())
-                    }
-                history.append(serialized)
-                
-                conv.history = json.dumps(history)
-                conv.last_updated = datetime.utcnow()
-                conv.size_kb = f"{len(conv.history) / 1024:.2f}"
-                
-                session.add(conv)
+                await session.execute(insert_message)
+                await session.execute(self._counter_upsert(self.session_id, 1, size, now, self.scenario))
                 await self._prune_sessions(session)
-            conv.size_kb = f"{len(conv.history) / 1024:.2f}"
-            
-            session.add(conv)
-            await session.commit()
-            await self._prune_sessions(session)
\ No newline at end of file
+        self._note_appended()
+
+    def _counter_upsert(self, session_id: str, count: int, size: int, now: datetime, scenario: str = None):
+        """Create the session row or bump its message/byte counters"""
+        upsert = sqlite_insert(Conversation).values(
+            session_id=session_id,
+            history="[]",
+            last_updated=now,
+            message_count=count,
+            size_bytes=size,
+            size_kb=f"{size / 1024:.2f}",
+            scenario=scenario
+        )
+        return upsert.on_conflict_do_update(
+            index_elements=[Conversation.session_id],
+            set_={
+                "last_updated": now,
+                "message_count": Conversation.message_count + count,
+                "size_bytes": Conversation.size_bytes + size,
+                "size_kb": func.printf("%.2f", (Conversation.size_bytes + size) / 1024.0),
+                "scenario": func.coalesce(upsert.excluded.scenario, Conversation.scenario)
+            }
+        )
+
+    def _write_behind_queue(self, create: bool = False) -> Optional[WriteBehindQueue]:
+        queue = _write_behind_queues.get(self.db_path)
+        stale = queue is not None and (queue._closed or queue.loop is not asyncio.get_running_loop())
+        if create and (queue is None or stale):
+            queue = WriteBehindQueue(self._write_batch, self.flush_batch_size, self.flush_interval)
+            _write_behind_queues[self.db_path] = queue
+        elif stale:
+            return None
+        return queue
+
+    def _pending_rows(self) -> List[Dict]:
+        queue = self._write_behind_queue() if self.write_behind else None
+        return queue.pending_for(self.session_id) if queue else []
+
+    async def _enqueue(self, message: Dict):
+        # No seq yet: it is allocated when the row is written, so memories
+        # sharing a session (or a direct writer) never pick the same one
+        await self._write_behind_queue(create=True).put({
+            "session_id": self.session_id,
+            "role": message["role"],
+            "content": message["content"],
+            "metadata": json.dumps(message["metadata"]) if "metadata" in message else None,
+            "timestamp": message["timestamp"],
+            "scenario": self.scenario
+        })
+
+    async def _write_batch(self, rows: List[Dict]):
+        """Write a batch of queued rows (possibly many sessions) in one transaction"""
+        now = datetime.utcnow()
+        totals: Dict[str, List] = {}
+        for row in rows:
+            total = totals.setdefault(row["session_id"], [0, 0, None])
+            total[0] += 1
+            total[1] += len(row["content"].encode())
+            total[2] = row.get("scenario") or total[2]
+
+        try:
+            async with self.async_session() as session:
+                async with session.begin():
+                    # Bumping the counters first takes the write lock; each
+                    # session's batch then gets the seqs just below its new count
+                    for session_id, (count, size, scenario) in totals.items():
+                        await session.execute(self._counter_upsert(session_id, count, size, now, scenario))
+                    counts = dict((await session.execute(
+                        select(Conversation.session_id, Conversation.message_count)
+                        .where(Conversation.session_id.in_(list(totals)))
+                    )).all())
+                    next_seqs = {session_id: counts[session_id] - total[0] for session_id, total in totals.items()}
+                    # Rows get their seq before the commit: a reader that
+                    # sees the new count then also sees the final seqs,
+                    # and won't number the rows a second time
+                    for row in rows:
+                        row["seq"] = next_seqs[row["session_id"]]
+                        next_seqs[row["session_id"]] += 1
+                    await session.execute(insert(Message), [
+                        {
+                            "session_id": row["session_id"],
+                            "seq": row["seq"],
+                            "role": row["role"],
+                            "content": row["content"],
+                            "metadata_json": row["metadata"],
+                            "timestamp": row["timestamp"]
+                        }
+                        for row in rows
+                    ])
+                    await self._prune_sessions(session, len(rows))
+        except BaseException:
+            # Rolled back: the retry allocates seqs afresh
+            for row in rows:
+                row.pop("seq", None)
+            raise
+
+    async def flush(self):
+        """Commit any write-behind messages still queued for this database"""
+        queue = self._write_behind_queue()
+        if queue:
+            await queue.flush()
+        if self._compaction_task is not None:
+            await self._compaction_task
+
+    async def clear(self):
+        """Delete this session's messages, summaries and counters"""
+        await self._ensure_db()
+        await self.flush()
+        async with self.async_session() as session:
+            async with session.begin():
+                # Children first: conversations' delete trigger keeps storage_stats right
+                for model in (Message, Summary, Conversation):
+                    await session.execute(delete(model).where(model.session_id == self.session_id))
+        self._live_messages = 0
+
+    async def search(self, query: str, all_sessions: bool = False, **filters) -> List[SearchHit]:
+        """Full-text search over this session's messages (every session's
+        with ``all_sessions``); ``filters`` are those of MessageSearch.search.
+
+        Queued write-behind messages are flushed first so they are found.
+        """
+        await self._ensure_db()
+        await self.flush()
+        if not all_sessions:
+            filters.setdefault("session_id", self.session_id)
+        return await MessageSearch(self.async_session).search(query, **filters)
+
+    def _note_appended(self):
+        if not self.summarize_after:
+            return
+        if self._live_messages is not None:
+            self._live_messages += 1
+            if self._live_messages <= self.summarize_after:
+                return
+        # Unknown (first write from this instance) or over threshold
+        if self._compaction_task is None or self._compaction_task.done():
+            self._compaction_task = asyncio.create_task(self.compact())
+            _compaction_tasks.add(self._compaction_task)
+            self._compaction_task.add_done_callback(_compaction_tasks.discard)
+
+    async def get_summaries(self) -> List[Dict]:
+        """Summary records for this session, oldest first"""
+        await self._ensure_db()
+        async with self.async_session() as session:
+            result = await session.execute(
+                select(Summary).where(Summary.session_id == self.session_id).order_by(Summary.start_seq)
+            )
+            return [summary.to_dict() for summary in result.scalars()]
+
+    async def compact(self) -> int:
+        """Fold stored messages older than the recent tail into a summary.
+
+        Runs in the background once ``summarize_after`` is exceeded; returns
+        the number of messages compacted.
+        """
+        await self._ensure_db()
+        async with self.async_session() as session:
+            count, last_seq = (await session.execute(
+                select(func.count(), func.max(Message.seq)).where(Message.session_id == self.session_id)
+            )).one()
+        self._live_messages = count
+        if not self.summarize_after or count <= self.summarize_after:
+            return 0
+
+        cutoff = last_seq - self.keep_recent_messages
+        async with self.async_session() as session:
+            result = await session.execute(
+                select(Message)
+                .where(Message.session_id == self.session_id, Message.seq <= cutoff)
+                .order_by(Message.seq)
+            )
+            old = [msg.to_dict() for msg in result.scalars()]
+        if not old:
+            return 0
+
+        # Summarise before opening the write transaction: a pluggable
+        # summariser may be slow (e.g. an LLM call)
+        summary = {
+            "start_seq": old[0]["seq"],
+            "end_seq": old[-1]["seq"],
+            "level": 0,
+            "content": await self.summarizer.summarize(old)
+        }
+        existing = await self.get_summaries()
+        merged, replaced = await self._merge_summaries(existing + [summary])
+
+        removed = sum(len(m["content"].encode()) for m in old) + sum(len(s["content"].encode()) for s in replaced)
+        added = sum(len(s["content"].encode()) for s in merged)
+        async with self.async_session() as session:
+            async with session.begin():
+                await session.execute(delete(Message).where(
+                    Message.session_id == self.session_id,
+                    Message.seq <= summary["end_seq"]
+                ))
+                if replaced:
+                    await session.execute(delete(Summary).where(
+                        Summary.session_id == self.session_id,
+                        Summary.start_seq.in_([s["start_seq"] for s in replaced])
+                    ))
+                await session.execute(insert(Summary), [
+                    {"session_id": self.session_id, **record} for record in merged
+                ])
+                await session.execute(
+                    Conversation.__table__.update()
+                    .where(Conversation.session_id == self.session_id)
+                    .values(size_bytes=Conversation.size_bytes - removed + added)
+                )
+        self._live_messages = count - len(old)
+        return len(old)
+
+    async def _merge_summaries(self, summaries: List[Dict]):
+        """Keep at most max_summaries by folding the oldest into a higher level.
+
+        Returns (records to insert, existing records they replace).
+        """
+        new = summaries[-1]
+        if len(summaries) <= self.max_summaries:
+            return [new], []
+
+        fold = summaries[:len(summaries) - self.max_summaries // 2]
+        lines = [
+            {"role": role, "content": text}
+            for record in fold
+            for role, _, text in (line.partition(": ") for line in record["content"].splitlines())
+            if text
+        ]
+        merged = {
+            "start_seq": fold[0]["start_seq"],
+            "end_seq": fold[-1]["end_seq"],
+            "level": max(record["level"] for record in fold) + 1,
+            "content": await self.summarizer.summarize(lines)
+        }
+        inserts = [merged] if new in fold else [merged, new]
+        return inserts, [record for record in fold if record is not new]
+
+    async def aclose(self):
+        """Flush queued messages and stop the background flusher"""
+        queue = self._write_behind_queue()
+        if queue:
+            await queue.aclose()
+            _write_behind_queues.pop(self.db_path, None)
+        if self._compaction_task is not None:
+            await self._compaction_task
+
+
+async def close_write_behind_queues():
+    """Flush and stop every write-behind queue (call at shutdown)"""
+    for db_path, queue in list(_write_behind_queues.items()):
+        if not queue._closed and queue.loop is asyncio.get_running_loop():
+            await queue.aclose()
+        _write_behind_queues.pop(db_path, None)
+
+
+async def shutdown_memory():
+    """Flush write-behind queues, stop evictors and dispose shared engines"""
+    await close_write_behind_queues()
+    current = asyncio.get_running_loop()
+    pending = [task for task in _compaction_tasks if task.get_loop() is current]
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+    for db_path, evictor in list(_evictors.items()):
+        if evictor.loop is asyncio.get_running_loop():
+            await evictor.aclose()
+        _evictors.pop(db_path, None)
+    await dispose_engines()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Merge per-worker memory databases into one
+
+Sharded simulation workers each write their own SQLite file; this copies
+their sessions into the target database. A session present in both is
+replaced by the source's copy.
+
+    python -m agents.merge agent_memory.db worker0.db worker1.db
+"""
+
+import os
+from typing import Dict, Iterable
+from sqlalchemy import create_engine
+from agents import migrations
+
+# Children before parents: conversations' delete trigger keeps storage_stats right
+_TABLES = ("messages", "summaries", "conversations")
+
+
+def merge_databases(target: str, sources: Iterable[str]) -> Dict[str, int]:
+    """Copy every session of ``sources`` into ``target``; returns sessions merged per source"""
+    from agents.memory import Base
+
+    engine = create_engine(f"sqlite:///{target}")
+    merged = {}
+    try:
+        with engine.begin() as conn:
+            Base.metadata.create_all(conn)
+            migrations.upgrade(conn)
+        for source in sources:
+            if not os.path.exists(source):
+                continue
+            with engine.connect() as conn:
+                conn.exec_driver_sql("ATTACH DATABASE ? AS src", (source,))
+                conn.commit()  # close the autobegun transaction; the copy gets its own
+                try:
+                    with conn.begin():
+                        sessions = "SELECT session_id FROM src.conversations"
+                        for table in _TABLES:
+                            conn.exec_driver_sql(f"DELETE FROM {table} WHERE session_id IN ({sessions})")
+                        for table in reversed(_TABLES):
+                            columns = ", ".join(
+                                row[1] for row in conn.exec_driver_sql(f"PRAGMA main.table_info({table})")
+                            )
+                            conn.exec_driver_sql(
+                                f"INSERT INTO {table} ({columns}) SELECT {columns} FROM src.{table}"
+                            )
+                        merged[source] = conn.exec_driver_sql(
+                            "SELECT COUNT(*) FROM src.conversations"
+                        ).scalar()
+                finally:
+                    conn.exec_driver_sql("DETACH DATABASE src")
+                    conn.commit()
+    finally:
+        engine.dispose()
+    return merged
+
+
+def remove_database(path: str):
+    """Delete a SQLite file together with its WAL and shared-memory files"""
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 3:
+        sys.exit("usage: python -m agents.merge TARGET SOURCE [SOURCE ...]")
+    for source, sessions in merge_databases(sys.argv[1], sys.argv[2:]).items():
+        print(f"{source}: {sessions} sessions merged into {sys.argv[1]}")
@@ -0,0 +1,190 @@
+"""
+Micro-batching of LLM requests from many agents
+
+Prompts submitted within ``window`` seconds of the first pending one (or
+until ``max_batch`` are waiting) are dispatched together and each caller
+gets its own reply back. Against a local inference server (vLLM,
+llama.cpp) a batch goes out as one /completions request with a list of
+prompts; ``mode="concurrent"`` instead fires one chat request per prompt
+at the same moment over the pooled connection, for servers without the
+batched endpoint.
+
+A longer window fills bigger batches (throughput) at the cost of the time
+the first caller waits (latency); see benchmarks/bench_micro_batch.py.
+"""
+
+import asyncio
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from typing import Awaitable, Dict, Hashable, List, Optional, Tuple
+from agents.llm_client import get_llm_client
+from utils import tracing
+from utils.rate_limiter import PrepaidSlot
+
+BATCH_MODES = ("completions", "concurrent")
+
+
+@dataclass
+class MicroBatchConfig:
+    window: float = field(default_factory=lambda: float(os.getenv("LLM_BATCH_WINDOW", 0.005)))  # seconds
+    max_batch: int = field(default_factory=lambda: int(os.getenv("LLM_BATCH_SIZE", 32)))
+    mode: str = field(default_factory=lambda: os.getenv("LLM_BATCH_MODE", "completions"))
+
+    def __post_init__(self):
+        if self.mode not in BATCH_MODES:
+            raise ValueError(f"mode must be one of {BATCH_MODES}, got {self.mode!r}")
+
+
+@dataclass
+class MicroBatchStats:
+    requests: int = 0        # prompts submitted
+    sent: int = 0            # prompts that went upstream
+    batches: int = 0         # batches dispatched
+    full: int = 0            # batches sent because they reached max_batch
+    largest: int = 0
+    abandoned: int = 0       # callers cancelled before their batch was sent
+
+    @property
+    def mean_size(self) -> float:
+        return self.sent / self.batches if self.batches else 0.0
+
+    def as_dict(self) -> Dict:
+        return {**asdict(self), "mean_size": self.mean_size}
+
+
+class _Batch:
+    __slots__ = ("prompts", "futures", "limiters", "limiter", "timer")
+
+    def __init__(self, limiter):
+        self.prompts: List[str] = []
+        self.futures: List[asyncio.Future] = []
+        self.limiters: List = []  # each caller's own, which may be a PrepaidSlot
+        self.limiter = limiter    # the lane they share
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class MicroBatcher:
+    """Collects prompts with the same request parameters into batches.
+
+    Errors from a batch are raised to every caller in it. A caller that is
+    cancelled before its batch is sent is left out of the request.
+
+    A caller may pass a PrepaidSlot (a slot taken ahead of time). In
+    ``mode="concurrent"`` each caller's request spends its own slot. A
+    batched /completions request needs only one, so it spends the first
+    slot and the others in the batch go unused; each is a unit of quota
+    lost.
+    """
+
+    def __init__(self, config: MicroBatchConfig = None):
+        self.config = config or MicroBatchConfig()
+        self.stats = MicroBatchStats()
+        self._pending: Dict[Hashable, _Batch] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks = set()
+
+    @property
+    def pending(self) -> int:
+        return sum(len(batch.prompts) for batch in self._pending.values())
+
+    async def submit(self, prompt: str, limiter=None, **params) -> str:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Batches left over from a previous asyncio.run() can never be sent
+            self._pending.clear()
+            self._loop = loop
+        # Only requests with identical parameters can share a request; the
+        # limiter is part of the key so each lane keeps its own priority
+        lane = limiter.limiter if isinstance(limiter, PrepaidSlot) else limiter
+        key = (json.dumps(params, sort_keys=True, default=str), lane)
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = self._pending[key] = _Batch(lane)
+            batch.timer = loop.call_later(self.config.window, self._flush, key, batch)
+        future = loop.create_future()
+        batch.prompts.append(prompt)
+        batch.futures.append(future)
+        batch.limiters.append(limiter)
+        self.stats.requests += 1
+        if len(batch.prompts) >= self.config.max_batch:
+            self.stats.full += 1
+            self._flush(key, batch)
+        try:
+            return await future
+        except asyncio.CancelledError:
+            if self._pending.get(key) is batch:
+                self.stats.abandoned += 1
+            raise
+
+    def _flush(self, key: Tuple, batch: _Batch):
+        if self._pending.get(key) is not batch:
+            return  # already sent
+        del self._pending[key]
+        batch.timer.cancel()
+        task = asyncio.ensure_future(self._dispatch(batch, json.loads(key[0])))
+        # Keep a reference until it finishes so the task isn't collected
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch: _Batch, params: Dict):
+        live = [
+            (prompt, future, limiter)
+            for prompt, future, limiter in zip(batch.prompts, batch.futures, batch.limiters)
+            if not future.done()
+        ]
+        if not live:
+            return
+        self.stats.batches += 1
+        self.stats.sent += len(live)
+        self.stats.largest = max(self.stats.largest, len(live))
+        tracing.count("llm.batched", len(live))
+        prompts = [prompt for prompt, _, _ in live]
+        client = get_llm_client()
+        if self.config.mode == "concurrent":
+            # Each caller gets its reply as soon as its own request returns
+            await asyncio.gather(*(
+                self._resolve(future, client.chat_completion(prompt, limiter=limiter, **params))
+                for prompt, future, limiter in live
+            ))
+            return
+        prepaid = [limiter for _, _, limiter in live if isinstance(limiter, PrepaidSlot)]
+        try:
+            replies = await client.batch_completion(prompts, limiter=prepaid[0] if prepaid else batch.limiter, **params)
+        except Exception as e:
+            for _, future, _ in live:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future, _), reply in zip(live, replies):
+            if not future.done():
+                future.set_result(reply)
+
+    @staticmethod
+    async def _resolve(future: asyncio.Future, call: Awaitable[str]):
+        try:
+            reply = await call
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+        else:
+            if not future.done():
+                future.set_result(reply)
+
+
+_shared_batcher: Optional[MicroBatcher] = None
+
+
+def get_micro_batcher() -> MicroBatcher:
+    """Return the process-wide micro-batcher"""
+    global _shared_batcher
+    if _shared_batcher is None:
+        _shared_batcher = MicroBatcher()
+    return _shared_batcher
+
+
+def configure_micro_batching(config: MicroBatchConfig) -> MicroBatcher:
+    """Replace the process-wide micro-batcher with one using ``config``"""
+    global _shared_batcher
+    _shared_batcher = MicroBatcher(config)
+    return _shared_batcher
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Schema migrations for agent_memory.db
+
+Each step runs once and bumps ``PRAGMA user_version``. They are applied
+automatically by ``AgentMemory.initialize_db`` and can also be run by hand:
+
+    python -m agents.migrations agent_memory.db
+"""
+
+import json
+import logging
+from typing import Callable, List
+from sqlalchemy.engine import Connection
+
+logger = logging.getLogger("migrations")
+
+
+def _columns(conn: Connection, table: str) -> List[str]:
+    return [row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({table})")]
+
+
+def _v1_history_to_messages(conn: Connection):
+    """Move JSON history blobs into the append-only messages table"""
+    columns = _columns(conn, "conversations")
+    if "message_count" not in columns:
+        conn.exec_driver_sql("ALTER TABLE conversations ADD COLUMN message_count INTEGER NOT NULL DEFAULT 0")
+    if "size_bytes" not in columns:
+        conn.exec_driver_sql("ALTER TABLE conversations ADD COLUMN size_bytes INTEGER NOT NULL DEFAULT 0")
+
+    rows = conn.exec_driver_sql(
+        "SELECT session_id, history FROM conversations WHERE history IS NOT NULL AND history != '[]'"
+    ).fetchall()
+    for session_id, history in rows:
+        messages = json.loads(history or "[]")
+        conn.exec_driver_sql(
+            "INSERT OR IGNORE INTO messages (session_id, seq, role, content, metadata, timestamp) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    session_id,
+                    seq,
+                    msg.get("role", "user"),
+                    str(msg.get("content", "")),
+                    json.dumps(msg["metadata"]) if msg.get("metadata") else None,
+                    msg.get("timestamp")
+                )
+                for seq, msg in enumerate(messages)
+            ]
+        )
+        size = sum(len(str(msg.get("content", "")).encode()) for msg in messages)
+        conn.exec_driver_sql(
+            "UPDATE conversations SET history = '[]', message_count = ?, size_bytes = ?, size_kb = ? "
+            "WHERE session_id = ?",
+            (len(messages), size, f"{size / 1024:.2f}", session_id)
+        )
+
+
+def _v2_eviction_index_and_stats(conn: Connection):
+    """Index sessions by age and keep session/byte totals up to date with triggers"""
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_conversations_last_updated ON conversations (last_updated)"
+    )
+    conn.exec_driver_sql(
+        "CREATE TABLE IF NOT EXISTS storage_stats ("
+        "id INTEGER PRIMARY KEY CHECK (id = 1), "
+        "sessions INTEGER NOT NULL, "
+        "bytes INTEGER NOT NULL)"
+    )
+    conn.exec_driver_sql(
+        "INSERT OR REPLACE INTO storage_stats (id, sessions, bytes) VALUES "
+        "(1, (SELECT COUNT(*) FROM conversations), (SELECT COALESCE(SUM(size_bytes), 0) FROM conversations))"
+    )
+    conn.exec_driver_sql(
+        "CREATE TRIGGER IF NOT EXISTS conversations_stats_insert AFTER INSERT ON conversations BEGIN "
+        "UPDATE storage_stats SET sessions = sessions + 1, bytes = bytes + NEW.size_bytes WHERE id = 1; END"
+    )
+    conn.exec_driver_sql(
+        "CREATE TRIGGER IF NOT EXISTS conversations_stats_delete AFTER DELETE ON conversations BEGIN "
+        "UPDATE storage_stats SET sessions = sessions - 1, bytes = bytes - OLD.size_bytes WHERE id = 1; END"
+    )
+    conn.exec_driver_sql(
+        "CREATE TRIGGER IF NOT EXISTS conversations_stats_update AFTER UPDATE OF size_bytes ON conversations BEGIN "
+        "UPDATE storage_stats SET bytes = bytes + NEW.size_bytes - OLD.size_bytes WHERE id = 1; END"
+    )
+
+
+def fts5_available(conn: Connection) -> bool:
+    """Whether this SQLite build was compiled with the FTS5 extension"""
+    return bool(conn.exec_driver_sql("SELECT sqlite_compileoption_used('ENABLE_FTS5')").scalar())
+
+
+def search_index_exists(conn: Connection) -> bool:
+    return conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'message_search'"
+    ).first() is not None
+
+
+def _create_search_index(conn: Connection):
+    # messages has no rowid, so each message gets an integer id in
+    # message_search_ids; the FTS5 table is external-content, reading the
+    # text back through a view rather than storing a second copy of it
+    conn.exec_driver_sql(
+        "CREATE TABLE IF NOT EXISTS message_search_ids ("
+        "id INTEGER PRIMARY KEY, "
+        "session_id VARCHAR(64) NOT NULL, "
+        "seq INTEGER NOT NULL, "
+        "UNIQUE (session_id, seq))"
+    )
+    conn.exec_driver_sql(
+        "CREATE VIEW IF NOT EXISTS message_search_content AS "
+        "SELECT ids.id AS id, messages.content AS content FROM message_search_ids AS ids "
+        "JOIN messages ON messages.session_id = ids.session_id AND messages.seq = ids.seq"
+    )
+    conn.exec_driver_sql(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS message_search USING fts5("
+        "content, content='message_search_content', content_rowid='id', tokenize='porter unicode61')"
+    )
+    conn.exec_driver_sql(
+        "CREATE TRIGGER IF NOT EXISTS messages_search_insert AFTER INSERT ON messages BEGIN "
+        "INSERT INTO message_search_ids (session_id, seq) VALUES (NEW.session_id, NEW.seq); "
+        "INSERT INTO message_search (rowid, content) VALUES (last_insert_rowid(), NEW.content); END"
+    )
+    conn.exec_driver_sql(
+        "CREATE TRIGGER IF NOT EXISTS messages_search_delete AFTER DELETE ON messages BEGIN "
+        "INSERT INTO message_search (message_search, rowid, content) "
+        "SELECT 'delete', id, OLD.content FROM message_search_ids "
+        "WHERE session_id = OLD.session_id AND seq = OLD.seq; "
+        "DELETE FROM message_search_ids WHERE session_id = OLD.session_id AND seq = OLD.seq; END"
+    )
+    conn.exec_driver_sql(
+        "CREATE TRIGGER IF NOT EXISTS messages_search_update AFTER UPDATE OF content ON messages BEGIN "
+        "INSERT INTO message_search (message_search, rowid, content) "
+        "SELECT 'delete', id, OLD.content FROM message_search_ids "
+        "WHERE session_id = OLD.session_id AND seq = OLD.seq; "
+        "INSERT INTO message_search (rowid, content) "
+        "SELECT id, NEW.content FROM message_search_ids "
+        "WHERE session_id = NEW.session_id AND seq = NEW.seq; END"
+    )
+
+
+def reindex_messages(conn: Connection) -> int:
+    """(Re)build the full-text index from the messages table; returns the rows indexed.
+
+    Creates the index if it is missing, so it also backfills databases
+    upgraded while FTS5 was unavailable.
+    """
+    _create_search_index(conn)
+    conn.exec_driver_sql("DELETE FROM message_search_ids")
+    conn.exec_driver_sql(
+        "INSERT INTO message_search_ids (session_id, seq) "
+        "SELECT session_id, seq FROM messages ORDER BY session_id, seq"
+    )
+    conn.exec_driver_sql("INSERT INTO message_search (message_search) VALUES ('rebuild')")
+    return conn.exec_driver_sql("SELECT COUNT(*) FROM message_search_ids").scalar()
+
+
+def _v3_message_search(conn: Connection):
+    """Record each session's scenario and index message content for full-text search"""
+    if "scenario" not in _columns(conn, "conversations"):
+        conn.exec_driver_sql("ALTER TABLE conversations ADD COLUMN scenario VARCHAR(64)")
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_conversations_scenario ON conversations (scenario)"
+    )
+    if fts5_available(conn):
+        reindex_messages(conn)
+    else:
+        logger.warning("SQLite was built without FTS5; message search will fall back to a linear scan")
+
+
+MIGRATIONS: List[Callable[[Connection], None]] = [
+    _v1_history_to_messages,
+    _v2_eviction_index_and_stats,
+    _v3_message_search,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def upgrade(conn: Connection) -> int:
+    """Apply pending migrations and return the resulting schema version"""
+    version = conn.exec_driver_sql("PRAGMA user_version").scalar() or 0
+    for step in MIGRATIONS[version:]:
+        step(conn)
+        version += 1
+        conn.exec_driver_sql(f"PRAGMA user_version = {version}")
+    return version
+
+
+if __name__ == "__main__":
+    import sys
+    from sqlalchemy import create_engine
+    from agents.memory import Base
+
+    db_path = sys.argv[1] if len(sys.argv) > 1 else "agent_memory.db"
+    engine = create_engine(f"sqlite:///{db_path}")
+    with engine.begin() as conn:
+        Base.metadata.create_all(conn)
+        print(f"{db_path}: schema version {upgrade(conn)}")
@@ -1,29 +1,22 @@
-import yaml
 from pathlib import Path
-from typing import Dict, List
-from pydantic import BaseModel
-
-class Scenario(BaseModel):
-    scenario: str
-    description: str
-    personas: Dict[str, Dict]
-    story_arc: List[Dict]
+from typing import Dict, List, Optional
+from agents.scenario_registry import get_scenario_registry
+from agents.schemas import RoleConfig, Scenario  # noqa: F401 - re-exported
 
 class PersonaManager:
-    def __init__(self, scenario_dir: str = "scenarios"):
+    def __init__(self, scenario_dir: str = "scenarios", cache_dir: Optional[str] = None):
         self.scenario_dir = Path(scenario_dir)
+        # Shared by every PersonaManager on this directory: each file is parsed once
+        self.registry = get_scenario_registry(scenario_dir, cache_dir)
         self.loaded_scenarios: Dict[str, Scenario] = {}
 
     def load_scenario(self, scenario_name: str) -> Scenario:
-        filepath = self.scenario_dir / f"{scenario_name}.yaml"
-        with open(filepath) as f:
-            data = yaml.safe_load(f)
-            scenario = Scenario(**data)
-            self.loaded_scenarios[scenario_name] = scenario
-            return scenario
+        scenario = self.registry.get(scenario_name)
+        self.loaded_scenarios[scenario_name] = scenario
+        return scenario
 
     def get_persona(self, scenario_name: str, persona_name: str) -> Dict:
         return self.loaded_scenarios[scenario_name].personas[persona_name]
 
     def get_story_arc(self, scenario_name: str) -> List[Dict]:
-        return self.loaded_scenarios[scenario_name].story_arc
\ No newline at end of file
+        return self.loaded_scenarios[scenario_name].story_arc
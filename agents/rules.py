@@ -0,0 +1,129 @@
+"""
+Compiled keyword rules: story-arc triggers, action rules and emotion lexicons
+
+All keywords of a scenario are compiled into one trie-shaped regex, so a
+text is lowercased once and scanned once however many rules there are.
+Matching keeps the old substring semantics: a keyword hits wherever it
+occurs, including inside a longer keyword's match. Below a few hundred
+keywords C-level ``in`` checks beat the regex, so small sets use those.
+"""
+
+import functools
+import re
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, List, Sequence, Tuple
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Regex matching any of ``words``, longest first, as nested alternations"""
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}  # end of a word
+
+    def build(node: Dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            # A word ends here but longer ones continue: try them first
+            return ("(?:" + body + ")?") if len(branches) == 1 else body + "?"
+        return body
+
+    return build(trie)
+
+
+# Keyword count from which the compiled regex beats one ``in`` per keyword
+REGEX_THRESHOLD = 150
+
+
+class KeywordMatcher:
+    """Find every keyword occurring in a text, large sets in one regex pass"""
+
+    def __init__(self, keywords: Iterable[str], regex_threshold: int = REGEX_THRESHOLD):
+        self.keywords = frozenset(k.lower() for k in keywords if k)
+        if len(self.keywords) < regex_threshold:
+            self._regex = None
+            return
+        # Each match is the longest keyword starting at that position;
+        # the shorter keywords it begins with hit there too
+        self._hits: Dict[str, FrozenSet[str]] = {
+            keyword: frozenset(keyword[:end] for end in range(1, len(keyword) + 1) if keyword[:end] in self.keywords)
+            for keyword in self.keywords
+        }
+        # Zero-width lookahead so overlapping keywords are all found
+        self._regex = re.compile(f"(?=({_trie_pattern(self.keywords)}))")
+
+    def scan(self, text: str) -> FrozenSet[str]:
+        text = text.lower()
+        if self._regex is None:
+            return frozenset(k for k in self.keywords if k in text)
+        found = set()
+        for match in self._regex.finditer(text):
+            found |= self._hits[match.group(1)]
+        return frozenset(found)
+
+
+@dataclass(frozen=True)
+class Rule:
+    label: str                       # action or emotion produced
+    keywords: Tuple[str, ...]        # any of these in the text
+    requires: Tuple[str, ...] = ()   # and, if given, any of these as well
+
+
+class RuleEngine:
+    """Story triggers plus ordered action and emotion rules.
+
+    Rules are checked in order and the first whose keywords match wins, as
+    the hand-written if-chains did; actions must also be allowed for the
+    persona. Incoming messages are scanned for triggers and action keywords
+    together; replies only for the emotion lexicon.
+    """
+
+    def __init__(self, triggers: Sequence[str], action_rules: Sequence[Rule], emotion_rules: Sequence[Rule]):
+        self.triggers = list(triggers)
+        self.action_rules = [self._lowered(rule) for rule in action_rules]
+        self.emotion_rules = [self._lowered(rule) for rule in emotion_rules]
+        # Arc positions per lowercased trigger, to report hits in arc order
+        self._positions: Dict[str, List[int]] = {}
+        for position, trigger in enumerate(self.triggers):
+            self._positions.setdefault(trigger.lower(), []).append(position)
+        keywords = set(self._positions)
+        for rule in self.action_rules:
+            keywords.update(rule.keywords + rule.requires)
+        # A turn scans its input for triggers and then for the action
+        self.scan = functools.lru_cache(maxsize=64)(KeywordMatcher(keywords).scan)
+        self._scan_reply = KeywordMatcher(k for rule in self.emotion_rules for k in rule.keywords + rule.requires).scan
+
+    def matched_triggers(self, text: str) -> List[str]:
+        positions = sorted(p for key in self.scan(text) for p in self._positions.get(key, ()))
+        return [self.triggers[p] for p in positions]
+
+    @staticmethod
+    def _lowered(rule: Rule) -> Rule:
+        return Rule(rule.label, tuple(k.lower() for k in rule.keywords), tuple(r.lower() for r in rule.requires))
+
+    @staticmethod
+    def _fires(rule: Rule, hits: FrozenSet[str]) -> bool:
+        return (
+            any(k in hits for k in rule.keywords)
+            and (not rule.requires or any(r in hits for r in rule.requires))
+        )
+
+    def action(self, text: str, allowed_actions: Iterable[str], default: str = "respond") -> str:
+        hits = self.scan(text)
+        allowed = set(allowed_actions)
+        for rule in self.action_rules:
+            if rule.label in allowed and self._fires(rule, hits):
+                return rule.label
+        return default
+
+    def emotion(self, text: str, default: str = "neutral") -> str:
+        hits = self._scan_reply(text)
+        for rule in self.emotion_rules:
+            if self._fires(rule, hits):
+                return rule.label
+        return default
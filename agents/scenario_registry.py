@@ -0,0 +1,145 @@
+"""
+Parse-once registry of scenario files
+
+Each scenario YAML is parsed and validated into a ``Scenario`` once per
+process and shared by every PersonaManager reading the same directory.
+A lookup only stats the file: a changed mtime or size re-reads it, and the
+file is re-parsed only if its content hash changed, so edits are picked up
+without a restart.
+
+With a ``cache_dir`` (or ``SCENARIO_CACHE_DIR``) validated scenarios are
+also written there as JSON keyed by content hash, so a cold process loads
+them without parsing YAML.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import yaml
+from agents.schemas import Scenario
+
+logger = logging.getLogger("scenario_registry")
+
+# libyaml's loader is several times faster; fall back to pure Python
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Bump when Scenario's shape changes so stale compiled files are ignored
+_COMPILED_VERSION = 2
+
+
+@dataclass
+class RegistryStats:
+    hits: int = 0        # lookups answered from memory
+    parses: int = 0      # YAML files parsed and validated
+    disk_hits: int = 0   # loaded from the compiled cache instead of parsing
+    reloads: int = 0     # cached scenarios replaced after the file changed
+
+    def as_dict(self) -> Dict:
+        return asdict(self)
+
+
+@dataclass
+class _Entry:
+    mtime_ns: int
+    size: int
+    digest: str
+    scenario: Scenario
+
+
+class ScenarioRegistry:
+    def __init__(self, scenario_dir: str = "scenarios", cache_dir: Optional[str] = None, loader=YAML_LOADER):
+        self.scenario_dir = Path(scenario_dir)
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.loader = loader
+        self.stats = RegistryStats()
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+
+    def path(self, name: str) -> Path:
+        return self.scenario_dir / f"{name}.yaml"
+
+    def names(self) -> List[str]:
+        return sorted(path.stem for path in self.scenario_dir.glob("*.yaml"))
+
+    def get(self, name: str) -> Scenario:
+        """The validated scenario ``name``, re-loaded if its file changed"""
+        path = self.path(name)
+        stat = os.stat(path)
+        entry = self._entries.get(name)
+        if entry is not None and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+            self.stats.hits += 1
+            return entry.scenario
+
+        with self._lock:
+            raw = path.read_bytes()
+            digest = hashlib.sha256(raw).hexdigest()
+            entry = self._entries.get(name)
+            if entry is not None and entry.digest == digest:
+                # Touched but unchanged: keep the parsed copy
+                self.stats.hits += 1
+                scenario = entry.scenario
+            else:
+                scenario = self._compile(name, raw, digest)
+                if entry is not None:
+                    self.stats.reloads += 1
+                    logger.info(f"Reloaded scenario {name} from {path}")
+            self._entries[name] = _Entry(stat.st_mtime_ns, stat.st_size, digest, scenario)
+            return scenario
+
+    def invalidate(self, name: str = None):
+        """Forget one scenario (or all); the next lookup reads the file again"""
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(name, None)
+
+    def _compiled_path(self, name: str, digest: str) -> Optional[Path]:
+        if self.cache_dir is None:
+            return None
+        return self.cache_dir / f"{name}-{digest[:16]}.v{_COMPILED_VERSION}.json"
+
+    def _compile(self, name: str, raw: bytes, digest: str) -> Scenario:
+        compiled = self._compiled_path(name, digest)
+        if compiled is not None and compiled.exists():
+            try:
+                # pydantic-core parses and validates JSON natively: still far cheaper than YAML
+                scenario = Scenario.model_validate_json(compiled.read_bytes())
+                self.stats.disk_hits += 1
+                return scenario
+            except (OSError, ValueError) as e:  # ValidationError is a ValueError
+                logger.warning(f"Ignoring unreadable compiled scenario {compiled}: {e}")
+
+        scenario = Scenario(**yaml.load(raw, Loader=self.loader))
+        self.stats.parses += 1
+        if compiled is not None:
+            self._write_compiled(compiled, scenario)
+        return scenario
+
+    def _write_compiled(self, compiled: Path, scenario: Scenario):
+        try:
+            compiled.parent.mkdir(parents=True, exist_ok=True)
+            # Write-then-rename so a concurrent reader never sees half a file
+            tmp = compiled.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(scenario.model_dump_json())
+            os.replace(tmp, compiled)
+        except OSError as e:
+            logger.warning(f"Could not write compiled scenario {compiled}: {e}")
+
+
+_registries: Dict[Tuple[str, Optional[str]], ScenarioRegistry] = {}
+
+
+def get_scenario_registry(scenario_dir: str = "scenarios", cache_dir: Optional[str] = None) -> ScenarioRegistry:
+    """Process-wide registry for ``scenario_dir``; ``cache_dir`` defaults to SCENARIO_CACHE_DIR"""
+    cache_dir = cache_dir or os.getenv("SCENARIO_CACHE_DIR")
+    key = (str(Path(scenario_dir).resolve()), cache_dir)
+    registry = _registries.get(key)
+    if registry is None:
+        # Resolved, so a later chdir doesn't move the directory it reads
+        registry = _registries[key] = ScenarioRegistry(key[0], cache_dir)
+    return registry
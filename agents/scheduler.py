@@ -0,0 +1,159 @@
+"""
+Turn scheduling for conversations between any number of agents
+
+Every agent speaks into one shared, append-only transcript. Each agent
+keeps a cursor into it and, when its turn comes, is handed only the
+entries added since it last spoke, so its own memory and context grow
+incrementally instead of the history being re-read.
+
+Policies:
+
+- ``round_robin``: participants speak one after another, each replying
+  to everything said since its previous turn.
+- ``parallel``: all participants reply at once to the same transcript;
+  their LLM calls overlap and the replies are merged in participant order.
+- ``moderator``: the moderator speaks, then the participants it names
+  reply in parallel (the next one in rotation if it names nobody).
+"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+from agents.general_agent import GeneralAgent
+from agents.schemas import AgentResponse
+
+POLICIES = ("round_robin", "parallel", "moderator")
+
+EXIT_WORDS = ("exit", "quit", "end", "stop")
+
+
+@dataclass
+class TranscriptEntry:
+    index: int
+    persona: str
+    role_type: str
+    text: str
+    response: Optional[AgentResponse] = None  # None for messages not produced by an agent
+    agent_id: Optional[str] = None
+
+    def as_dict(self) -> Dict:
+        entry = {"persona": self.persona, "response": self.text}
+        if self.response is not None:
+            entry.update(
+                confidence=self.response.confidence,
+                action=self.response.action,
+                emotion=self.response.emotion
+            )
+        return entry
+
+
+class SharedTranscript:
+    """Append-only record of a conversation, read incrementally by cursor"""
+
+    def __init__(self):
+        self.entries: List[TranscriptEntry] = []
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def append(
+        self, persona: str, role_type: str, text: str, response: AgentResponse = None, agent_id: str = None
+    ) -> TranscriptEntry:
+        entry = TranscriptEntry(len(self.entries), persona, role_type, text, response, agent_id)
+        self.entries.append(entry)
+        return entry
+
+    def since(self, cursor: int) -> List[TranscriptEntry]:
+        return self.entries[cursor:]
+
+    def as_dicts(self) -> List[Dict]:
+        return [entry.as_dict() for entry in self.entries]
+
+
+class ConversationScheduler:
+    """Runs several GeneralAgents, with assigned roles, over one transcript"""
+
+    def __init__(
+        self,
+        agents: Sequence[GeneralAgent],
+        policy: str = "round_robin",
+        moderator: Optional[GeneralAgent] = None,
+        transcript: SharedTranscript = None
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of {POLICIES}, got {policy!r}")
+        if policy == "moderator" and moderator is None:
+            raise ValueError("The moderator policy needs a moderator agent")
+        self.agents = [agent for agent in agents if agent is not moderator]
+        self.policy = policy
+        self.moderator = moderator
+        self.transcript = transcript or SharedTranscript()
+        # Transcript position each agent has been shown up to
+        self._cursors: Dict[str, int] = {}
+        self._next = 0  # who answers a moderator that names nobody
+
+    def _unseen(self, agent: GeneralAgent) -> List[TranscriptEntry]:
+        # Replies merged after the agent's snapshot are picked up next time;
+        # its own are already in its memory
+        return [
+            entry for entry in self.transcript.since(self._cursors.get(agent.agent_id, 0))
+            if entry.agent_id != agent.agent_id
+        ]
+
+    async def _speak(self, agent: GeneralAgent) -> Optional[AgentResponse]:
+        """Reply to everything new since the agent's last turn, without recording it yet"""
+        unseen = self._unseen(agent)
+        self._cursors[agent.agent_id] = len(self.transcript)
+        if not unseen:
+            return None
+        if len(unseen) == 1:
+            message, sender = unseen[0].text, unseen[0].role_type
+        else:
+            message = "\n".join(f"{entry.persona}: {entry.text}" for entry in unseen)
+            sender = "group"
+        return await agent.execute(message, sender_role=sender)
+
+    def _record(self, agent: GeneralAgent, response: Optional[AgentResponse]) -> List[TranscriptEntry]:
+        if response is None:
+            return []
+        return [self.transcript.append(
+            agent.persona_name, agent.current_persona["role_type"], response.response, response, agent.agent_id
+        )]
+
+    async def _together(self, agents: Sequence[GeneralAgent]) -> List[TranscriptEntry]:
+        # Everyone replies to the same snapshot; merge in a fixed order
+        responses = await asyncio.gather(*(self._speak(agent) for agent in agents))
+        return [entry for agent, response in zip(agents, responses) for entry in self._record(agent, response)]
+
+    def _addressed(self, text: str) -> List[GeneralAgent]:
+        text = text.lower()
+        return [
+            agent for agent in self.agents
+            if agent.persona_name.lower() in text or agent.persona_name.replace("_", " ").lower() in text
+        ]
+
+    async def run_round(self) -> List[TranscriptEntry]:
+        """One round of the policy; returns the entries it added"""
+        if self.policy == "parallel":
+            return await self._together(self.agents)
+        if self.policy == "round_robin":
+            added = []
+            for agent in self.agents:
+                added += self._record(agent, await self._speak(agent))
+            return added
+
+        added = self._record(self.moderator, await self._speak(self.moderator))
+        speakers = self._addressed(added[-1].text) if added else []
+        if not speakers:
+            speakers = [self.agents[self._next % len(self.agents)]]
+            self._next += 1
+        return added + await self._together(speakers)
+
+    async def run(self, opening_message: str, max_rounds: int = 5, opener: str = "user") -> SharedTranscript:
+        """Post ``opening_message`` and run rounds until one ends the conversation"""
+        self.transcript.append(opener, opener, opening_message)
+        for _ in range(max_rounds):
+            added = await self.run_round()
+            if not added or any(entry.text.lower() in EXIT_WORDS for entry in added):
+                break
+        return self.transcript
@@ -1,9 +1,14 @@
-from pydantic import BaseModel, Field
-from typing import Literal, List, Dict, Optional
+from pydantic import BaseModel, Field, PrivateAttr, field_validator
+from typing import Any, Literal, List, Dict, Optional
 from datetime import datetime
+from agents.rules import Rule, RuleEngine
+
+Action = Literal["redirect", "respond", "escalate"]
+Emotion = Literal["neutral", "happy", "angry", "frustrated"]
 
 class RoleConfig(BaseModel):
-    role_type: Literal["client", "support", "manager"]
+    # client/support/manager, or a scenario's own (debater, classical_philosopher, ...)
+    role_type: str
     traits: Dict[str, float] = Field(default={"patience": 0.5})
     allowed_actions: List[str]
     instructions: str
@@ -12,6 +17,69 @@ class RoleConfig(BaseModel):
 class AgentResponse(BaseModel):
     response: str
     confidence: float = Field(default=0.7, ge=0, le=1)
-    action: Literal["redirect", "respond", "escalate"] = Field(default="respond")
-    emotion: Literal["neutral", "happy", "angry", "frustrated"] = Field(default="neutral")
-    timestamp: datetime = Field(default_factory=datetime.now)
\ No newline at end of file
+    action: Action = Field(default="respond")
+    emotion: Emotion = Field(default="neutral")
+    timestamp: datetime = Field(default_factory=datetime.now)
+
+class ActionRule(BaseModel):
+    action: Action
+    keywords: List[str]  # in the incoming message
+    requires: List[str] = []
+
+class EmotionRule(BaseModel):
+    emotion: Emotion
+    keywords: List[str]  # in the agent's reply
+    requires: List[str] = []  # at least one of these must appear too
+
+# What GeneralAgent hard-coded before these became configurable
+DEFAULT_ACTION_RULES = [
+    ActionRule(action="escalate", keywords=["manager"]),
+    ActionRule(action="redirect", keywords=["transfer"]),
+]
+DEFAULT_EMOTION_RULES = [
+    EmotionRule(emotion="frustrated", keywords=["sorry", "apologize", "regret"]),
+    EmotionRule(emotion="happy", keywords=["happy", "great"], requires=["!"]),
+    EmotionRule(emotion="angry", keywords=["angry", "unacceptable"]),
+]
+
+class Scenario(BaseModel):
+    scenario: str
+    description: str
+    personas: Dict[str, Dict]
+    story_arc: List[Dict]
+    # Request parameters for every LLM call in this scenario (e.g. temperature)
+    llm_params: Dict[str, Any] = {}
+    # Serve repeated deterministic prompts from the completion cache
+    cache: bool = False
+    # Checked in order, first match wins; a persona may override either list
+    action_rules: List[ActionRule] = DEFAULT_ACTION_RULES
+    emotions: List[EmotionRule] = DEFAULT_EMOTION_RULES
+    _rules: Dict[str, RuleEngine] = PrivateAttr(default_factory=dict)
+
+    @field_validator("personas")
+    @classmethod
+    def _validate_personas(cls, personas: Dict[str, Dict]) -> Dict[str, Dict]:
+        # Agents read personas as dicts; check each against RoleConfig and
+        # fill in its defaults, keeping any extra keys
+        return {
+            name: {**persona, **RoleConfig(**persona).model_dump()}
+            for name, persona in personas.items()
+        }
+
+    def role(self, persona_name: str) -> RoleConfig:
+        return RoleConfig(**self.personas[persona_name])
+
+    def rules(self, persona_name: str) -> RuleEngine:
+        """Compiled trigger/action/emotion matcher, built once per persona"""
+        engine = self._rules.get(persona_name)
+        if engine is None:
+            persona = self.personas[persona_name]
+            actions = [ActionRule(**r) for r in persona["action_rules"]] if "action_rules" in persona else self.action_rules
+            emotions = [EmotionRule(**r) for r in persona["emotions"]] if "emotions" in persona else self.emotions
+            engine = RuleEngine(
+                [arc["trigger"] for arc in self.story_arc],
+                [Rule(r.action, tuple(r.keywords), tuple(r.requires)) for r in actions],
+                [Rule(r.emotion, tuple(r.keywords), tuple(r.requires)) for r in emotions],
+            )
+            self._rules[persona_name] = engine
+        return engine
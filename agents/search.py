@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Full-text search over stored conversations
+
+Message content is indexed in the ``message_search`` FTS5 table, created by
+schema migration v3 and kept in step with the messages table by triggers,
+so every write path (add_message, write-behind batches, compaction,
+eviction, merges) updates the index in the same transaction as the
+message. Where SQLite lacks FTS5 the search falls back to a linear scan.
+
+    python -m agents.search query "refund" --scenario customer_service --limit 10
+    python -m agents.search backfill agent_memory.db
+"""
+
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Union
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from agents import migrations
+
+ORDERS = ("rank", "newest", "oldest")
+
+_ORDER_BY = {
+    "rank": "message_search.rank",
+    "newest": "m.timestamp DESC, m.session_id, m.seq DESC",
+    "oldest": "m.timestamp, m.session_id, m.seq",
+}
+
+_SCAN_ORDER_BY = {**_ORDER_BY, "rank": "m.session_id, m.seq"}
+
+_COLUMNS = "m.session_id, m.seq, m.role, m.content, m.timestamp, c.scenario"
+
+TimeBound = Union[datetime, str, None]
+
+
+@dataclass
+class SearchHit:
+    session_id: str
+    seq: int
+    role: str
+    content: str
+    timestamp: Optional[str]
+    scenario: Optional[str]
+    snippet: str
+    rank: float = 0.0  # bm25 score, lower is a better match; 0.0 from a scan
+
+
+def match_expression(query: str) -> str:
+    """Quote each word so punctuation isn't read as FTS5 syntax; a
+    trailing ``*`` still makes it a prefix match"""
+    terms = []
+    for word in query.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*").replace('"', '""')
+        if word:
+            terms.append(f'"{word}"*' if prefix else f'"{word}"')
+    return " ".join(terms)
+
+
+def _timestamp(value: TimeBound) -> Optional[str]:
+    # Messages store str(datetime.now()), so bounds are rendered the same
+    # way for the string comparison to order correctly
+    if value is None or isinstance(value, datetime):
+        return None if value is None else str(value)
+    return str(datetime.fromisoformat(value))
+
+
+def _like(word: str) -> str:
+    return "%" + re.sub(r"([\\%_])", r"\\\1", word) + "%"
+
+
+class MessageSearch:
+    """Searches the messages of one database, with optional filters.
+
+    ``persona`` matches the message role, which is the persona name for
+    agent replies. Time bounds are inclusive of ``since`` and exclusive of
+    ``until``. Results are ordered by relevance unless ``order`` says
+    otherwise, and paged with ``limit``/``offset``.
+    """
+
+    def __init__(self, async_session: async_sessionmaker):
+        self.async_session = async_session
+
+    async def search(
+        self,
+        query: str,
+        session_id: Optional[str] = None,
+        scenario: Optional[str] = None,
+        persona: Optional[str] = None,
+        since: TimeBound = None,
+        until: TimeBound = None,
+        limit: int = 20,
+        offset: int = 0,
+        order: str = "rank",
+        raw: bool = False,
+        scan: bool = False
+    ) -> List[SearchHit]:
+        """Messages matching ``query``; ``raw`` passes it through as FTS5
+        syntax (OR, NEAR, column filters), ``scan`` skips the index"""
+        if order not in ORDERS:
+            raise ValueError(f"order must be one of {ORDERS}, got {order!r}")
+        if not query.split():
+            raise ValueError("Empty search query")
+
+        conditions, params = [], {"limit": limit, "offset": offset}
+        for column, name, value in (
+            ("m.session_id", "session_id", session_id),
+            ("c.scenario", "scenario", scenario),
+            ("m.role", "persona", persona),
+        ):
+            if value is not None:
+                conditions.append(f"{column} = :{name}")
+                params[name] = value
+        if since is not None:
+            conditions.append("m.timestamp >= :since")
+            params["since"] = _timestamp(since)
+        if until is not None:
+            conditions.append("m.timestamp < :until")
+            params["until"] = _timestamp(until)
+
+        async with self.async_session() as session:
+            if not scan:
+                scan = not await session.run_sync(lambda s: migrations.search_index_exists(s.connection()))
+            if scan:
+                return await self._scan(session, query, conditions, params, order)
+            params["match"] = query if raw else match_expression(query)
+            statement = (
+                f"SELECT {_COLUMNS}, snippet(message_search, 0, '[', ']', '...', 16), message_search.rank "
+                "FROM message_search "
+                "JOIN message_search_ids AS ids ON ids.id = message_search.rowid "
+                "JOIN messages AS m ON m.session_id = ids.session_id AND m.seq = ids.seq "
+                "LEFT JOIN conversations AS c ON c.session_id = m.session_id "
+                f"WHERE {' AND '.join(['message_search MATCH :match'] + conditions)} "
+                f"ORDER BY {_ORDER_BY[order]} LIMIT :limit OFFSET :offset"
+            )
+            try:
+                rows = (await session.execute(text(statement), params)).all()
+            except OperationalError as e:
+                raise ValueError(f"Invalid search query {query!r}: {e.orig}") from e
+        return [SearchHit(*row) for row in rows]
+
+    async def _scan(self, session, query: str, conditions: List[str], params: Dict, order: str) -> List[SearchHit]:
+        # Every word must appear somewhere in the content (a substring,
+        # case-insensitive for ASCII), read row by row from the messages table
+        for i, word in enumerate(query.replace('"', " ").replace("*", " ").split()):
+            conditions = conditions + [f"m.content LIKE :word{i} ESCAPE '\\'"]
+            params[f"word{i}"] = _like(word)
+        statement = (
+            f"SELECT {_COLUMNS} FROM messages AS m "
+            "LEFT JOIN conversations AS c ON c.session_id = m.session_id "
+            f"WHERE {' AND '.join(conditions)} "
+            f"ORDER BY {_SCAN_ORDER_BY[order]} LIMIT :limit OFFSET :offset"
+        )
+        rows = (await session.execute(text(statement), params)).all()
+        return [SearchHit(*row, snippet=row[3]) for row in rows]
+
+
+async def search_messages(query: str, db_path: str = "agent_memory.db", **filters) -> List[SearchHit]:
+    """Search every session in ``db_path``; ``filters`` as for MessageSearch.search"""
+    from agents.memory import AgentMemory
+
+    return await AgentMemory(db_path=db_path).search(query, all_sessions=True, **filters)
+
+
+def backfill(db_path: str, rebuild: bool = False) -> int:
+    """Bring ``db_path`` up to the current schema with every stored message
+    indexed; ``rebuild`` re-creates an existing index from scratch.
+
+    Returns the number of messages in the index. Running this before
+    deploying avoids the index being built on first start-up instead.
+    """
+    from agents.memory import Base
+
+    engine = create_engine(f"sqlite:///{db_path}")
+    try:
+        with engine.begin() as conn:
+            if not migrations.fts5_available(conn):
+                raise RuntimeError("This SQLite build has no FTS5 support")
+            Base.metadata.create_all(conn)
+            migrations.upgrade(conn)  # v3 indexes the messages already stored
+            if rebuild or not migrations.search_index_exists(conn):
+                return migrations.reindex_messages(conn)
+            return conn.exec_driver_sql("SELECT COUNT(*) FROM message_search_ids").scalar()
+    finally:
+        engine.dispose()
+
+
+async def _query(args) -> List[SearchHit]:
+    from agents.memory import shutdown_memory
+
+    try:
+        return await search_messages(
+            args.text,
+            db_path=args.db,
+            session_id=args.session,
+            scenario=args.scenario,
+            persona=args.persona,
+            since=args.since,
+            until=args.until,
+            limit=args.limit,
+            offset=args.offset,
+            order=args.order,
+            raw=args.raw,
+            scan=args.scan
+        )
+    finally:
+        await shutdown_memory()
+
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+    import time
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    query = commands.add_parser("query", help="search stored messages")
+    query.add_argument("text", help="words that must all appear; a trailing * matches a prefix")
+    query.add_argument("--db", default="agent_memory.db")
+    query.add_argument("--session", help="only this session id")
+    query.add_argument("--scenario")
+    query.add_argument("--persona", help="only messages with this role / persona name")
+    query.add_argument("--since", help="ISO date or time, inclusive")
+    query.add_argument("--until", help="ISO date or time, exclusive")
+    query.add_argument("--limit", type=int, default=20)
+    query.add_argument("--offset", type=int, default=0)
+    query.add_argument("--order", choices=ORDERS, default="rank")
+    query.add_argument("--raw", action="store_true", help="treat the text as FTS5 query syntax")
+    query.add_argument("--scan", action="store_true", help="linear scan instead of the index")
+
+    fill = commands.add_parser("backfill", help="index the messages of an existing database")
+    fill.add_argument("db", nargs="?", default="agent_memory.db")
+    fill.add_argument("--rebuild", action="store_true", help="re-create the index even if it exists")
+
+    args = parser.parse_args()
+    if args.command == "backfill":
+        start = time.perf_counter()
+        indexed = backfill(args.db, rebuild=args.rebuild)
+        print(f"{args.db}: {indexed} messages indexed ({time.perf_counter() - start:.1f}s)")
+    else:
+        for hit in asyncio.run(_query(args)):
+            print(f"{hit.session_id}#{hit.seq} {hit.timestamp} [{hit.scenario or '-'}] {hit.role}: {hit.snippet}")
@@ -0,0 +1,84 @@
+import asyncio
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+from utils import tracing
+
+T = TypeVar("T")
+
+
+@dataclass
+class SingleFlightStats:
+    leaders: int = 0     # calls that went upstream
+    coalesced: int = 0   # callers that joined a call already in flight
+    abandoned: int = 0   # callers cancelled while waiting
+    cancelled: int = 0   # upstream calls cancelled because every caller left
+
+    def as_dict(self) -> Dict:
+        return asdict(self)
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Runs one upstream call per key; concurrent callers share its result.
+
+    A caller that is cancelled stops waiting without affecting the others.
+    The upstream call is cancelled only once its last caller has gone.
+    Errors are raised to every caller of that flight.
+    """
+
+    def __init__(self):
+        self.stats = SingleFlightStats()
+        self._flights: Dict[Hashable, _Flight] = {}
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        flight = self._flights.get(key)
+        if flight is None or flight.task.done() or flight.task.get_loop() is not asyncio.get_running_loop():
+            flight = _Flight(asyncio.ensure_future(call()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda task: self._finished(key, flight))
+            self.stats.leaders += 1
+        else:
+            self.stats.coalesced += 1
+            tracing.count("llm.coalesced")
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if not flight.task.done():
+                self.stats.abandoned += 1
+                if flight.waiters == 1:
+                    flight.task.cancel()
+                    self.stats.cancelled += 1
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def _finished(self, key: Hashable, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not flight.task.cancelled():
+            # Mark the exception retrieved when every caller has gone
+            flight.task.exception()
+
+
+_shared_flight: Optional[SingleFlight] = None
+
+
+def get_single_flight() -> SingleFlight:
+    """Return the process-wide in-flight LLM call registry"""
+    global _shared_flight
+    if _shared_flight is None:
+        _shared_flight = SingleFlight()
+    return _shared_flight
@@ -0,0 +1,61 @@
+import re
+from collections import Counter
+from typing import Dict, List, Protocol
+
+_SENTENCE = re.compile(r"[^.!?\n]+[.!?]?")
+_WORD = re.compile(r"[a-z']+")
+_STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have i if in is it its me my no not of on or our so that the "
+    "their them there they this to was we were what when which who will with you your".split()
+)
+
+
+class Summarizer(Protocol):
+    async def summarize(self, messages: List[Dict]) -> str:
+        """Condense ``messages`` (dicts with role/content) into one text"""
+        ...
+
+
+class ExtractiveSummarizer:
+    """Deterministic, offline summariser: keeps the most informative sentences.
+
+    Sentences are scored by the average corpus frequency of their
+    non-stopword terms and the best ones are kept, in their original
+    order, until ``max_chars`` is reached.
+    """
+
+    def __init__(self, max_chars: int = 1200, max_sentence_chars: int = 200):
+        self.max_chars = max_chars
+        self.max_sentence_chars = max_sentence_chars
+
+    async def summarize(self, messages: List[Dict]) -> str:
+        return self.summarize_sync(messages)
+
+    def summarize_sync(self, messages: List[Dict]) -> str:
+        sentences = []
+        for message in messages:
+            for match in _SENTENCE.finditer(str(message.get("content", ""))):
+                sentence = match.group().strip()
+                if sentence:
+                    sentences.append((message.get("role", "user"), sentence[:self.max_sentence_chars]))
+        if not sentences:
+            return ""
+
+        frequency = Counter(
+            word for _, sentence in sentences
+            for word in _WORD.findall(sentence.lower()) if word not in _STOPWORDS
+        )
+
+        def score(item):
+            words = [w for w in _WORD.findall(item[1][1].lower()) if w not in _STOPWORDS]
+            return sum(frequency[w] for w in words) / (len(words) or 1)
+
+        chosen, used = [], 0
+        # Highest score first; ties keep conversation order
+        for index, (role, sentence) in sorted(enumerate(sentences), key=lambda item: (-score(item), item[0])):
+            line = f"{role}: {sentence}"
+            if used + len(line) > self.max_chars and chosen:
+                continue
+            chosen.append((index, line))
+            used += len(line) + 1
+        return "\n".join(line for _, line in sorted(chosen))
@@ -1,14 +1,11 @@
-import os
 import httpx
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field
 from typing import Literal
 
 load_dotenv()  # Load .env file
-from utils.rate_limiter import RateLimiter
-
-# Global rate limiter (5 calls/second)
-DEEPSEEK_LIMITER = RateLimiter(max_calls=5, period=1.0)
+from agents.llm_client import DEEPSEEK_LIMITER, get_llm_client
+from agents.llm_cache import CompletionCache
 
 class AgentResponse(BaseModel):
     response: str
@@ -26,32 +23,60 @@ import httpx
     wait=wait_exponential(multiplier=1, min=4, max=10),
     retry=retry_if_exception_type((httpx.TimeoutException, httpx.NetworkError))
 )
-async def query_deepseek(prompt: str) -> str:
-    """Robust API call with timeout and retry"""
-    timeout = httpx.Timeout(30.0, connect=10.0)  # 30s read, 10s connect
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        response = await client.post(
-            "https://api.deepseek.com/v1/chat/completions",
-            headers={"Authorization": f"Bearer {os.getenv('DEEPSEEK_API_KEY')}"},
-            json={
-                "model": "deepseek-chat",
-                "messages": [{"role": "user", "content": prompt}],
-                "max_tokens": 500
-            }
-        )
-        response.raise_for_status()
-        return response.json()["choices"][0]["message"]["content"]
+async def query_deepseek(
+    prompt: str,
+    cache: CompletionCache = None,
+    force_cache: bool = False,
+    priority: str = "interactive"
+) -> str:
+    """Robust API call with timeout and retry over the shared connection pool"""
+    client = get_llm_client()
+    limiter = DEEPSEEK_LIMITER.lane(priority)
+    if cache is None:
+        return await client.chat_completion(prompt, limiter=limiter)
+    return await cache.get_or_call(
+        client.config.model,
+        prompt,
+        {},
+        lambda: client.chat_completion(prompt, limiter=limiter),
+        force=force_cache
+    )
 
+from collections import OrderedDict
 from agents.memory import AgentMemory
-
-async def support_agent(query: str, session_id: str = "default") -> AgentResponse:
-    memory = AgentMemory(session_id)
+from agents.context import ContextBuilder
+
+# Context token budget for support conversations
+SUPPORT_CONTEXT_TOKENS = 1500
+
+# Rendered context per session, so each call only renders the new turns
+_CONTEXT_CACHE: "OrderedDict[str, ContextBuilder]" = OrderedDict()
+_CONTEXT_CACHE_SIZE = 1024
+
+def _context_for(session_id: str) -> ContextBuilder:
+    builder = _CONTEXT_CACHE.pop(session_id, None)
+    if builder is None:
+        builder = ContextBuilder(AgentMemory(session_id), max_tokens=SUPPORT_CONTEXT_TOKENS)
+    _CONTEXT_CACHE[session_id] = builder
+    if len(_CONTEXT_CACHE) > _CONTEXT_CACHE_SIZE:
+        _CONTEXT_CACHE.popitem(last=False)
+    return builder
+
+async def support_agent(
+    query: str,
+    session_id: str = "default",
+    cache: CompletionCache = None,
+    force_cache: bool = False,
+    priority: str = "interactive"
+) -> AgentResponse:
+    builder = _context_for(session_id)
+    memory = builder.memory
 
     # Store user message
-    memory.add_message("user", query)
+    await memory.add_message("user", query)
 
-    # Get conversation context
-    context = memory.get_context()
+    # Get conversation context, capped at SUPPORT_CONTEXT_TOKENS
+    context = await builder.build()
     full_prompt = f"""
     Conversation history:
     {context}
@@ -61,12 +86,12 @@ async def support_agent(query: str, session_id: str = "default") -> AgentRespons
 
     try:
         # Generate response
-        llm_response = await query_deepseek(full_prompt)
+        llm_response = await query_deepseek(full_prompt, cache, force_cache, priority)
     except (httpx.ReadTimeout, httpx.TimeoutException):
         raise ValueError("API timeout")
 
     # Store agent response
-    memory.add_message("agent", llm_response)
+    await memory.add_message("agent", llm_response)
 
     return AgentResponse(
         response=llm_response,
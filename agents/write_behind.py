@@ -0,0 +1,110 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional
+from sqlalchemy.exc import IntegrityError
+
+logger = logging.getLogger("write_behind")
+
+
+class WriteBehindQueue:
+    """Buffers message rows in memory and writes them in batched transactions.
+
+    A background task flushes whenever ``batch_size`` rows are pending or
+    ``flush_interval`` seconds have passed. Rows stay visible through
+    ``pending_for`` until the transaction holding them has committed.
+
+    A failed batch is put back and retried by the next flush, unless it
+    broke a constraint: retrying could never succeed and would hold up the
+    rows queued behind it, so its rows are then written one at a time and
+    those that still fail are logged and dropped.
+    """
+
+    def __init__(
+        self,
+        writer: Callable[[List[Dict]], Awaitable[None]],
+        batch_size: int = 200,
+        flush_interval: float = 0.5,
+        max_pending: int = None
+    ):
+        self.writer = writer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # Callers block on a flush once this many rows are waiting
+        self.max_pending = max_pending or batch_size * 4
+        self.pending: List[Dict] = []
+        self.inflight: List[Dict] = []
+        self.flushed_rows = 0
+        self.flushes = 0
+        self.dropped_rows = 0
+        self.loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._closed = False
+        self._task: Optional[asyncio.Task] = self.loop.create_task(self._run())
+
+    async def put(self, row: Dict):
+        if self._closed:
+            raise RuntimeError("Write-behind queue is closed")
+        self.pending.append(row)
+        if len(self.pending) >= self.max_pending:
+            await self.flush()
+        elif len(self.pending) >= self.batch_size:
+            self._wakeup.set()
+
+    def pending_for(self, session_id: str) -> List[Dict]:
+        """Rows for ``session_id`` that are not yet committed, in write order"""
+        return [row for row in self.inflight + self.pending if row["session_id"] == session_id]
+
+    async def flush(self):
+        """Write everything queued so far; returns once it is committed"""
+        async with self._flush_lock:
+            while self.pending:
+                self.inflight, self.pending = self.pending, []
+                size, dropped = len(self.inflight), self.dropped_rows
+                try:
+                    try:
+                        await self.writer(self.inflight)
+                    except IntegrityError:
+                        await self._write_each()
+                except BaseException:
+                    # Put what is left back so a later flush can retry it
+                    self.pending = self.inflight + self.pending
+                    raise
+                finally:
+                    self.inflight = []
+                self.flushed_rows += size - (self.dropped_rows - dropped)
+                self.flushes += 1
+
+    async def _write_each(self):
+        """Write the in-flight rows one per transaction, dropping any that break a constraint"""
+        while self.inflight:
+            row = self.inflight[0]
+            try:
+                await self.writer([row])
+            except IntegrityError as e:
+                self.dropped_rows += 1
+                logger.error(f"Dropping write-behind row for session {row['session_id']}: {e.orig}")
+            self.inflight.pop(0)
+
+    async def _run(self):
+        while not self._closed:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Write-behind flush failed: {type(e).__name__} - {str(e)}")
+
+    async def aclose(self):
+        """Stop the background task and flush remaining rows"""
+        self._closed = True
+        if self._task is not None:
+            # Let the flusher finish its current batch rather than cancelling
+            # it mid-transaction
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
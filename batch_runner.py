@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Headless batch runner for two-agent simulations
+
+Runs every job of a manifest concurrently and appends one JSON line per
+finished conversation to the results file. Jobs already in the results
+file are skipped, so an interrupted run continues where it stopped:
+
+    python batch_runner.py jobs.jsonl --out results.jsonl --concurrency 32
+
+With --workers N the jobs are sharded across N processes, each running its
+own event loop and database file; the files are merged into --db at the end.
+
+Each manifest line is a job:
+
+    {"id": "late-1", "scenario": "customer_support",
+     "personas": ["angry_customer", "support_agent"],
+     "opening_message": "Where is my package?", "max_turns": 6}
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import sys
+import time
+import traceback
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Set, Tuple
+from agents.general_agent import GeneralAgent
+from agents.llm_client import shutdown_llm_client, startup_llm_client
+from agents.memory import AgentMemory, shutdown_memory
+from agents.merge import merge_databases, remove_database
+from agents.persona_manager import PersonaManager
+
+logger = logging.getLogger("batch_runner")
+
+EXIT_WORDS = ("exit", "quit", "end", "stop")
+
+
+@dataclass
+class SimulationJob:
+    id: str
+    scenario: str
+    personas: Tuple[str, str]
+    opening_message: str
+    max_turns: int = 20
+
+
+@dataclass
+class BatchConfig:
+    concurrency: int = 16
+    db_path: str = "agent_memory.db"
+    termination_confidence: float = 0.9
+    priority: str = "background"  # DEEPSEEK_LIMITER lane for batch traffic
+    retry_failed: bool = False  # re-run jobs whose recorded result is an error
+    micro_batch: bool = False  # batch concurrent turns (LLM_BATCH_WINDOW/SIZE/MODE)
+
+
+def load_manifest(path: str) -> List[SimulationJob]:
+    """Read jobs from a JSONL file (or a JSON list); ids default to the line number"""
+    text = Path(path).read_text()
+    if text.lstrip().startswith("["):
+        entries = json.loads(text)
+    else:
+        entries = [json.loads(line) for line in text.splitlines() if line.strip()]
+    jobs = []
+    for index, entry in enumerate(entries):
+        jobs.append(SimulationJob(
+            id=str(entry.get("id", index)),
+            scenario=entry["scenario"],
+            personas=tuple(entry["personas"]),
+            opening_message=entry["opening_message"],
+            max_turns=entry.get("max_turns", 20)
+        ))
+    return jobs
+
+
+def completed_jobs(results_path: str, retry_failed: bool = False) -> Set[str]:
+    """Ids of jobs that already have a result line (the checkpoint)"""
+    done = set()
+    if not os.path.exists(results_path):
+        return done
+    with open(results_path) as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # torn last line from an interrupted run
+            if retry_failed and result.get("status") != "ok":
+                continue
+            done.add(result["id"])
+    return done
+
+
+async def run_conversation(
+    agent1: GeneralAgent,
+    agent2: GeneralAgent,
+    first_message: str,
+    max_turns: int,
+    termination_confidence: float = 0.9
+) -> Tuple[List[Dict], str]:
+    """Alternate the two agents without any I/O; returns (transcript, reason it ended)"""
+    transcript = []
+    current_message = first_message
+    current_speaker, other_speaker = agent1, agent2
+    for _ in range(max_turns):
+        response = await current_speaker.execute(
+            current_message,
+            sender_role=other_speaker.current_persona["role_type"]
+        )
+        transcript.append({
+            "persona": current_speaker.persona_name,
+            "response": response.response,
+            "confidence": response.confidence,
+            "action": response.action,
+            "emotion": response.emotion
+        })
+        current_message = response.response
+        current_speaker, other_speaker = other_speaker, current_speaker
+        if current_message.lower() in EXIT_WORDS:
+            return transcript, "exit"
+        if response.confidence >= termination_confidence:
+            return transcript, "confidence"
+    return transcript, "max_turns"
+
+
+class BatchRunner:
+    def __init__(self, persona_manager: PersonaManager, config: BatchConfig = None):
+        self.persona_manager = persona_manager
+        self.config = config or BatchConfig()
+        self.finished = 0
+        self.failed = 0
+
+    def _agent(self, job: SimulationJob, index: int) -> GeneralAgent:
+        persona = job.personas[index]
+        agent_id = f"agent{index + 1}_{persona}"
+        return GeneralAgent(
+            self.persona_manager,
+            agent_id=agent_id,
+            memory=AgentMemory(f"batch_{job.id}_{agent_id}", db_path=self.config.db_path),
+            priority=self.config.priority,
+            batch=self.config.micro_batch
+        )
+
+    async def run_job(self, job: SimulationJob) -> Dict:
+        start = time.perf_counter()
+        result = {"id": job.id, "scenario": job.scenario, "personas": list(job.personas)}
+        try:
+            agents = [self._agent(job, 0), self._agent(job, 1)]
+            for agent, persona in zip(agents, job.personas):
+                # Session ids are fixed per job: drop what an interrupted or
+                # failed earlier attempt left behind
+                await agent.memory.clear()
+                await agent.assign_role(job.scenario, persona)
+            transcript, ended_by = await run_conversation(
+                *agents, job.opening_message, job.max_turns, self.config.termination_confidence
+            )
+            result.update(status="ok", turns=len(transcript), ended_by=ended_by, transcript=transcript)
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {type(e).__name__} - {e}")
+            result.update(status="error", error=f"{type(e).__name__}: {e}", traceback=traceback.format_exc())
+        result["duration"] = round(time.perf_counter() - start, 4)
+        return result
+
+    async def run_jobs(self, jobs: List[SimulationJob], emit: Callable[[Dict], None]):
+        """Run ``jobs`` with bounded concurrency, passing each result to ``emit``"""
+        queue: asyncio.Queue = asyncio.Queue()
+        for job in jobs:
+            queue.put_nowait(job)
+
+        async def worker():
+            while True:
+                try:
+                    job = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                result = await self.run_job(job)
+                emit(result)
+                self.finished += 1
+                self.failed += result["status"] != "ok"
+
+        workers = [asyncio.create_task(worker()) for _ in range(min(self.config.concurrency, len(jobs)))]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def run(self, jobs: Iterable[SimulationJob], results_path: str) -> Dict:
+        """Run every job not yet in ``results_path``, appending results as they finish"""
+        done = completed_jobs(results_path, self.config.retry_failed)
+        pending = [job for job in jobs if job.id not in done]
+        with open_results(results_path) as out:
+            await self.run_jobs(pending, lambda result: write_result(out, result))
+        return {"skipped": len(done), "ran": self.finished, "failed": self.failed}
+
+
+@contextlib.contextmanager
+def open_results(results_path: str):
+    with open(results_path, "a+") as out:
+        out.seek(0, os.SEEK_END)
+        if out.tell():
+            out.seek(out.tell() - 1)
+            if out.read(1) != "\n":
+                out.write("\n")  # close off a torn line before appending
+        yield out
+
+
+def write_result(out, result: Dict):
+    # One write per line so an interrupt tears at most the last line
+    out.write(json.dumps(result, default=str) + "\n")
+    out.flush()
+
+
+def worker_db_path(db_path: str, index: int) -> str:
+    root, ext = os.path.splitext(db_path)
+    return f"{root}.worker{index}{ext or '.db'}"
+
+
+def _shard_main(index: int, jobs: List[SimulationJob], config: BatchConfig, scenario_dir: str, results):
+    """Worker process: run one shard on its own event loop and database file"""
+    config = replace(config, db_path=worker_db_path(config.db_path, index))
+
+    async def run():
+        runner = BatchRunner(PersonaManager(scenario_dir), config)
+        await startup_llm_client()
+        try:
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                await runner.run_jobs(jobs, results.put)
+        finally:
+            await shutdown_llm_client()
+            await shutdown_memory()
+
+    try:
+        asyncio.run(run())
+    finally:
+        results.put(None)  # this shard is finished
+
+
+def run_sharded(
+    jobs: Iterable[SimulationJob],
+    results_path: str,
+    workers: int,
+    config: BatchConfig = None,
+    scenario_dir: str = "scenarios"
+) -> Dict:
+    """Shard jobs across worker processes and aggregate their results here.
+
+    Workers share one rate-limit quota through DEEPSEEK_LIMITER_PATH (set
+    to a file next to the database if unset) and write to their own
+    database files, which are merged into ``config.db_path`` at the end.
+    """
+    config = config or BatchConfig()
+    done = completed_jobs(results_path, config.retry_failed)
+    pending = [job for job in jobs if job.id not in done]
+    shards = [pending[i::workers] for i in range(workers)]
+    shards = [shard for shard in shards if shard]
+
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    env_before = os.environ.get("DEEPSEEK_LIMITER_PATH")
+    if env_before is None:
+        # Spawned workers read it when agents.general_agent is imported
+        os.environ["DEEPSEEK_LIMITER_PATH"] = f"{config.db_path}.limiter"
+    try:
+        processes = [
+            ctx.Process(target=_shard_main, args=(index, shard, config, scenario_dir, results))
+            for index, shard in enumerate(shards)
+        ]
+        for process in processes:
+            process.start()
+    finally:
+        if env_before is None:
+            os.environ.pop("DEEPSEEK_LIMITER_PATH")
+
+    finished = failed = 0
+    running = len(processes)
+    with open_results(results_path) as out:
+        while running:
+            try:
+                result = results.get(timeout=1.0)
+            except queue.Empty:
+                if not any(process.is_alive() for process in processes):
+                    logger.error("Worker processes exited without finishing their shards")
+                    break
+                continue
+            if result is None:
+                running -= 1
+                continue
+            write_result(out, result)
+            finished += 1
+            failed += result["status"] != "ok"
+    for process in processes:
+        process.join()
+
+    worker_dbs = [worker_db_path(config.db_path, index) for index in range(len(shards))]
+    merge_databases(config.db_path, worker_dbs)
+    for path in worker_dbs:
+        remove_database(path)
+    return {"skipped": len(done), "ran": finished, "failed": failed}
+
+
+async def run_in_process(jobs: List[SimulationJob], results_path: str, config: BatchConfig, scenario_dir: str):
+    runner = BatchRunner(PersonaManager(scenario_dir), config)
+    await startup_llm_client()
+    try:
+        # Agents print role assignments and story beats; keep stdout quiet
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            return await runner.run(jobs, results_path)
+    finally:
+        await shutdown_llm_client()
+        await shutdown_memory()
+
+
+def main(args):
+    jobs = load_manifest(args.manifest)
+    config = BatchConfig(
+        concurrency=args.concurrency, db_path=args.db, retry_failed=args.retry_failed, micro_batch=args.micro_batch
+    )
+    start = time.perf_counter()
+    if args.workers > 1:
+        summary = run_sharded(jobs, args.out, args.workers, config, args.scenarios)
+    else:
+        summary = asyncio.run(run_in_process(jobs, args.out, config, args.scenarios))
+    elapsed = time.perf_counter() - start
+    print(
+        f"{summary['ran']} jobs run ({summary['failed']} failed), {summary['skipped']} already done, "
+        f"{elapsed:.1f}s -> {args.out}",
+        file=sys.stderr
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("manifest", help="JSONL (or JSON list) of jobs")
+    parser.add_argument("--out", default="results.jsonl", help="results JSONL, also the resume checkpoint")
+    parser.add_argument("--concurrency", type=int, default=16, help="conversations in flight per process")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes, each with its own event loop")
+    parser.add_argument("--db", default="agent_memory.db")
+    parser.add_argument("--scenarios", default="scenarios")
+    parser.add_argument("--retry-failed", action="store_true", help="re-run jobs whose result was an error")
+    parser.add_argument("--micro-batch", action="store_true",
+                        help="batch concurrent LLM calls; tune with LLM_BATCH_WINDOW/LLM_BATCH_SIZE/LLM_BATCH_MODE")
+    try:
+        main(parser.parse_args())
+    except KeyboardInterrupt:
+        print("\nInterrupted; run again with the same --out to resume", file=sys.stderr)
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Prompt size and LLM latency per turn: full history dump vs. token-budgeted ContextBuilder
+
+The stub charges a prefill delay per prompt token, so latency tracks prompt size.
+
+    python -m benchmarks.bench_context --turns 200 --budget 1500
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+from agents.context import ContextBuilder, estimate_tokens
+from agents.llm_client import LLMClient, LLMClientConfig
+from agents.memory import AgentMemory, shutdown_memory
+from benchmarks.bench_llm_client import percentile
+from utils.llm_stub import StubLLMServer
+
+TURN_TEXT = "I still have not received my package and I would like to know what you will do about it. " * 3
+
+
+async def _conversation(client: LLMClient, memory: AgentMemory, turns: int, budget: int = None):
+    builder = ContextBuilder(memory, max_tokens=budget) if budget else None
+    prompt_tokens, latencies, build_times = [], [], []
+    for turn in range(turns):
+        start = time.perf_counter()
+        history = await builder.build() if builder else await memory.get_context()
+        build_times.append(time.perf_counter() - start)
+
+        prompt = f"[HISTORY] {history}\n[INPUT] {TURN_TEXT}"
+        prompt_tokens.append(estimate_tokens(prompt))
+        start = time.perf_counter()
+        reply = await client.chat_completion(prompt)
+        latencies.append(time.perf_counter() - start)
+
+        await memory.add_message("user", f"{turn}: {TURN_TEXT}")
+        await memory.add_message("agent", reply)
+    return prompt_tokens, latencies, build_times
+
+
+async def run(turns: int, budget: int, prompt_token_latency: float):
+    reply = "Let me check the tracking details for you and see what options we have. " * 3
+    async with StubLLMServer(prompt_token_latency=prompt_token_latency, reply=reply) as server:
+        async with LLMClient(LLMClientConfig(base_url=server.url, api_key="bench")) as client:
+            with tempfile.TemporaryDirectory() as tmp:
+                db_path = str(Path(tmp) / "bench.db")
+                for label, limit in (("full history", None), (f"budget {budget}", budget)):
+                    memory = AgentMemory(label, db_path=db_path)
+                    tokens, latencies, builds = await _conversation(client, memory, turns, limit)
+                    print(
+                        f"{label:<14} prompt tokens total={sum(tokens):8d} max={max(tokens):6d} | "
+                        f"llm p50={percentile(latencies, 50) * 1000:7.1f}ms p99={percentile(latencies, 99) * 1000:7.1f}ms | "
+                        f"context build p50={percentile(builds, 50) * 1e6:7.0f}us"
+                    )
+                await shutdown_memory()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--budget", type=int, default=1500)
+    parser.add_argument("--prompt-token-latency", type=float, default=0.00002, help="stub prefill seconds per token")
+    args = parser.parse_args()
+    asyncio.run(run(args.turns, args.budget, args.prompt_token_latency))
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Threads and memory for 1,000 agents: one engine per AgentMemory vs. the shared registry
+
+    python -m benchmarks.bench_engine_registry --agents 1000
+"""
+
+import argparse
+import asyncio
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from sqlalchemy.ext.asyncio import create_async_engine
+from agents.memory import AgentMemory, shutdown_memory
+
+
+async def _per_instance(db_path: str, agents: int, concurrency: int):
+    # What every AgentMemory used to do: its own engine and pool per instance
+    await AgentMemory("setup", db_path=db_path).initialize_db()
+    await shutdown_memory()
+    semaphore = asyncio.Semaphore(concurrency)
+    engines = []
+
+    async def agent(i: int):
+        engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", connect_args={"check_same_thread": False})
+        engines.append(engine)
+        async with semaphore:
+            async with engine.begin() as conn:
+                await conn.exec_driver_sql(
+                    "INSERT INTO messages (session_id, seq, role, content) VALUES (?, 0, 'user', 'hello')",
+                    (f"agent{i}",)
+                )
+
+    await asyncio.gather(*(agent(i) for i in range(agents)))
+    threads = threading.active_count()
+    for engine in engines:
+        await engine.dispose()
+    return threads
+
+
+async def _shared(db_path: str, agents: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    memories = [AgentMemory(f"agent{i}", db_path=db_path) for i in range(agents)]
+
+    async def agent(memory: AgentMemory):
+        async with semaphore:
+            await memory.add_message("user", "hello")
+
+    await asyncio.gather(*(agent(memory) for memory in memories))
+    threads = threading.active_count()
+    await shutdown_memory()
+    return threads
+
+
+def _child(mode: str, agents: int, concurrency: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "bench.db")
+        runner = _per_instance if mode == "per-instance" else _shared
+        start = time.perf_counter()
+        threads = asyncio.run(runner(db_path, agents, concurrency))
+        elapsed = time.perf_counter() - start
+    print(json.dumps({
+        "mode": mode,
+        "threads": threads,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "seconds": elapsed
+    }))
+
+
+def run(agents: int, concurrency: int):
+    # Each mode runs in a fresh interpreter so peak RSS is not shared
+    for mode in ("per-instance", "shared"):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_engine_registry", "--child", mode,
+             "--agents", str(agents), "--concurrency", str(concurrency)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{result['mode']:<13} threads={result['threads']:5d} "
+            f"max_rss={result['max_rss_mb']:7.1f}MB time={result['seconds']:6.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agents", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--child", choices=["per-instance", "shared"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _child(args.child, args.agents, args.concurrency)
+    else:
+        run(args.agents, args.concurrency)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Per-call httpx client vs. the shared pooled LLMClient against a local stub
+
+    python -m benchmarks.bench_llm_client --turns 500 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Awaitable, Callable, List
+import httpx
+from agents.llm_client import LLMClient, LLMClientConfig
+from utils.llm_stub import StubLLMServer
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def _per_call_turn(url: str, prompt: str) -> str:
+    # Mirrors the old _query_llm: a brand new client for every turn
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        response = await client.post(
+            f"{url}/chat/completions",
+            json={
+                "model": "deepseek-chat",
+                "messages": [{"role": "user", "content": prompt}],
+                "max_tokens": 500
+            }
+        )
+        response.raise_for_status()
+        return response.json()["choices"][0]["message"]["content"]
+
+
+async def _measure(turn: Callable[[str], Awaitable[str]], turns: int, concurrency: int) -> List[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            await turn(f"turn {i}")
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one(i) for i in range(turns)))
+    return latencies
+
+
+def _report(name: str, latencies: List[float], connections: int):
+    print(
+        f"{name:<10} p50={percentile(latencies, 50) * 1000:7.2f}ms "
+        f"p99={percentile(latencies, 99) * 1000:7.2f}ms "
+        f"mean={statistics.mean(latencies) * 1000:7.2f}ms connections={connections}"
+    )
+
+
+async def run(turns: int, concurrency: int, latency: float, handshake: float):
+    async with StubLLMServer(latency=latency, connect_latency=handshake) as server:
+        latencies = await _measure(lambda p: _per_call_turn(server.url, p), turns, concurrency)
+        _report("per-call", latencies, server.connections)
+
+    async with StubLLMServer(latency=latency, connect_latency=handshake) as server:
+        config = LLMClientConfig(base_url=server.url, api_key="bench", max_keepalive_connections=concurrency)
+        async with LLMClient(config) as client:
+            latencies = await _measure(client.chat_completion, turns, concurrency)
+        _report("pooled", latencies, server.connections)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.005, help="stub completion latency (s)")
+    parser.add_argument("--handshake", type=float, default=0.02, help="simulated TLS handshake per connection (s)")
+    args = parser.parse_args()
+    asyncio.run(run(args.turns, args.concurrency, args.latency, args.handshake))
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Per-append cost of AgentMemory.add_message as a conversation grows,
+against the legacy read-modify-write JSON history blob
+
+    python -m benchmarks.bench_memory_append --sizes 10 1000 10000
+"""
+
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from sqlalchemy import create_engine
+from agents.memory import AgentMemory, Conversation, shutdown_memory
+
+
+def _seed(db_path: str, session_id: str, size: int, message_bytes: int):
+    """Bulk-load ``size`` existing messages in both layouts"""
+    engine = create_engine(f"sqlite:///{db_path}")
+    filler = "x" * message_bytes
+    history = [{"role": "user", "content": f"{i} {filler}", "timestamp": str(datetime.now())} for i in range(size)]
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "INSERT INTO messages (session_id, seq, role, content, timestamp) VALUES (?, ?, ?, ?, ?)",
+            [(session_id, i, m["role"], m["content"], m["timestamp"]) for i, m in enumerate(history)]
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO conversations (session_id, history, last_updated, size_kb, message_count, size_bytes) "
+            "VALUES (?, '[]', ?, '0', ?, 0)",
+            (session_id, datetime.utcnow(), size)
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO conversations (session_id, history, last_updated, size_kb, message_count, size_bytes) "
+            "VALUES (?, ?, ?, '0', 0, 0)",
+            (f"{session_id}_legacy", json.dumps(history), datetime.utcnow())
+        )
+    engine.dispose()
+
+
+async def _legacy_append(memory: AgentMemory, session_id: str, content: str):
+    # The pre-messages-table write path: decode, append, re-encode, rewrite
+    async with memory.async_session() as session:
+        async with session.begin():
+            conv = await session.get(Conversation, session_id)
+            history = conv.get_history()
+            history.append({"role": "user", "content": content, "timestamp": str(datetime.now())})
+            conv.history = json.dumps(history)
+            conv.size_kb = f"{len(conv.history) / 1024:.2f}"
+
+
+async def run(sizes, appends: int, message_bytes: int):
+    print(f"{'messages':>9} {'append (us)':>12} {'legacy (us)':>12} {'page read (us)':>15}")
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = str(Path(tmp) / "bench.db")
+            memory = AgentMemory("bench", db_path=db_path)
+            # Initialise first so the one-shot migration does not convert
+            # the legacy blob we seed for comparison
+            await memory.initialize_db()
+            _seed(db_path, "bench", size, message_bytes)
+
+            start = time.perf_counter()
+            for i in range(appends):
+                await memory.add_message("user", f"new message {i}")
+            append_cost = (time.perf_counter() - start) / appends
+
+            start = time.perf_counter()
+            for i in range(appends):
+                await _legacy_append(memory, "bench_legacy", f"new message {i}")
+            legacy_cost = (time.perf_counter() - start) / appends
+
+            start = time.perf_counter()
+            for i in range(appends):
+                await memory.get_messages(limit=10, offset=size // 2)
+            read_cost = (time.perf_counter() - start) / appends
+
+            await shutdown_memory()
+        print(f"{size:>9} {append_cost * 1e6:>12.0f} {legacy_cost * 1e6:>12.0f} {read_cost * 1e6:>15.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--appends", type=int, default=100)
+    parser.add_argument("--message-bytes", type=int, default=1000, help="size of each seeded message")
+    args = parser.parse_args()
+    asyncio.run(run(args.sizes, args.appends, args.message_bytes))
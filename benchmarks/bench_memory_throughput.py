@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Messages/sec for concurrent AgentMemory writers: per-message commits vs. write-behind
+
+    python -m benchmarks.bench_memory_throughput --sessions 50 --messages 20
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+from agents.memory import AgentMemory, shutdown_memory
+
+
+async def _drive(db_path: str, sessions: int, messages: int, write_behind: bool) -> float:
+    memories = [
+        AgentMemory(f"session{i}", db_path=db_path, write_behind=write_behind)
+        for i in range(sessions)
+    ]
+    await memories[0].initialize_db()
+
+    async def writer(memory: AgentMemory):
+        for turn in range(messages):
+            await memory.add_message("user", f"turn {turn} from {memory.session_id}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(writer(memory) for memory in memories))
+    # Durability is part of the cost: time until everything is committed
+    await memories[0].aclose()
+    elapsed = time.perf_counter() - start
+
+    await shutdown_memory()
+    return sessions * messages / elapsed
+
+
+async def run(sessions: int, messages: int):
+    for write_behind in (False, True):
+        with tempfile.TemporaryDirectory() as tmp:
+            rate = await _drive(str(Path(tmp) / "bench.db"), sessions, messages, write_behind)
+        label = "write-behind" if write_behind else "per-message"
+        print(f"{label:<13} {rate:10.0f} messages/sec")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--messages", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.sessions, args.messages))
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Throughput vs. latency of micro-batched LLM dispatch against a local stub
+that behaves like an inference server: a few parallel slots, and a batched
+/completions request costing little more than a single prompt
+
+Turns arrive at random (Poisson) at each --rates value. Rows sweep the
+batching window and size cap; "unbatched" is one chat request per turn,
+as GeneralAgent sends without a batcher. Below capacity a window only
+adds latency; past it batching is what keeps the queue from growing.
+
+    python -m benchmarks.bench_micro_batch --rates 50 1000 --requests 500
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, List
+from agents.llm_client import LLMClientConfig, get_llm_client, shutdown_llm_client, startup_llm_client
+from agents.micro_batch import BATCH_MODES, MicroBatchConfig, MicroBatcher
+from benchmarks.bench_llm_client import percentile
+from utils.llm_stub import StubLLMServer
+
+
+async def _open_loop(send: Callable[[str], Awaitable[str]], rate: float, requests: int, seed: int):
+    rng = random.Random(seed)
+    latencies: List[float] = []
+
+    async def one(index: int):
+        start = time.perf_counter()
+        await send(f"turn {index}")
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    tasks = []
+    for index in range(requests):
+        tasks.append(asyncio.create_task(one(index)))
+        await asyncio.sleep(rng.expovariate(rate))
+    await asyncio.gather(*tasks)
+    return time.perf_counter() - start, latencies
+
+
+async def run(rates, requests: int, latency: float, item_latency: float, slots: int, windows, sizes, modes, seed: int):
+    print(f"stub: {slots} slots, {latency * 1000:g}ms/request + {item_latency * 1000:g}ms per extra batched prompt")
+
+    async def measure(label: str, rate: float, make_send):
+        async with StubLLMServer(latency=latency, slots=slots, batch_item_latency=item_latency) as server:
+            await startup_llm_client(LLMClientConfig(base_url=server.url, api_key="bench", max_connections=1000))
+            send, batcher = make_send()
+            elapsed, latencies = await _open_loop(send, rate, requests, seed)
+            size = batcher.stats.mean_size if batcher else 1.0
+            print(f"{label:<24} {len(latencies) / elapsed:9.1f} {percentile(latencies, 50) * 1000:9.1f} "
+                  f"{percentile(latencies, 99) * 1000:9.1f} {size:6.1f} {server.requests:9d}")
+            await shutdown_llm_client()
+
+    for rate in rates:
+        print(f"\n{requests} turns arriving at {rate:g}/s")
+        print(f"{'dispatch':<24} {'turns/s':>9} {'p50 (ms)':>9} {'p99 (ms)':>9} {'batch':>6} {'http reqs':>9}")
+        await measure("unbatched", rate, lambda: (get_llm_client().chat_completion, None))
+        for mode in modes:
+            for size in sizes:
+                for window in windows:
+                    def make_send(mode=mode, size=size, window=window):
+                        batcher = MicroBatcher(MicroBatchConfig(window=window, max_batch=size, mode=mode))
+                        return batcher.submit, batcher
+                    await measure(f"{mode} {window * 1000:g}ms/{size}", rate, make_send)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rates", type=float, nargs="+", default=[50, 1000], help="turn arrival rates (per second)")
+    parser.add_argument("--requests", type=int, default=500, help="turns per row")
+    parser.add_argument("--latency", type=float, default=0.02, help="stub seconds per request")
+    parser.add_argument("--item-latency", type=float, default=0.0005, help="stub seconds per extra batched prompt")
+    parser.add_argument("--slots", type=int, default=4, help="requests the stub works on at once")
+    parser.add_argument("--windows", type=float, nargs="+", default=[0.002, 0.01, 0.05], help="batching windows (s)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[8, 64], help="batch size caps")
+    parser.add_argument("--modes", nargs="+", default=list(BATCH_MODES), choices=BATCH_MODES)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    asyncio.run(run(args.rates, args.requests, args.latency, args.item_latency, args.slots,
+                    args.windows, args.sizes, args.modes, args.seed))
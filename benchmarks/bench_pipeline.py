@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Per-turn wall-clock of a two-agent ConversationCLI run with and without
+pipelining, against a streaming stub with realistic latency
+
+Pipelining warms the connection pool up front, fetches each speaker's
+history and rate-limit slot while the other one is talking, and writes
+memory behind. Each turn waits for the limiter's spacing (--rate).
+
+    python -m benchmarks.bench_pipeline --turns 12 --latency 0.25 --rate 5
+"""
+
+import argparse
+import asyncio
+import contextlib
+import os
+import tempfile
+import time
+from agents.llm_client import LLMClientConfig, shutdown_llm_client, startup_llm_client
+from agents.memory import shutdown_memory
+from simulation import ConversationCLI
+from utils.llm_stub import StubLLMServer
+from utils.rate_limiter import RateLimitConfig, TokenBucketLimiter
+
+
+async def _conversation(args, pipeline: bool) -> float:
+    cli = ConversationCLI(scenario_dir=args.scenarios, pipeline=pipeline)
+    cli.max_turns = args.turns
+    cli.termination_confidence = 1.1  # always run every turn
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        await cli.initialize_agents("customer_support", "angry_customer", "support_agent")
+        # A quota that is actually felt at this turn rate
+        limiter = TokenBucketLimiter(RateLimitConfig(max_calls=args.rate, burst=1))
+        for agent in (cli.agent1, cli.agent2):
+            agent.cancel_prefetch()
+            agent.limiter = limiter
+        if pipeline:
+            cli.agent1.prefetch()
+        start = time.perf_counter()
+        await cli.start_conversation("My order is two weeks late, where is it?")
+        elapsed = time.perf_counter() - start
+    await shutdown_memory()
+    return elapsed
+
+
+async def run(args):
+    reply = " ".join(["Thank you for waiting while I check the order status"] * 2)
+    home = os.getcwd()
+    args.scenarios = os.path.abspath(args.scenarios)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)  # ConversationCLI keeps memory in ./agent_memory.db
+        try:
+            print(f"{args.turns} turns; stub {args.latency * 1000:g}ms to first token, {args.tokens_per_sec:g} tokens/s, "
+                  f"{args.handshake * 1000:g}ms handshake; limiter {args.rate:g}/s")
+            print(f"{'mode':<10} {'total (s)':>10} {'per turn (ms)':>14}")
+            results = {}
+            for label, pipeline in (("baseline", False), ("pipelined", True)):
+                async with StubLLMServer(latency=args.latency, tokens_per_sec=args.tokens_per_sec,
+                                         connect_latency=args.handshake, reply=reply) as server:
+                    await startup_llm_client(LLMClientConfig(base_url=server.url, api_key="bench"))
+                    elapsed = await _conversation(args, pipeline)
+                    await shutdown_llm_client()
+                results[label] = elapsed
+                print(f"{label:<10} {elapsed:10.2f} {elapsed / args.turns * 1000:14.1f}")
+            print(f"pipelining saves {(1 - results['pipelined'] / results['baseline']) * 100:.1f}% per turn")
+        finally:
+            os.chdir(home)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=12)
+    parser.add_argument("--latency", type=float, default=0.25, help="stub seconds to first token")
+    parser.add_argument("--tokens-per-sec", type=float, default=60.0, help="stub streaming rate")
+    parser.add_argument("--handshake", type=float, default=0.1, help="stub connection setup (s)")
+    parser.add_argument("--rate", type=float, default=5.0, help="limiter calls/sec shared by both agents")
+    parser.add_argument("--scenarios", default="scenarios")
+    args = parser.parse_args()
+    asyncio.run(run(args))
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Interactive latency while a batch saturates the limiter: one FIFO vs. priority lanes
+
+A background batch queues far more calls than the rate allows while an
+interactive session makes a call every --think seconds. With a single FIFO
+every live call waits behind the batch backlog; with lanes it waits for
+about one slot.
+
+    python -m benchmarks.bench_priority_lanes --rate 50 --batch 500 --duration 3
+"""
+
+import argparse
+import asyncio
+import time
+from utils.metrics import Histogram
+from utils.rate_limiter import PriorityRateLimiter, RateLimitConfig, TokenBucketLimiter
+
+
+async def _scenario(limiter, batch: int, duration: float, think: float, lanes: bool) -> Histogram:
+    background = (lambda: limiter.wait("background")) if lanes else limiter.wait
+    interactive = (lambda: limiter.wait("interactive")) if lanes else limiter.wait
+    batch_tasks = [asyncio.create_task(background()) for _ in range(batch)]
+    await asyncio.sleep(0.01)
+
+    live = Histogram()
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        start = time.monotonic()
+        await interactive()
+        live.record(time.monotonic() - start)
+        await asyncio.sleep(think)
+
+    for task in batch_tasks:
+        task.cancel()
+    await asyncio.gather(*batch_tasks, return_exceptions=True)
+    return live
+
+
+async def run(rate: int, batch: int, duration: float, think: float):
+    config = RateLimitConfig(max_calls=rate, period=1.0, burst=1)
+    print(f"limit {rate}/s, {batch} queued background calls, interactive call every {think}s for {duration}s")
+    for label, limiter, lanes in (
+        ("single FIFO", TokenBucketLimiter(config), False),
+        ("priority lanes", PriorityRateLimiter(config), True),
+    ):
+        live = await _scenario(limiter, batch, duration, think, lanes)
+        print(
+            f"{label:<15} interactive calls={live.count:3d} wait p50={live.percentile(50) * 1000:8.1f}ms "
+            f"p99={live.percentile(99) * 1000:8.1f}ms max={live.max * 1000:8.1f}ms"
+        )
+        if lanes:
+            for lane, stats in limiter.lane_stats().items():
+                print(f"  {lane:<12} granted={stats['granted']:4d} max depth={stats['max_depth']:4d} "
+                      f"wait p99={stats['wait']['p99'] * 1000:8.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=int, default=50)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--think", type=float, default=0.1)
+    args = parser.parse_args()
+    asyncio.run(run(args.rate, args.batch, args.duration, args.think))
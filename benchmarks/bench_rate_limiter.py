@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Rate limiter under load: EnhancedRateLimiter vs. TokenBucketLimiter
+
+Starts N concurrent waiters and records when each is let through.
+Jitter is how far the gaps between grants after the initial burst stray
+from an even period / max_calls spacing. "max in window" is the largest
+number of grants in any `period`: at most max_calls for the sliding
+window, burst + max_calls - 1 for the token bucket.
+
+    python -m benchmarks.bench_rate_limiter --waiters 1000 --max-calls 200
+"""
+
+import argparse
+import asyncio
+import bisect
+import time
+from benchmarks.bench_llm_client import percentile
+from utils.rate_limiter import EnhancedRateLimiter, RateLimitConfig, TokenBucketLimiter
+
+
+async def _run(limiter, waiters: int):
+    grants = []
+
+    async def waiter():
+        await limiter.wait()
+        grants.append(time.monotonic())
+
+    start = time.monotonic()
+    await asyncio.gather(*(waiter() for _ in range(waiters)))
+    return start, sorted(grants)
+
+
+def _max_in_window(grants, period: float) -> int:
+    return max(bisect.bisect_left(grants, t + period) - i for i, t in enumerate(grants))
+
+
+def report(label: str, config: RateLimitConfig, start: float, grants):
+    interval = config.period / config.max_calls
+    burst = config.burst or config.max_calls
+    steady = grants[burst - 1:]
+    jitter = [abs((b - a) - interval) for a, b in zip(steady, steady[1:])] or [0.0]
+    elapsed = grants[-1] - start
+    print(
+        f"{label:<20} {len(grants) / elapsed:8.1f} calls/s over {elapsed:6.2f}s | "
+        f"jitter p50={percentile(jitter, 50) * 1000:8.1f}ms p99={percentile(jitter, 99) * 1000:8.1f}ms | "
+        f"max in window={_max_in_window(grants, config.period)}"
+    )
+
+
+async def run(waiters: int, max_calls: int, period: float, burst: int):
+    config = RateLimitConfig(max_calls=max_calls, period=period, burst=burst)
+    print(f"{waiters} waiters, limit {max_calls}/{period}s, burst {burst or max_calls}")
+    for label, limiter in (
+        ("EnhancedRateLimiter", EnhancedRateLimiter(config)),
+        ("TokenBucketLimiter", TokenBucketLimiter(config)),
+    ):
+        start, grants = await _run(limiter, waiters)
+        report(label, config, start, grants)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--waiters", type=int, default=1000)
+    parser.add_argument("--max-calls", type=int, default=200)
+    parser.add_argument("--period", type=float, default=1.0)
+    parser.add_argument("--burst", type=int, default=None)
+    args = parser.parse_args()
+    asyncio.run(run(args.waiters, args.max_calls, args.period, args.burst))
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Keyword rules per turn with a large story arc: the old per-trigger
+``trigger.lower() in text.lower()`` loop plus if-chains vs. the compiled
+RuleEngine (one lowercase, one regex pass)
+
+    python -m benchmarks.bench_rules --triggers 1000
+"""
+
+import argparse
+import random
+import time
+from agents.schemas import Scenario
+
+WORDS = (
+    "refund order account manager delivery invoice password broken late charge "
+    "cancel upgrade warranty replace shipping address review complaint discount "
+    "subscription payment error crash login billing support ticket priority"
+).split()
+
+
+def _legacy_turn(story_arc, allowed, message: str, reply: str):
+    # What GeneralAgent did before the rule engine
+    triggers = [arc["trigger"] for arc in story_arc if arc["trigger"].lower() in message.lower()]
+    query = message.lower()
+    if "manager" in query and "escalate" in allowed:
+        action = "escalate"
+    elif "transfer" in query and "redirect" in allowed:
+        action = "redirect"
+    else:
+        action = "respond"
+    text = reply.lower()
+    if any(word in text for word in ["sorry", "apologize", "regret"]):
+        emotion = "frustrated"
+    elif any(word in text for word in ["happy", "great"]) and "!" in text:
+        emotion = "happy"
+    elif any(word in text for word in ["angry", "unacceptable"]):
+        emotion = "angry"
+    else:
+        emotion = "neutral"
+    return triggers, action, emotion
+
+
+def _engine_turn(engine, allowed, message: str, reply: str):
+    return engine.matched_triggers(message), engine.action(message, allowed), engine.emotion(reply)
+
+
+def run(triggers: int, turns: int, seed: int):
+    rng = random.Random(seed)
+    phrases = set()
+    while len(phrases) < triggers:
+        phrases.add(" ".join(rng.sample(WORDS, rng.randint(1, 3))))
+    scenario = Scenario(
+        scenario="bench",
+        description="rules benchmark",
+        personas={"agent": {"role_type": "support", "allowed_actions": ["escalate", "redirect"], "instructions": "Help"}},
+        story_arc=[{"trigger": phrase} for phrase in sorted(phrases)],
+    )
+    allowed = scenario.personas["agent"]["allowed_actions"]
+    messages = [
+        (" ".join(rng.choice(WORDS) for _ in range(rng.randint(10, 40))), " ".join(rng.choice(WORDS) for _ in range(30)) + "!")
+        for _ in range(turns)
+    ]
+
+    start = time.perf_counter()
+    engine = scenario.rules("agent")
+    compile_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected = [_legacy_turn(scenario.story_arc, allowed, m, r) for m, r in messages]
+    legacy = (time.perf_counter() - start) / turns
+    start = time.perf_counter()
+    got = [_engine_turn(engine, allowed, m, r) for m, r in messages]
+    compiled = (time.perf_counter() - start) / turns
+    assert got == expected, "rule engine disagrees with the legacy matcher"
+
+    print(f"{triggers} triggers, {turns} turns, {sum(len(t) for t, _, _ in got) / turns:.1f} triggers fired per turn")
+    print(f"{'per-trigger loop':<18} {legacy * 1e6:10.1f} us/turn")
+    print(f"{'compiled engine':<18} {compiled * 1e6:10.1f} us/turn  ({legacy / compiled:.1f}x, compiled once in {compile_time * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--triggers", type=int, default=1000)
+    parser.add_argument("--turns", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    run(args.triggers, args.turns, args.seed)
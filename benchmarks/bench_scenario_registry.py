@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Scenario loading for many agents: re-parsing the YAML on every load_scenario
+vs. the shared ScenarioRegistry, plus cold-start cost per loader
+
+    python -m benchmarks.bench_scenario_registry --agents 1000
+"""
+
+import argparse
+import tempfile
+import time
+import yaml
+from agents.persona_manager import PersonaManager
+from agents.scenario_registry import YAML_LOADER, ScenarioRegistry
+from agents.schemas import Scenario
+
+
+def _legacy_load(path: str) -> Scenario:
+    # The pre-registry load_scenario: open, safe_load, validate, every call
+    with open(path) as f:
+        return Scenario(**yaml.safe_load(f))
+
+
+def _timed(call, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        call()
+    return (time.perf_counter() - start) / repeat
+
+
+def run(agents: int, scenario: str, scenario_dir: str):
+    path = f"{scenario_dir}/{scenario}.yaml"
+    legacy = _timed(lambda: _legacy_load(path), agents)
+    managers = [PersonaManager(scenario_dir) for _ in range(agents)]
+    start = time.perf_counter()
+    for manager in managers:
+        manager.load_scenario(scenario)
+    registry = (time.perf_counter() - start) / agents
+
+    print(f"{agents} agents loading {scenario}")
+    print(f"{'re-parse per load':<22} {legacy * 1e6:10.1f} us/load  {legacy * agents * 1000:8.1f} ms total")
+    print(f"{'shared registry':<22} {registry * 1e6:10.1f} us/load  {registry * agents * 1000:8.1f} ms total")
+
+    print("cold start (first load in a process):")
+    cold = {
+        "yaml SafeLoader": lambda: ScenarioRegistry(scenario_dir, loader=yaml.SafeLoader).get(scenario),
+        f"yaml {YAML_LOADER.__name__}": lambda: ScenarioRegistry(scenario_dir).get(scenario),
+    }
+    with tempfile.TemporaryDirectory() as cache_dir:
+        ScenarioRegistry(scenario_dir, cache_dir=cache_dir).get(scenario)  # write the compiled copy
+        cold["compiled JSON cache"] = lambda: ScenarioRegistry(scenario_dir, cache_dir=cache_dir).get(scenario)
+        for label, call in cold.items():
+            print(f"  {label:<20} {_timed(call, 200) * 1e6:10.1f} us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agents", type=int, default=1000)
+    parser.add_argument("--scenario", default="philosophical_roundtable")
+    parser.add_argument("--scenarios", default="scenarios")
+    args = parser.parse_args()
+    run(args.agents, args.scenario, args.scenarios)
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Wall-clock per round of an N-party conversation: round-robin (every turn
+waits for the previous one) vs. parallel-then-merge (the speakers' LLM
+calls overlap), against a stub with a fixed per-call latency
+
+    python -m benchmarks.bench_scheduler --speakers 2 3 4 6 8 --rounds 3
+"""
+
+import argparse
+import asyncio
+import contextlib
+import os
+import tempfile
+import time
+from agents.general_agent import GeneralAgent
+from agents.llm_client import LLMClientConfig, shutdown_llm_client, startup_llm_client
+from agents.memory import AgentMemory, shutdown_memory
+from agents.persona_manager import PersonaManager
+from agents.scheduler import ConversationScheduler
+from utils.llm_stub import StubLLMServer
+from utils.rate_limiter import RateLimitConfig, TokenBucketLimiter
+
+
+async def _round_time(tmp: str, scenario: str, speakers: int, policy: str, rounds: int) -> float:
+    manager = PersonaManager()
+    personas = list(manager.load_scenario(scenario).personas)
+    agents = []
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for i in range(speakers):
+            persona = personas[i % len(personas)]
+            agent = GeneralAgent(
+                manager,
+                agent_id=f"{policy}_{speakers}_{i}",
+                memory=AgentMemory(f"{policy}_{speakers}_{i}", db_path=os.path.join(tmp, "bench.db"))
+            )
+            await agent.assign_role(scenario, persona)
+            agent.limiter = TokenBucketLimiter(RateLimitConfig(max_calls=10 ** 9))
+            agents.append(agent)
+        scheduler = ConversationScheduler(agents, policy=policy)
+        scheduler.transcript.append("user", "user", "Is it ever right to break a promise?")
+        start = time.perf_counter()
+        for _ in range(rounds):
+            await scheduler.run_round()
+    return (time.perf_counter() - start) / rounds
+
+
+async def run(speaker_counts, rounds: int, latency: float, scenario: str):
+    async with StubLLMServer(latency=latency) as server:
+        await startup_llm_client(LLMClientConfig(base_url=server.url, api_key="bench"))
+        with tempfile.TemporaryDirectory() as tmp:
+            await _round_time(tmp, scenario, 2, "parallel", 1)  # warm up pool and database
+            print(f"stub latency {latency * 1000:g}ms, {rounds} rounds each")
+            print(f"{'speakers':>8} {'round_robin (ms)':>17} {'parallel (ms)':>14} {'speedup':>8}")
+            for speakers in speaker_counts:
+                serial = await _round_time(tmp, scenario, speakers, "round_robin", rounds)
+                parallel = await _round_time(tmp, scenario, speakers, "parallel", rounds)
+                print(f"{speakers:8d} {serial * 1000:17.1f} {parallel * 1000:14.1f} {serial / parallel:7.1f}x")
+            await shutdown_memory()
+        await shutdown_llm_client()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--speakers", type=int, nargs="+", default=[2, 3, 4, 6, 8])
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.1, help="stub seconds per LLM call")
+    parser.add_argument("--scenario", default="philosophical_roundtable")
+    args = parser.parse_args()
+    asyncio.run(run(args.speakers, args.rounds, args.latency, args.scenario))
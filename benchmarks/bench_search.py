@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Message search latency as the database grows: the FTS5 index against a
+LIKE scan of the messages table and a db_inspect-style scan (read every
+row into Python and test it). Also reports the cost of building the index
+for an existing database (agents.search backfill) and of indexing each
+add_message as it happens.
+
+    python -m benchmarks.bench_search --sizes 10000 100000 250000
+"""
+
+import argparse
+import asyncio
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List
+from sqlalchemy import create_engine
+from agents import migrations
+from agents.memory import AgentMemory, shutdown_memory
+from agents.search import MessageSearch
+from benchmarks.bench_llm_client import percentile
+
+SCENARIOS = ("customer_service", "philosophical_roundtable", "tech_support")
+
+# (label, query, filters): a common word, a rare one, two words together
+# and a common word within one scenario
+QUERIES = (
+    ("common", "refund", {}),
+    ("rare", "escalate", {}),
+    ("two words", "refund damaged", {}),
+    ("scenario", "refund", {"scenario": "tech_support"}),
+)
+
+
+def _message(rng: random.Random, vocabulary: List[str]) -> str:
+    words = rng.choices(vocabulary, k=rng.randint(8, 30))
+    if rng.random() < 0.01:
+        words.insert(rng.randrange(len(words)), "refund")
+    if rng.random() < 0.05:
+        words.insert(rng.randrange(len(words)), "damaged")
+    if rng.random() < 0.0002:
+        words.insert(rng.randrange(len(words)), "escalate")
+    return " ".join(words)
+
+
+def _seed(db_path: str, size: int, per_session: int = 50):
+    """Bulk-load ``size`` messages in sessions of ``per_session``, indexed by the triggers"""
+    rng = random.Random(size)
+    vocabulary = [f"w{i}" for i in range(5000)]
+    start = datetime(2026, 1, 1)
+    engine = create_engine(f"sqlite:///{db_path}")
+    with engine.begin() as conn:
+        sessions = (size + per_session - 1) // per_session
+        conn.exec_driver_sql(
+            "INSERT INTO conversations (session_id, history, last_updated, size_kb, message_count, size_bytes, "
+            "scenario) VALUES (?, '[]', ?, '0', ?, 0, ?)",
+            [(f"s{i}", start, per_session, SCENARIOS[i % len(SCENARIOS)]) for i in range(sessions)]
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO messages (session_id, seq, role, content, timestamp) VALUES (?, ?, ?, ?, ?)",
+            [
+                (
+                    f"s{i // per_session}", i % per_session, "user" if i % 2 else "agent",
+                    _message(rng, vocabulary), str(start + timedelta(seconds=i))
+                )
+                for i in range(size)
+            ]
+        )
+    engine.dispose()
+
+
+def _reindex(db_path: str) -> float:
+    engine = create_engine(f"sqlite:///{db_path}")
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        migrations.reindex_messages(conn)
+    elapsed = time.perf_counter() - start
+    engine.dispose()
+    return elapsed
+
+
+def _python_scan(db_path: str, query: str, filters: Dict, limit: int = 20) -> List:
+    # What utils/db_inspect.py-style tooling does: pull rows, test in Python
+    words = query.lower().split()
+    hits = []
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute(
+            "SELECT m.session_id, m.seq, m.content, m.timestamp, c.scenario FROM messages AS m "
+            "LEFT JOIN conversations AS c ON c.session_id = m.session_id"
+        )
+        for session_id, seq, content, timestamp, scenario in rows:
+            if filters.get("scenario", scenario) != scenario:
+                continue
+            text = content.lower()
+            if all(word in text for word in words):
+                hits.append((timestamp, session_id, seq))
+    return sorted(hits, reverse=True)[:limit]
+
+
+async def _timed(call: Callable, repeats: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = call()
+        if asyncio.iscoroutine(result):
+            await result
+        samples.append(time.perf_counter() - start)
+    return {"p50": percentile(samples, 50), "p95": percentile(samples, 95)}
+
+
+async def _append_cost(db_path: str, appends: int) -> float:
+    # No eviction: it would delete seeded sessions in the middle of the timing
+    memory = AgentMemory("append", db_path=db_path, max_sessions=10 ** 9, max_storage_mb=10 ** 9)
+    await memory.add_message("user", "warm up")
+    with sqlite3.connect(db_path) as conn:
+        # Don't charge the first run for checkpointing the bulk load's WAL
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    start = time.perf_counter()
+    for i in range(appends):
+        await memory.add_message("user", f"customer asks about refund {i} for a damaged parcel")
+    return (time.perf_counter() - start) / appends
+
+
+async def run(sizes: List[int], repeats: int, scan_repeats: int, appends: int):
+    # Scans are compared on newest-first results, which they (like the
+    # index) can only produce after finding every match
+    print(f"{'messages':>9} {'query':<10} {'ranked p50 (ms)':>16} {'newest p50':>11} {'newest p95':>11} "
+          f"{'LIKE p50':>9} {'python p50':>11} {'speedup':>8}")
+    summary = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = str(Path(tmp) / "bench.db")
+            memory = AgentMemory("bench", db_path=db_path)
+            await memory.initialize_db()
+            start = time.perf_counter()
+            _seed(db_path, size)
+            seed_time = time.perf_counter() - start
+            rebuild_time = _reindex(db_path)
+            search = MessageSearch(memory.async_session)
+
+            for label, query, filters in QUERIES:
+                ranked = await _timed(lambda: search.search(query, **filters), repeats)
+                fts = await _timed(lambda: search.search(query, order="newest", **filters), repeats)
+                like = await _timed(lambda: search.search(query, order="newest", scan=True, **filters), scan_repeats)
+                python = await _timed(lambda: _python_scan(db_path, query, filters), scan_repeats)
+                print(f"{size:>9} {label:<10} {ranked['p50'] * 1e3:>16.2f} {fts['p50'] * 1e3:>11.2f} "
+                      f"{fts['p95'] * 1e3:>11.2f} {like['p50'] * 1e3:>9.2f} {python['p50'] * 1e3:>11.2f} "
+                      f"{like['p50'] / fts['p50']:>7.0f}x")
+
+            indexed_append = await _append_cost(db_path, appends)
+            with sqlite3.connect(db_path) as conn:
+                for trigger in ("insert", "delete", "update"):
+                    conn.execute(f"DROP TRIGGER messages_search_{trigger}")
+            plain_append = await _append_cost(db_path, appends)
+            summary.append((size, seed_time, rebuild_time, indexed_append, plain_append))
+            await shutdown_memory()
+
+    print(f"\n{'messages':>9} {'seed+index (s)':>15} {'backfill (s)':>13} "
+          f"{'append (us)':>12} {'unindexed (us)':>15}")
+    for size, seed_time, rebuild_time, indexed_append, plain_append in summary:
+        print(f"{size:>9} {seed_time:>15.2f} {rebuild_time:>13.2f} "
+              f"{indexed_append * 1e6:>12.0f} {plain_append * 1e6:>15.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeats", type=int, default=50, help="timed runs per indexed query")
+    parser.add_argument("--scan-repeats", type=int, default=5, help="timed runs per scan")
+    parser.add_argument("--appends", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args.sizes, args.repeats, args.scan_repeats, args.appends))
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Batch throughput vs. worker processes, against the local stub LLM
+
+Runs the same set of conversations with 1, 2, 4 and 8 worker processes.
+Each worker has its own event loop and database file; all of them share
+one SQLite-backed rate-limit quota, set high enough (--rate) that the
+CPU work per turn, not the limiter, is what a single loop runs out of.
+Speedup needs spare cores: on one CPU, process start-up only adds cost.
+
+    python -m benchmarks.bench_sharded_runner --jobs 64 --turns 6 --latency 0.02
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from batch_runner import BatchConfig, SimulationJob, run_sharded
+from utils.llm_stub import serve_in_thread
+
+
+def _jobs(count: int, turns: int):
+    return [
+        SimulationJob(f"bench-{i}", "customer_support", ("angry_customer", "support_agent"),
+                      "Where is my package?", turns)
+        for i in range(count)
+    ]
+
+
+def run(jobs: int, turns: int, latency: float, concurrency: int, rate: int, worker_counts):
+    os.environ["DEEPSEEK_RATE_LIMIT"] = str(rate)
+    os.environ["DEEPSEEK_API_KEY"] = "bench"
+    print(f"{jobs} conversations x {turns} turns, stub latency {latency * 1000:.0f}ms, "
+          f"{concurrency} in flight per worker, shared limit {rate}/s, {os.cpu_count()} CPUs")
+    baseline = None
+    with serve_in_thread(latency=latency) as server:
+        os.environ["DEEPSEEK_API_BASE"] = server.url
+        for workers in worker_counts:
+            with tempfile.TemporaryDirectory() as tmp:
+                config = BatchConfig(concurrency=concurrency, db_path=os.path.join(tmp, "agent_memory.db"))
+                start = time.perf_counter()
+                summary = run_sharded(_jobs(jobs, turns), os.path.join(tmp, "results.jsonl"), workers, config)
+                elapsed = time.perf_counter() - start
+            rate_per_sec = summary["ran"] / elapsed
+            baseline = baseline or rate_per_sec
+            print(
+                f"workers={workers}  {elapsed:6.2f}s  {rate_per_sec:7.1f} conversations/s  "
+                f"{rate_per_sec * turns:8.1f} turns/s  speedup x{rate_per_sec / baseline:4.2f}  "
+                f"failed={summary['failed']}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=64)
+    parser.add_argument("--turns", type=int, default=6)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rate", type=int, default=10000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+    run(args.jobs, args.turns, args.latency, args.concurrency, args.rate, args.workers)
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Time-to-first-token for GeneralAgent.execute vs. execute_stream against a local SSE stub
+
+    python -m benchmarks.bench_streaming --turns 20 --token-interval 0.02
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+from agents.general_agent import GeneralAgent
+from agents.llm_client import LLMClientConfig, startup_llm_client, shutdown_llm_client
+from agents.memory import AgentMemory, shutdown_memory
+from agents.persona_manager import PersonaManager
+from benchmarks.bench_llm_client import percentile
+from utils.llm_stub import StubLLMServer
+
+
+async def run(turns: int, token_interval: float, reply_tokens: int):
+    reply = " ".join(f"token{i}" for i in range(reply_tokens))
+    async with StubLLMServer(token_interval=token_interval, reply=reply) as server:
+        await startup_llm_client(LLMClientConfig(base_url=server.url, api_key="bench"))
+        with tempfile.TemporaryDirectory() as tmp:
+            agent = GeneralAgent(PersonaManager())
+            agent.memory = AgentMemory("bench_streaming", db_path=str(Path(tmp) / "bench.db"))
+            await agent.assign_role("customer_support", "support_agent")
+
+            blocking, first_token, streamed_total = [], [], []
+            for i in range(turns):
+                start = time.perf_counter()
+                await agent.execute(f"message {i}")
+                blocking.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                first = None
+                async for _ in agent.execute_stream(f"message {i}"):
+                    if first is None:
+                        first = time.perf_counter() - start
+                first_token.append(first)
+                streamed_total.append(time.perf_counter() - start)
+            await shutdown_memory()
+        await shutdown_llm_client()
+
+    for name, samples in (
+        ("execute (first text)", blocking),
+        ("execute_stream TTFT", first_token),
+        ("execute_stream total", streamed_total),
+    ):
+        print(f"{name:<22} p50={percentile(samples, 50) * 1000:8.2f}ms p99={percentile(samples, 99) * 1000:8.2f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--token-interval", type=float, default=0.02)
+    parser.add_argument("--reply-tokens", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(run(args.turns, args.token_interval, args.reply_tokens))
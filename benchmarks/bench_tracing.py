@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Cost of per-turn tracing: GeneralAgent.execute with tracing off, aggregated
+in-process, and dumped to JSONL, plus the raw cost of one span
+
+    python -m benchmarks.bench_tracing --turns 300
+"""
+
+import argparse
+import asyncio
+import contextlib
+import os
+import tempfile
+import time
+from agents.general_agent import GeneralAgent
+from agents.llm_client import LLMClientConfig, shutdown_llm_client, startup_llm_client
+from agents.memory import AgentMemory, shutdown_memory
+from agents.persona_manager import PersonaManager
+from utils import tracing
+from utils.llm_stub import StubLLMServer
+from utils.rate_limiter import RateLimitConfig, TokenBucketLimiter
+from utils.tracing import HistogramExporter, JSONLExporter, configure_tracing
+
+
+def _span_cost(iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        with tracing.span("phase"):
+            pass
+    return (time.perf_counter() - start) / iterations
+
+
+async def _turns(tmp: str, label: str, turns: int) -> float:
+    agent = GeneralAgent(PersonaManager(), memory=AgentMemory(f"bench_{label}", db_path=os.path.join(tmp, f"{label}.db")))
+    agent.limiter = TokenBucketLimiter(RateLimitConfig(max_calls=10 ** 9))
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        await agent.assign_role("customer_support", "support_agent")
+        start = time.perf_counter()
+        for i in range(turns):
+            await agent.execute(f"message {i}")
+    return (time.perf_counter() - start) / turns
+
+
+async def run(turns: int, iterations: int):
+    async with StubLLMServer() as server:
+        await startup_llm_client(LLMClientConfig(base_url=server.url, api_key="bench"))
+        with tempfile.TemporaryDirectory() as tmp:
+            modes = (
+                ("off", lambda: []),
+                ("histogram", lambda: [HistogramExporter()]),
+                ("histogram+jsonl", lambda: [HistogramExporter(), JSONLExporter(os.path.join(tmp, "trace.jsonl"))]),
+            )
+            await _turns(tmp, "warmup", 20)
+            baseline = None
+            print(f"{'mode':<16} {'span (us)':>10} {'turn (ms)':>10} {'overhead':>9}")
+            for label, exporters in modes:
+                configure_tracing(exporters())
+                span = _span_cost(iterations)
+                turn = await _turns(tmp, label, turns)
+                baseline = baseline or turn
+                print(f"{label:<16} {span * 1e6:10.3f} {turn * 1000:10.3f} {(turn / baseline - 1) * 100:+8.1f}%")
+            configure_tracing()
+            await shutdown_memory()
+        await shutdown_llm_client()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=300)
+    parser.add_argument("--iterations", type=int, default=100000, help="spans timed for the per-span cost")
+    args = parser.parse_args()
+    asyncio.run(run(args.turns, args.iterations))
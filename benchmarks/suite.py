@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark suite with JSON output and baseline comparison
+
+Measures, against the local stub LLM:
+  execute   turns/sec and p50/p95/p99 latency of GeneralAgent.execute
+  memory    AgentMemory.add_message / get_messages cost as history grows
+  scenario  PersonaManager.load_scenario time
+  limiter   per-call overhead of an uncontended rate limiter
+  batch     multi-agent simulation throughput through BatchRunner
+
+    python -m benchmarks.suite --out bench.json
+    python -m benchmarks.suite --baseline bench.json          # exit 1 on regression
+    python -m benchmarks.suite --only execute memory --quick
+
+The LLM limiter is lifted for the end-to-end groups so they measure the
+code, not the 5 calls/sec quota; its cost is reported by ``limiter``.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+from agents.general_agent import GeneralAgent
+from agents.llm_client import LLMClientConfig, shutdown_llm_client, startup_llm_client
+from agents.memory import AgentMemory, shutdown_memory
+from agents.persona_manager import PersonaManager
+from agents.scenario_registry import ScenarioRegistry
+from batch_runner import BatchConfig, BatchRunner, SimulationJob
+from benchmarks.bench_llm_client import percentile
+from utils.llm_stub import StubLLMServer
+from utils.rate_limiter import PriorityRateLimiter, RateLimitConfig, TokenBucketLimiter
+
+_UNLIMITED = RateLimitConfig(max_calls=10 ** 9, period=1.0)
+
+
+@dataclass
+class Metric:
+    value: float
+    unit: str
+    higher_is_better: bool = False
+
+
+@dataclass
+class SuiteConfig:
+    turns: int = 200
+    latency: float = 0.0  # stub latency; 0 isolates our own overhead
+    history_sizes: tuple = (100, 1000, 10000)
+    memory_ops: int = 200
+    scenario_loads: int = 200
+    limiter_calls: int = 20000
+    batch_jobs: int = 64
+    batch_turns: int = 4
+    batch_concurrency: int = 16
+    repeats: int = 3  # microbenchmarks report the best of this many runs
+
+    @classmethod
+    def quick(cls) -> "SuiteConfig":
+        return cls(turns=50, history_sizes=(100, 1000), memory_ops=50, scenario_loads=50,
+                   limiter_calls=2000, batch_jobs=16)
+
+
+async def bench_execute(config: SuiteConfig, tmp: str) -> Dict[str, Metric]:
+    agent = GeneralAgent(PersonaManager(), memory=AgentMemory("bench_execute", db_path=os.path.join(tmp, "execute.db")))
+    agent.limiter = TokenBucketLimiter(_UNLIMITED)
+    await agent.assign_role("customer_support", "support_agent")
+    latencies = []
+    start = time.perf_counter()
+    for i in range(config.turns):
+        turn_start = time.perf_counter()
+        await agent.execute(f"Where is my order {i}?")
+        latencies.append(time.perf_counter() - turn_start)
+    elapsed = time.perf_counter() - start
+    return {
+        "turns_per_sec": Metric(config.turns / elapsed, "turns/s", True),
+        "p50_ms": Metric(percentile(latencies, 50) * 1000, "ms"),
+        "p95_ms": Metric(percentile(latencies, 95) * 1000, "ms"),
+        "p99_ms": Metric(percentile(latencies, 99) * 1000, "ms"),
+    }
+
+
+def _seed_history(db_path: str, session_id: str, size: int):
+    from sqlalchemy import create_engine
+
+    engine = create_engine(f"sqlite:///{db_path}")
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "INSERT INTO messages (session_id, seq, role, content, timestamp) VALUES (?, ?, ?, ?, ?)",
+            [(session_id, i, "user", f"message {i} " + "x" * 200, str(now)) for i in range(size)]
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO conversations (session_id, history, last_updated, size_kb, message_count, size_bytes) "
+            "VALUES (?, '[]', ?, '0', ?, 0)",
+            (session_id, now, size)
+        )
+    engine.dispose()
+
+
+async def bench_memory(config: SuiteConfig, tmp: str) -> Dict[str, Metric]:
+    metrics = {}
+    for size in config.history_sizes:
+        db_path = os.path.join(tmp, f"memory_{size}.db")
+        memory = AgentMemory("bench_memory", db_path=db_path)
+        await memory._ensure_db()
+        _seed_history(db_path, "bench_memory", size)
+
+        start = time.perf_counter()
+        for i in range(config.memory_ops):
+            await memory.add_message("user", f"new message {i}")
+        metrics[f"add_message_us.{size}"] = Metric((time.perf_counter() - start) / config.memory_ops * 1e6, "us")
+
+        start = time.perf_counter()
+        for _ in range(config.memory_ops):
+            await memory.get_messages(limit=20)
+        metrics[f"get_messages_us.{size}"] = Metric((time.perf_counter() - start) / config.memory_ops * 1e6, "us")
+        await shutdown_memory()
+    return metrics
+
+
+async def bench_scenario(config: SuiteConfig, tmp: str) -> Dict[str, Metric]:
+    manager = PersonaManager()
+    warm = float("inf")
+    for _ in range(config.repeats):
+        start = time.perf_counter()
+        for _ in range(config.scenario_loads):
+            manager.load_scenario("customer_support")
+        warm = min(warm, (time.perf_counter() - start) / config.scenario_loads)
+    start = time.perf_counter()
+    ScenarioRegistry("scenarios").get("customer_support")  # a fresh registry parses the file
+    cold = time.perf_counter() - start
+    return {
+        "load_ms": Metric(warm * 1000, "ms"),
+        "first_load_ms": Metric(cold * 1000, "ms"),
+    }
+
+
+async def bench_limiter(config: SuiteConfig, tmp: str) -> Dict[str, Metric]:
+    metrics = {}
+    priority = PriorityRateLimiter(_UNLIMITED)
+    for name, wait in (
+        ("token_bucket", TokenBucketLimiter(_UNLIMITED).wait),
+        ("priority_lane", priority.lane("standard").wait),
+    ):
+        best = float("inf")
+        for _ in range(config.repeats):
+            start = time.perf_counter()
+            for _ in range(config.limiter_calls):
+                await wait()
+            best = min(best, (time.perf_counter() - start) / config.limiter_calls)
+        metrics[f"{name}_wait_us"] = Metric(best * 1e6, "us")
+    await priority.aclose()
+    return metrics
+
+
+class _UnthrottledRunner(BatchRunner):
+    def _agent(self, job, index):
+        agent = super()._agent(job, index)
+        agent.limiter = self.limiter
+        return agent
+
+
+async def bench_batch(config: SuiteConfig, tmp: str) -> Dict[str, Metric]:
+    runner = _UnthrottledRunner(
+        PersonaManager(),
+        BatchConfig(concurrency=config.batch_concurrency, db_path=os.path.join(tmp, "batch.db"))
+    )
+    runner.limiter = TokenBucketLimiter(_UNLIMITED)
+    jobs = [
+        SimulationJob(str(i), "customer_support", ("angry_customer", "support_agent"),
+                      "Where is my package?", config.batch_turns)
+        for i in range(config.batch_jobs)
+    ]
+    start = time.perf_counter()
+    summary = await runner.run(jobs, os.path.join(tmp, "batch_results.jsonl"))
+    elapsed = time.perf_counter() - start
+    await shutdown_memory()
+    return {
+        "conversations_per_sec": Metric(summary["ran"] / elapsed, "conversations/s", True),
+        "turns_per_sec": Metric(summary["ran"] * config.batch_turns / elapsed, "turns/s", True),
+    }
+
+
+BENCHMARKS: Dict[str, Callable] = {
+    "execute": bench_execute,
+    "memory": bench_memory,
+    "scenario": bench_scenario,
+    "limiter": bench_limiter,
+    "batch": bench_batch,
+}
+
+
+async def run_suite(config: SuiteConfig, only: List[str] = None) -> Dict:
+    results = {}
+    async with StubLLMServer(latency=config.latency) as server:
+        await startup_llm_client(LLMClientConfig(base_url=server.url, api_key="bench"))
+        try:
+            for group, bench in BENCHMARKS.items():
+                if only and group not in only:
+                    continue
+                print(f"running {group}...", file=sys.stderr)
+                with tempfile.TemporaryDirectory() as tmp:
+                    # Agents print role assignments; keep the report readable
+                    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                        metrics = await bench(config, tmp)
+                for name, metric in metrics.items():
+                    results[f"{group}.{name}"] = asdict(metric)
+        finally:
+            await shutdown_llm_client()
+            await shutdown_memory()
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "config": asdict(config),
+        },
+        "metrics": results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[Dict]:
+    """Per-metric change against ``baseline``; ``regression`` when worse by more than ``threshold``"""
+    rows = []
+    for name, metric in current["metrics"].items():
+        base = baseline["metrics"].get(name)
+        if base is None or not base["value"]:
+            continue
+        change = (metric["value"] - base["value"]) / base["value"]
+        worse = -change if metric["higher_is_better"] else change
+        rows.append({
+            "name": name,
+            "baseline": base["value"],
+            "current": metric["value"],
+            "unit": metric["unit"],
+            "change": change,
+            "regression": worse > threshold,
+        })
+    return rows
+
+
+def _report(results: Dict, rows: List[Dict] = None):
+    if rows is None:
+        for name, metric in results["metrics"].items():
+            print(f"{name:<36} {metric['value']:12.2f} {metric['unit']}")
+        return
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        print(
+            f"{row['name']:<36} {row['baseline']:12.2f} -> {row['current']:12.2f} {row['unit']:<16} "
+            f"{row['change'] * 100:+7.1f}%{flag}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown before a metric regresses")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS))
+    parser.add_argument("--quick", action="store_true", help="smaller sizes, for CI")
+    parser.add_argument("--latency", type=float, default=0.0, help="stub LLM latency in seconds")
+    args = parser.parse_args()
+
+    config = SuiteConfig.quick() if args.quick else SuiteConfig()
+    config.latency = args.latency
+    results = asyncio.run(run_suite(config, args.only))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            rows = compare(results, json.load(f), args.threshold)
+        _report(results, rows)
+        regressions = [row["name"] for row in rows if row["regression"]]
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}: {', '.join(regressions)}", file=sys.stderr)
+            sys.exit(1)
+    else:
+        _report(results)
@@ -1,5 +1,7 @@
 import asyncio
 from agents.support_agent import support_agent
+from agents.llm_client import startup_llm_client, shutdown_llm_client
+from agents.memory import shutdown_memory
 
 import uuid
 
@@ -7,16 +9,21 @@ import uuid
 async def main():
     session_id = str(uuid.uuid4())  # Unique conversation ID
     print(f"Starting session {session_id[:8]}...")
-    
-    while True:
-        query = input("\nYou: ")
-        if query.lower() in ("exit", "quit"):
-            break
-            
-        response = await support_agent(query, session_id)
-        print(f"\nAgent: {response.response}")
-        print(f"Confidence: {response.confidence:.0%}")
-        print(f"Action: {response.action.upper()}")
+    await startup_llm_client()
+
+    try:
+        while True:
+            query = input("\nYou: ")
+            if query.lower() in ("exit", "quit"):
+                break
+
+            response = await support_agent(query, session_id)
+            print(f"\nAgent: {response.response}")
+            print(f"Confidence: {response.confidence:.0%}")
+            print(f"Action: {response.action.upper()}")
+    finally:
+        await shutdown_llm_client()
+        await shutdown_memory()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -4,12 +4,26 @@ import os
 from pathlib import Path
 from agents.persona_manager import PersonaManager
 from agents.general_agent import GeneralAgent
+from agents.schemas import AgentResponse
+from agents.llm_client import shutdown_llm_client
+from agents.memory import shutdown_memory
 
 def list_scenarios():
     """List available scenario files"""
     scenario_dir = Path("scenarios")
     return [f.stem for f in scenario_dir.glob("*.yaml")]
 
+async def stream_reply(agent: GeneralAgent, message, sender_role: str) -> AgentResponse:
+    """Print tokens as they arrive and return the final AgentResponse"""
+    response = None
+    async for chunk in agent.execute_stream(message, sender_role=sender_role):
+        if isinstance(chunk, AgentResponse):
+            response = chunk
+        else:
+            print(chunk, end="", flush=True)
+    print()
+    return response
+
 async def main():
     persona_manager = PersonaManager()
     
@@ -41,8 +55,8 @@ async def main():
     selection2 = int(input("Select second persona (number): ")) - 1
     
     # Initialize agents
-    agent1 = GeneralAgent(persona_manager)
-    agent2 = GeneralAgent(persona_manager)
+    agent1 = GeneralAgent(persona_manager, priority="interactive")
+    agent2 = GeneralAgent(persona_manager, priority="interactive")
     
     await asyncio.gather(
         agent1.assign_role(scenario_name, personas[selection1]),
@@ -55,11 +69,10 @@ async def main():
     
     while True:
         # Agent 2 responds
-        response = await agent2.execute(message, sender_role=personas[selection1])
-        # Format response with persona-specific metadata
-        print(f"\n{personas[selection2].upper()} (Confidence: {response.confidence:.0%})")
+        print(f"\n{personas[selection2].upper()}")
         print("=" * (len(personas[selection2]) + 20))
-        print(response.response)
+        response = await stream_reply(agent2, message, sender_role=personas[selection1])
+        print(f"(Confidence: {response.confidence:.0%})")
         
         # Display persona-specific metadata if available
         if hasattr(response, 'duty_rating') and response.duty_rating:
@@ -75,10 +88,17 @@ async def main():
             break
             
         # Agent 1 responds
-        message = await agent1.execute(response.response, sender_role=personas[selection2])
-        print(f"\n{personas[selection1].upper()} (Confidence: {message.confidence:.0%})")
+        print(f"\n{personas[selection1].upper()}")
         print("=" * (len(personas[selection1]) + 20))
-        print(message.response)
+        message = await stream_reply(agent1, response.response, sender_role=personas[selection2])
+        print(f"(Confidence: {message.confidence:.0%})")
+
+async def run():
+    try:
+        await main()
+    finally:
+        await shutdown_llm_client()
+        await shutdown_memory()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(run())
\ No newline at end of file
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Run a conversation between any number of a scenario's personas
+
+    python roundtable.py philosophical_roundtable "What is justice?" --policy parallel --rounds 3
+    python roundtable.py political_debate "Should voting be compulsory?" --policy moderator --moderator <persona>
+"""
+
+import argparse
+import asyncio
+import uuid
+from agents.general_agent import GeneralAgent
+from agents.llm_client import shutdown_llm_client
+from agents.memory import shutdown_memory
+from agents.persona_manager import PersonaManager
+from agents.scheduler import POLICIES, ConversationScheduler
+
+
+async def main(args):
+    persona_manager = PersonaManager(args.scenarios)
+    scenario = persona_manager.load_scenario(args.scenario)
+    names = args.personas or [name for name in scenario.personas if name != args.moderator]
+    session_id = str(uuid.uuid4())
+
+    async def agent(persona: str) -> GeneralAgent:
+        agent = GeneralAgent(persona_manager, conversation_id=session_id, agent_id=persona, priority="interactive")
+        await agent.assign_role(args.scenario, persona)
+        return agent
+
+    agents = await asyncio.gather(*(agent(name) for name in names))
+    moderator = await agent(args.moderator) if args.moderator else None
+    scheduler = ConversationScheduler(agents, policy=args.policy, moderator=moderator)
+
+    print(f"\n{args.policy.replace('_', ' ').title()}: {', '.join(names)}")
+    scheduler.transcript.append("user", "user", args.opening_message)
+    for round_number in range(1, args.rounds + 1):
+        added = await scheduler.run_round()
+        print(f"\n--- Round {round_number} ---")
+        for entry in added:
+            print(f"\n{entry.persona.upper()}: {entry.text}")
+            print(f"(Confidence: {entry.response.confidence:.0%} | Emotion: {entry.response.emotion})")
+        if not added:
+            break
+
+
+async def run(args):
+    try:
+        await main(args)
+    finally:
+        await shutdown_llm_client()
+        await shutdown_memory()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scenario")
+    parser.add_argument("opening_message")
+    parser.add_argument("--personas", nargs="+", help="participants (default: every persona but the moderator)")
+    parser.add_argument("--policy", choices=POLICIES, default="round_robin")
+    parser.add_argument("--moderator", help="persona that moderates (needed for --policy moderator)")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--scenarios", default="scenarios")
+    args = parser.parse_args()
+    if args.policy == "moderator" and not args.moderator:
+        parser.error("--policy moderator needs --moderator")
+    asyncio.run(run(args))
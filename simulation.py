@@ -4,34 +4,53 @@ from typing import Optional
 from pathlib import Path
 import uuid
 from agents.general_agent import GeneralAgent
+from agents.persona_manager import PersonaManager
+from agents.schemas import AgentResponse
+from agents.llm_client import get_llm_client, shutdown_llm_client
+from agents.memory import AgentMemory, shutdown_memory
 
 class ConversationCLI:
-    def __init__(self, persona_dir: str = "personas"):
+    def __init__(self, persona_dir: str = "personas", scenario_dir: str = "scenarios", pipeline: bool = False):
         self.persona_dir = Path(persona_dir)
+        self.persona_manager = PersonaManager(scenario_dir)
         self.session_id = str(uuid.uuid4())
         self.agent1: Optional[GeneralAgent] = None
         self.agent2: Optional[GeneralAgent] = None
         self.max_turns = 20  # Maximum conversation exchanges
         self.termination_confidence = 0.9  # Confidence threshold for closure
+        # Prepare each speaker's next turn while the other one is talking,
+        # and persist messages in the background
+        self.pipeline = pipeline
+    
+    def _memory(self, agent_id: str) -> Optional[AgentMemory]:
+        if not self.pipeline:
+            return None  # the agent's default
+        return AgentMemory(session_id=f"{self.session_id}_{agent_id}", write_behind=True)
     
     async def initialize_agents(self, scenario: str, role1: str, role2: str):
         """Initialize both agents with their roles"""
         # Initialize agents with default memory
         self.agent1 = GeneralAgent(
-            persona_dir=self.persona_dir,
+            self.persona_manager,
             conversation_id=self.session_id,
-            agent_id=f"agent1_{role1}"
+            agent_id=f"agent1_{role1}",
+            memory=self._memory(f"agent1_{role1}")
         )
         self.agent2 = GeneralAgent(
-            persona_dir=self.persona_dir,
+            self.persona_manager,
             conversation_id=self.session_id,
-            agent_id=f"agent2_{role2}"
+            agent_id=f"agent2_{role2}",
+            memory=self._memory(f"agent2_{role2}")
         )
         
         await asyncio.gather(
             self.agent1.assign_role(scenario, role1),
-            self.agent2.assign_role(scenario, role2)
+            self.agent2.assign_role(scenario, role2),
+            # Open the connections both agents will use before the first turn
+            *([get_llm_client().warm_up(2)] if self.pipeline else [])
         )
+        if self.pipeline:
+            self.agent1.prefetch()
         
         print(f"\n🚀 New session started (ID: {self.session_id[:8]})")
         print(f"Scenario: {scenario.replace('_', ' ').title()}")
@@ -42,21 +61,28 @@ class ConversationCLI:
         current_message = first_message
         current_speaker = self.agent1
         other_speaker = self.agent2
+        turn_count = 0
         
         while True:
-            # Get response
-            response = await current_speaker.execute(
+            if self.pipeline:
+                # The other agent's history and rate-limit slot don't depend
+                # on this reply, so fetch them while it is generated
+                other_speaker.prefetch()
+
+            # Stream the response as it is generated
+            speaker = current_speaker.current_persona['role_type']
+            self._print_header(speaker)
+            response = None
+            async for chunk in current_speaker.execute_stream(
                 current_message,
-                sender_role=other_speaker.current_role.role_type
-            )
-            
-            # Display response
-            self._print_response(
-                speaker=current_speaker.current_role.role_type,
-                response=response.response,
-                confidence=response.confidence,
-                emotion=response.emotion
-            )
+                sender_role=other_speaker.current_persona['role_type']
+            ):
+                if isinstance(chunk, AgentResponse):
+                    response = chunk
+                else:
+                    print(chunk, end="", flush=True)
+            print()
+            self._print_footer(response.confidence, response.emotion)
             
             # Switch speakers
             current_message = response.response
@@ -67,23 +93,26 @@ class ConversationCLI:
             if (self._should_exit(current_message) or
                 turn_count >= self.max_turns or
                 response.confidence >= self.termination_confidence):
+                for agent in (self.agent1, self.agent2):
+                    agent.cancel_prefetch()
                 print(f"\n💬 Conversation ended after {turn_count} turns")
                 if response.confidence >= self.termination_confidence:
                     print("✅ Natural conclusion reached")
                 break
     
-    def _print_response(self, speaker: str, response: str, confidence: float, emotion: str):
-        """Format and print agent responses"""
+    def _print_header(self, speaker: str):
+        print(f"\n{speaker.upper()}")
+        print(f"{'=' * (len(speaker)+2)}")
+    
+    def _print_footer(self, confidence: float, emotion: str):
+        """Print the metadata only known once the response is complete"""
         emotion_icons = {
             "happy": "😊",
             "angry": "😠",
             "frustrated": "😤",
             "neutral": "😐"
         }
-        print(f"\n{speaker.upper()} {emotion_icons.get(emotion, '')}")
-        print(f"{'=' * (len(speaker)+2)}")
-        print(response)
-        print(f"\n(Confidence: {confidence:.0%} | Emotion: {emotion})")
+        print(f"\n(Confidence: {confidence:.0%} | Emotion: {emotion} {emotion_icons.get(emotion, '')})")
     
     def _should_exit(self, message: str) -> bool:
         """Check for exit commands in user input"""
@@ -103,10 +132,19 @@ class ConversationCLI:
         await self.initialize_agents(scenario, role1, role2)
         
         # Start conversation
-        await self.start_conversation(starter_msg)
+        try:
+            await self.start_conversation(starter_msg)
+        finally:
+            await shutdown_llm_client()
+            await shutdown_memory()
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Interactive two-agent conversation")
+    parser.add_argument("--pipeline", action="store_true", help="prepare each turn while the other agent speaks")
+    args = parser.parse_args()
     try:
-        asyncio.run(ConversationCLI().run())
+        asyncio.run(ConversationCLI(pipeline=args.pipeline).run())
     except KeyboardInterrupt:
         print("\n🛑 Session terminated by user")
\ No newline at end of file
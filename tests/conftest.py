@@ -0,0 +1,26 @@
+import pytest
+import pytest_asyncio
+from agents.llm_client import LLMClientConfig, startup_llm_client, shutdown_llm_client
+from agents.memory import shutdown_memory
+from agents.persona_manager import PersonaManager
+from utils.llm_stub import StubLLMServer
+
+
+@pytest_asyncio.fixture
+async def stub_llm():
+    """Local stub LLM wired into the shared client"""
+    async with StubLLMServer() as server:
+        await startup_llm_client(LLMClientConfig(base_url=server.url, api_key="test"))
+        yield server
+        await shutdown_llm_client()
+
+
+@pytest_asyncio.fixture
+async def memory_db(tmp_path):
+    yield str(tmp_path / "agent_memory.db")
+    await shutdown_memory()
+
+
+@pytest.fixture
+def persona_manager():
+    return PersonaManager("scenarios")
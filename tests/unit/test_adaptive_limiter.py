@@ -0,0 +1,86 @@
+import asyncio
+import time
+import pytest
+from agents.llm_client import LLMClient, LLMClientConfig
+from utils.llm_stub import StubLLMServer
+from utils.rate_limiter import RateLimitConfig, TokenBucketLimiter, parse_duration
+
+
+def test_parse_duration():
+    assert parse_duration("2") == 2.0
+    assert parse_duration("0.25") == 0.25
+    assert parse_duration("250ms") == 0.25
+    assert parse_duration("1m30s") == 90.0
+    assert parse_duration("soon") is None
+    assert parse_duration(None) is None
+
+
+@pytest.mark.asyncio
+async def test_retry_after_is_honoured():
+    limiter = TokenBucketLimiter(RateLimitConfig(max_calls=100, period=1.0))
+    async with StubLLMServer() as server:
+        server.inject_errors.extend([429])
+        server.retry_after = 0.3
+        async with LLMClient(LLMClientConfig(base_url=server.url, api_key="test")) as client:
+            start = time.monotonic()
+            reply = await client.chat_completion("hi", limiter=limiter)
+            elapsed = time.monotonic() - start
+
+    assert reply == server.reply
+    assert server.requests == 2
+    assert limiter.throttled == 1
+    assert 0.3 <= elapsed < 0.5
+
+
+@pytest.mark.asyncio
+async def test_injected_503_is_retried_then_raised():
+    import httpx
+
+    async with StubLLMServer() as server:
+        server.inject_errors.extend([503] * 3)
+        server.retry_after = 0
+        config = LLMClientConfig(base_url=server.url, api_key="test", throttle_retries=2)
+        async with LLMClient(config) as client:
+            with pytest.raises(httpx.HTTPStatusError):
+                await client.chat_completion("hi")
+    assert server.requests == 3
+
+
+async def _burst_against_quota(limiter, quota_headers: bool):
+    async with StubLLMServer(rate_limit=20) as server:
+        server.quota_headers = quota_headers
+        async with LLMClient(LLMClientConfig(base_url=server.url, api_key="test")) as client:
+            replies = await asyncio.gather(*(client.chat_completion("hi", limiter=limiter) for _ in range(30)))
+    assert len(replies) == 30
+    return server
+
+
+@pytest.mark.asyncio
+async def test_adaptive_rate_backs_off_on_429():
+    config = RateLimitConfig(max_calls=100, period=1.0, burst=1, adaptive=True, increase=0.2)
+    limiter = TokenBucketLimiter(config)
+
+    server = await _burst_against_quota(limiter, quota_headers=False)
+
+    assert limiter.throttled > 0
+    assert limiter.effective_rate < 100
+    # A fixed 100/s limiter would have most of the 30 calls rejected at least once
+    assert server.throttled < 10
+
+
+@pytest.mark.asyncio
+async def test_exhausted_quota_header_pauses_before_429():
+    limiter = TokenBucketLimiter(RateLimitConfig(max_calls=100, period=1.0, burst=1))
+
+    server = await _burst_against_quota(limiter, quota_headers=True)
+
+    assert server.throttled == 0
+
+
+def test_rate_recovers_additively_up_to_max():
+    limiter = TokenBucketLimiter(RateLimitConfig(max_calls=10, period=1.0, adaptive=True, increase=1.0, max_rate=12))
+    limiter.observe(429, {"Retry-After": "0"})
+    assert limiter.effective_rate == pytest.approx(5.0)
+    for _ in range(10):
+        limiter.observe(200, {})
+    assert limiter.effective_rate == pytest.approx(12.0)
@@ -0,0 +1,125 @@
+import asyncio
+import json
+import sqlite3
+import pytest
+from agents.memory import AgentMemory, shutdown_memory
+from agents.merge import merge_databases
+from batch_runner import BatchConfig, BatchRunner, SimulationJob, completed_jobs, load_manifest, run_sharded
+from utils.llm_stub import serve_in_thread
+
+
+def _jobs(count, max_turns=2):
+    return [
+        SimulationJob(str(i), "customer_support", ("angry_customer", "support_agent"), "Where is my package?", max_turns)
+        for i in range(count)
+    ]
+
+
+def test_manifest_ids_default_to_line_number(tmp_path):
+    manifest = tmp_path / "jobs.jsonl"
+    manifest.write_text(
+        '{"scenario": "customer_support", "personas": ["angry_customer", "support_agent"], "opening_message": "Hi"}\n'
+        '{"id": "named", "scenario": "customer_support", "personas": ["a", "b"], "opening_message": "Yo", "max_turns": 3}\n'
+    )
+    first, second = load_manifest(str(manifest))
+    assert (first.id, first.max_turns) == ("0", 20)
+    assert (second.id, second.personas, second.max_turns) == ("named", ("a", "b"), 3)
+
+
+@pytest.mark.asyncio
+async def test_runs_jobs_concurrently_and_writes_results(stub_llm, memory_db, persona_manager, tmp_path):
+    out = str(tmp_path / "results.jsonl")
+    runner = BatchRunner(persona_manager, BatchConfig(concurrency=4, db_path=memory_db))
+
+    summary = await runner.run(_jobs(6), out)
+
+    results = [json.loads(line) for line in open(out)]
+    assert summary == {"skipped": 0, "ran": 6, "failed": 0}
+    assert sorted(r["id"] for r in results) == [str(i) for i in range(6)]
+    assert all(r["status"] == "ok" and r["turns"] == 2 and r["ended_by"] == "max_turns" for r in results)
+    assert stub_llm.requests == 12
+
+
+@pytest.mark.asyncio
+async def test_resume_skips_finished_jobs(stub_llm, memory_db, persona_manager, tmp_path):
+    out = tmp_path / "results.jsonl"
+    out.write_text(
+        json.dumps({"id": "0", "status": "ok"}) + "\n"
+        + json.dumps({"id": "1", "status": "error"}) + "\n"
+        + '{"id": "2", "sta'  # torn line from an interrupted run
+    )
+    assert completed_jobs(str(out)) == {"0", "1"}
+    assert completed_jobs(str(out), retry_failed=True) == {"0"}
+
+    runner = BatchRunner(persona_manager, BatchConfig(db_path=memory_db, retry_failed=True))
+    summary = await runner.run(_jobs(4, max_turns=1), str(out))
+
+    assert summary == {"skipped": 1, "ran": 3, "failed": 0}
+    assert stub_llm.requests == 3
+    assert completed_jobs(str(out)) == {"0", "1", "2", "3"}
+    # The torn line stays on its own and new results start on fresh lines
+    assert sorted(json.loads(line)["id"] for line in out.read_text().splitlines()[3:]) == ["1", "2", "3"]
+
+
+@pytest.mark.asyncio
+async def test_failed_job_is_recorded(stub_llm, memory_db, persona_manager, tmp_path):
+    out = str(tmp_path / "results.jsonl")
+    job = SimulationJob("bad", "customer_support", ("nobody", "support_agent"), "Hi", 1)
+
+    summary = await BatchRunner(persona_manager, BatchConfig(db_path=memory_db)).run([job], out)
+
+    [result] = [json.loads(line) for line in open(out)]
+    assert summary["failed"] == 1
+    assert result["status"] == "error" and "KeyError" in result["error"]
+
+
+@pytest.mark.asyncio
+async def test_rerun_starts_from_empty_memory(stub_llm, memory_db, persona_manager, tmp_path):
+    # What an interrupted first attempt of job 0 left in its sessions
+    stale = AgentMemory("batch_0_agent1_angry_customer", db_path=memory_db)
+    for i in range(3):
+        await stale.add_message("user", f"stale {i}")
+
+    runner = BatchRunner(persona_manager, BatchConfig(db_path=memory_db))
+    await runner.run(_jobs(1, max_turns=1), str(tmp_path / "results.jsonl"))
+
+    messages = await stale.get_messages(limit=100)
+    assert [m["seq"] for m in messages] == [0, 1]
+    assert not any(m["content"].startswith("stale") for m in messages)
+
+
+def test_sharded_run_merges_worker_databases(tmp_path, monkeypatch):
+    out = str(tmp_path / "results.jsonl")
+    db_path = str(tmp_path / "agent_memory.db")
+    with serve_in_thread() as server:
+        monkeypatch.setenv("DEEPSEEK_API_BASE", server.url)
+        monkeypatch.setenv("DEEPSEEK_API_KEY", "test")
+        monkeypatch.setenv("DEEPSEEK_RATE_LIMIT", "1000")
+        summary = run_sharded(_jobs(6), out, workers=2, config=BatchConfig(db_path=db_path))
+
+    assert summary == {"skipped": 0, "ran": 6, "failed": 0}
+    assert completed_jobs(out) == {str(i) for i in range(6)}
+    assert server.requests == 12
+    # Worker files were folded into the main database and removed
+    assert sorted(p.name for p in tmp_path.iterdir() if ".worker" in p.name) == []
+    with sqlite3.connect(db_path) as conn:
+        sessions = conn.execute("SELECT COUNT(*) FROM conversations").fetchone()[0]
+        messages = conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+    assert sessions == 12  # two agents per job
+    assert messages > 0
+
+
+def test_merge_replaces_sessions_present_in_both(tmp_path):
+    target, source = str(tmp_path / "main.db"), str(tmp_path / "worker0.db")
+
+    async def write(path, content):
+        memory = AgentMemory("batch_0_agent1", db_path=path)
+        await memory.add_message("user", content)
+        await shutdown_memory()
+
+    asyncio.run(write(target, "stale"))
+    asyncio.run(write(source, "fresh"))
+
+    assert merge_databases(target, [source, str(tmp_path / "missing.db")]) == {source: 1}
+    with sqlite3.connect(target) as conn:
+        assert conn.execute("SELECT content FROM messages").fetchall() == [("fresh",)]
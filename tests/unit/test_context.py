@@ -0,0 +1,58 @@
+import pytest
+from agents.context import ContextBuilder, OMITTED_MARKER, estimate_tokens
+from agents.memory import AgentMemory
+
+
+class CountingBuilder(ContextBuilder):
+    rendered = 0
+
+    def render_message(self, message):
+        self.rendered += 1
+        return super().render_message(message)
+
+
+@pytest.mark.asyncio
+async def test_history_fits_budget_and_keeps_recent_turns(memory_db):
+    memory = AgentMemory("budget", db_path=memory_db)
+    for i in range(60):
+        await memory.add_message("user" if i % 2 else "agent", f"turn {i} " + "words " * 20)
+
+    builder = ContextBuilder(memory, max_tokens=400, keep_recent=3)
+    context = await builder.build()
+
+    assert estimate_tokens(context) <= 400
+    assert context.startswith(OMITTED_MARKER)
+    lines = context.splitlines()
+    assert lines[-1].startswith("user: turn 59")
+    assert lines[-3].startswith("user: turn 57")
+    assert "turn 0 " not in context
+
+
+@pytest.mark.asyncio
+async def test_only_new_messages_are_rendered(memory_db):
+    memory = AgentMemory("delta", db_path=memory_db)
+    builder = CountingBuilder(memory, max_tokens=10_000)
+    for i in range(5):
+        await memory.add_message("user", f"message {i}")
+    first = await builder.build()
+
+    await memory.add_message("agent", "reply")
+    second = await builder.build()
+
+    assert builder.rendered == 6
+    assert second == first + "\nagent: reply"
+
+
+@pytest.mark.asyncio
+async def test_older_messages_clipped_recent_verbatim(memory_db):
+    memory = AgentMemory("clip", db_path=memory_db)
+    long_text = "x" * 2000
+    await memory.add_message("user", long_text)
+    await memory.add_message("agent", "short")
+
+    builder = ContextBuilder(memory, max_tokens=10_000, keep_recent=1, max_message_tokens=50)
+    context = await builder.build()
+
+    assert long_text not in context
+    assert context.splitlines()[0].endswith(" ...")
+    assert context.splitlines()[-1] == "agent: short"
@@ -0,0 +1,30 @@
+import pytest
+from agents.db import _databases, dispose_engines
+from agents.memory import AgentMemory
+
+
+@pytest.mark.asyncio
+async def test_memories_share_one_engine(memory_db):
+    first = AgentMemory("a", db_path=memory_db)
+    second = AgentMemory("b", db_path=memory_db)
+    await first.add_message("user", "hi")
+    await second.add_message("user", "hello")
+
+    assert first.engine is second.engine
+    assert first.async_session is second.async_session
+
+
+@pytest.mark.asyncio
+async def test_sqlite_pragmas_applied(memory_db):
+    memory = AgentMemory("pragmas", db_path=memory_db)
+    async with memory.engine.connect() as conn:
+        assert (await conn.exec_driver_sql("PRAGMA journal_mode")).scalar() == "wal"
+        assert (await conn.exec_driver_sql("PRAGMA synchronous")).scalar() == 1  # NORMAL
+
+
+@pytest.mark.asyncio
+async def test_dispose_engines_clears_registry(memory_db):
+    memory = AgentMemory("dispose", db_path=memory_db)
+    await memory.add_message("user", "hi")
+    await dispose_engines()
+    assert not _databases
@@ -0,0 +1,124 @@
+import asyncio
+import sqlite3
+import time
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import event
+from agents.memory import AgentMemory, shutdown_memory
+
+
+def _seed_sessions(db_path: str, count: int):
+    start = datetime(2024, 1, 1)
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany(
+            "INSERT INTO conversations (session_id, history, last_updated, size_kb, message_count, size_bytes) "
+            "VALUES (?, '[]', ?, '0.00', 1, 10)",
+            [(f"old{i}", start + timedelta(seconds=i)) for i in range(count)]
+        )
+        conn.executemany(
+            "INSERT INTO messages (session_id, seq, role, content) VALUES (?, 0, 'user', '0123456789')",
+            [(f"old{i}",) for i in range(count)]
+        )
+
+
+@pytest.mark.asyncio
+async def test_evicts_oldest_down_to_low_water_mark(memory_db):
+    memory = AgentMemory("newest", db_path=memory_db, max_sessions=20, prune_every=1, low_water_ratio=0.5)
+    await memory.initialize_db()
+    _seed_sessions(memory_db, 20)
+
+    await memory.add_message("user", "hi")
+
+    with sqlite3.connect(memory_db) as conn:
+        remaining = [row[0] for row in conn.execute("SELECT session_id FROM conversations ORDER BY last_updated")]
+        orphans = conn.execute(
+            "SELECT COUNT(*) FROM messages WHERE session_id NOT IN (SELECT session_id FROM conversations)"
+        ).fetchone()[0]
+        stats = conn.execute("SELECT sessions, bytes FROM storage_stats").fetchone()
+        actual = conn.execute("SELECT COUNT(*), SUM(size_bytes) FROM conversations").fetchone()
+
+    assert len(remaining) == 10
+    assert remaining[-1] == "newest"
+    assert remaining[0] == "old11"
+    assert orphans == 0
+    assert stats == actual
+
+
+@pytest.mark.asyncio
+async def test_evicts_by_stored_bytes(memory_db):
+    max_mb = 100 / 1024 / 1024  # 100 bytes
+    memory = AgentMemory("big", db_path=memory_db, max_storage_mb=max_mb, prune_every=1)
+    await memory.initialize_db()
+    _seed_sessions(memory_db, 10)
+
+    await memory.add_message("user", "x" * 50)
+
+    with sqlite3.connect(memory_db) as conn:
+        stored = conn.execute("SELECT SUM(size_bytes) FROM conversations").fetchone()[0]
+    assert stored <= 90
+
+
+async def _statements_per_write(db_path: str, sessions: int):
+    # At the session limit with every write checked, the probe's new
+    # session pushes the total over and the write evicts the oldest one
+    memory = AgentMemory("probe", db_path=db_path, max_sessions=sessions, prune_every=1, low_water_ratio=1.0)
+    await memory.initialize_db()
+    _seed_sessions(db_path, sessions)
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(memory.engine.sync_engine, "before_cursor_execute", record)
+    await memory.add_message("user", "hello")
+    event.remove(memory.engine.sync_engine, "before_cursor_execute", record)
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM conversations WHERE session_id = 'old0'").fetchone()[0] == 0
+        assert conn.execute("SELECT COUNT(*) FROM conversations").fetchone()[0] == sessions
+    return statements
+
+
+@pytest.mark.asyncio
+async def test_pruning_cost_flat_as_sessions_grow(tmp_path):
+    small = await _statements_per_write(str(tmp_path / "small.db"), 10)
+    large = await _statements_per_write(str(tmp_path / "large.db"), 5000)
+    await shutdown_memory()
+
+    assert len(small) == len(large)
+    assert any(statement.startswith("DELETE FROM conversations") for statement in large)
+    assert not any("count(" in statement.lower() for statement in large)
+
+
+def test_eviction_candidates_use_last_updated_index(memory_db):
+    async def init():
+        await AgentMemory("plan", db_path=memory_db).initialize_db()
+        await shutdown_memory()
+
+    asyncio.run(init())
+    with sqlite3.connect(memory_db) as conn:
+        plan = " ".join(str(row) for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT session_id, size_bytes FROM conversations ORDER BY last_updated LIMIT 500"
+        ))
+    assert "ix_conversations_last_updated" in plan
+
+
+@pytest.mark.asyncio
+async def test_background_eviction_off_the_write_path(memory_db):
+    memory = AgentMemory("bg", db_path=memory_db, max_sessions=5, prune_interval=0.05, low_water_ratio=1.0)
+    await memory.initialize_db()
+    _seed_sessions(memory_db, 10)
+
+    await memory.add_message("user", "hi")
+    with sqlite3.connect(memory_db) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM conversations").fetchone()[0] == 11
+
+    # The background task runs on its own schedule; wait for it rather
+    # than for a fixed time
+    deadline = time.monotonic() + 5
+    while True:
+        with sqlite3.connect(memory_db) as conn:
+            remaining = conn.execute("SELECT COUNT(*) FROM conversations").fetchone()[0]
+        if remaining == 5 or time.monotonic() > deadline:
+            break
+        await asyncio.sleep(0.01)
+    assert remaining == 5
@@ -0,0 +1,123 @@
+import asyncio
+import sqlite3
+import pytest
+from sqlalchemy import event
+from agents.general_agent import GeneralAgent
+from agents.llm_cache import CacheConfig, CompletionCache, cache_key
+from agents.memory import AgentMemory
+
+
+def test_key_ignores_indentation_but_not_params():
+    assert cache_key("m", "  [ROLE] a\n    [INPUT] b  ", {}) == cache_key("m", "[ROLE] a\n[INPUT] b", {})
+    assert cache_key("m", "hi", {"temperature": 0}) != cache_key("m", "hi", {"temperature": 0.5})
+    assert cache_key("m", "hi", {}) != cache_key("other", "hi", {})
+
+
+@pytest.mark.asyncio
+async def test_lru_bounded_by_entries_and_bytes():
+    cache = CompletionCache(CacheConfig(max_entries=3, max_bytes=10))
+    await cache.set("a", "aaaa")
+    await cache.set("b", "bbbb")
+    await cache.get("a")            # a is now most recent
+    await cache.set("c", "cccc")    # 12 bytes > 10: evicts b
+
+    assert await cache.get("b") is None
+    assert await cache.get("a") == "aaaa"
+    assert cache.stats.bytes == 8
+    assert cache.stats.evictions == 1
+
+
+@pytest.mark.asyncio
+async def test_entries_expire():
+    cache = CompletionCache(CacheConfig(ttl=0.01))
+    await cache.set("k", "v")
+    await asyncio.sleep(0.02)
+    assert await cache.get("k") is None
+
+
+@pytest.mark.asyncio
+async def test_sampled_requests_bypass_unless_forced():
+    cache = CompletionCache()
+    calls = []
+
+    async def call():
+        calls.append(1)
+        return "text"
+
+    for _ in range(2):
+        await cache.get_or_call("m", "p", {"temperature": 0.7}, call)
+    for _ in range(2):
+        await cache.get_or_call("m", "p", {"temperature": 0.7}, call, force=True)
+    for _ in range(2):
+        await cache.get_or_call("m", "p", {"temperature": 0}, call)
+
+    assert len(calls) == 4
+    assert cache.stats.bypassed == 2
+    assert cache.stats.hits == 2
+
+
+@pytest.mark.asyncio
+async def test_disk_tier_survives_new_cache(memory_db):
+    await CompletionCache(CacheConfig(db_path=memory_db)).set("k", "stored")
+
+    cache = CompletionCache(CacheConfig(db_path=memory_db))
+    assert await cache.get("k") == "stored"
+    assert cache.stats.disk_hits == 1
+    assert await cache.get("k") == "stored"
+    assert cache.stats.disk_hits == 1
+
+
+@pytest.mark.asyncio
+async def test_sizes_are_utf8_bytes():
+    cache = CompletionCache(CacheConfig(max_bytes=10))
+    await cache.set("a", "éééé")   # 4 characters, 8 bytes
+    await cache.set("b", "xyz")    # 11 bytes > 10: evicts a
+
+    assert await cache.get("a") is None
+    assert cache.stats.bytes == 3
+
+
+@pytest.mark.asyncio
+async def test_disk_tier_bounded_by_running_totals(memory_db):
+    cache = CompletionCache(CacheConfig(db_path=memory_db, max_disk_entries=3))
+    await cache.set("warm", "up")
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement.lower())
+
+    event.listen(cache.database.engine.sync_engine, "before_cursor_execute", record)
+    for i in range(5):
+        await cache.set(f"k{i}", "é" * 10)
+    event.remove(cache.database.engine.sync_engine, "before_cursor_execute", record)
+
+    assert not any("count(" in statement for statement in statements)
+    with sqlite3.connect(memory_db) as conn:
+        assert [row[0] for row in conn.execute("SELECT key FROM llm_cache ORDER BY created")] == ["k2", "k3", "k4"]
+        assert conn.execute("SELECT entries, bytes FROM llm_cache_stats").fetchone() == (3, 60)
+
+
+@pytest.mark.asyncio
+async def test_disk_eviction_purges_expired_rows_first(memory_db):
+    expired = CompletionCache(CacheConfig(db_path=memory_db, ttl=-1))
+    for i in range(3):
+        await expired.set(f"old{i}", "stale")
+
+    await CompletionCache(CacheConfig(db_path=memory_db, max_disk_entries=2)).set("new", "fresh")
+
+    with sqlite3.connect(memory_db) as conn:
+        assert conn.execute("SELECT key FROM llm_cache").fetchall() == [("new",)]
+
+
+@pytest.mark.asyncio
+async def test_agents_share_cached_completion(stub_llm, memory_db, persona_manager):
+    cache = CompletionCache()
+    for name in ("first", "second"):
+        agent = GeneralAgent(persona_manager, cache=cache, llm_params={"temperature": 0})
+        agent.memory = AgentMemory(name, db_path=memory_db)
+        await agent.assign_role("customer_support", "support_agent")
+        response = await agent.execute("Where is my package?")
+        assert response.response == stub_llm.reply
+
+    assert stub_llm.requests == 1
+    assert cache.stats.hits == 1
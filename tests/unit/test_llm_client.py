@@ -0,0 +1,27 @@
+import pytest
+from agents.llm_client import LLMClient, LLMClientConfig
+from utils.llm_stub import StubLLMServer
+
+
+@pytest.mark.asyncio
+async def test_pooled_client_reuses_connection():
+    async with StubLLMServer(reply="pooled") as server:
+        config = LLMClientConfig(base_url=server.url, api_key="test")
+        async with LLMClient(config) as client:
+            for _ in range(5):
+                assert await client.chat_completion("hello") == "pooled"
+
+        assert server.requests == 5
+        assert server.connections == 1
+
+
+@pytest.mark.asyncio
+async def test_client_reopens_after_close():
+    async with StubLLMServer() as server:
+        client = LLMClient(LLMClientConfig(base_url=server.url, api_key="test"))
+        await client.chat_completion("first")
+        await client.aclose()
+        await client.chat_completion("second")
+        await client.aclose()
+
+        assert server.connections == 2
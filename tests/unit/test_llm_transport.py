@@ -0,0 +1,101 @@
+import asyncio
+import json
+import httpx
+import pytest
+from agents.llm_client import LLMClient, LLMClientConfig
+from agents.llm_transport import ReplayMissError, ReplayTransport
+from utils.llm_stub import StubLLMServer
+
+
+async def _record(server, path, prompts, stream=False):
+    config = LLMClientConfig(base_url=server.url, api_key="secret-key", transport=f"record:{path}")
+    async with LLMClient(config) as client:
+        for prompt in prompts:
+            if stream:
+                async for _ in client.stream_chat_completion(prompt):
+                    pass
+            else:
+                await client.chat_completion(prompt)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name", ["recording.jsonl", "recording.jsonl.gz"])
+async def test_replay_serves_recording_offline(tmp_path, name):
+    path = str(tmp_path / name)
+    async with StubLLMServer(reply="recorded answer") as server:
+        await _record(server, path, ["one", "two"])
+        await _record(server, path, ["three"], stream=True)
+    assert server.requests == 3
+
+    # The stub is gone; answers now come from the file
+    config = LLMClientConfig(base_url="http://offline.invalid/v1", api_key="other", transport=f"replay:{path}")
+    async with LLMClient(config) as client:
+        assert await client.chat_completion("two") == "recorded answer"
+        assert await client.chat_completion("one") == "recorded answer"
+        assert "".join([delta async for delta in client.stream_chat_completion("three")]) == "recorded answer"
+        with pytest.raises(ReplayMissError):
+            await client.chat_completion("never recorded")
+
+
+def test_recording_is_compact_and_has_no_api_key(tmp_path):
+    path = tmp_path / "recording.jsonl"
+
+    async def record():
+        async with StubLLMServer() as server:
+            await _record(server, str(path), ["hello"])
+
+    asyncio.run(record())
+    [line] = path.read_text().splitlines()
+    entry = json.loads(line)
+    assert "secret-key" not in line
+    assert entry["status"] == 200 and entry["path"] == "/v1/chat/completions"
+    assert set(entry["headers"]) <= {"content-type", "content-encoding", "retry-after"}
+
+
+@pytest.mark.asyncio
+async def test_identical_requests_replay_in_recorded_order(tmp_path):
+    path = str(tmp_path / "recording.jsonl")
+    async with StubLLMServer(reply="ok") as server:
+        server.inject_errors.append(503)
+        server.retry_after = 0
+        await _record(server, path, ["flaky"])
+
+    transport = ReplayTransport(path)
+    assert len(transport) == 2
+    async with httpx.AsyncClient(transport=transport, base_url="http://offline.invalid/v1") as client:
+        statuses = [
+            (await client.post("/chat/completions", json=LLMClient().build_payload("flaky"))).status_code
+            for _ in range(3)
+        ]
+    assert statuses == [503, 200, 200]  # the last answer repeats
+    assert (transport.hits, transport.misses) == (3, 0)
+
+
+@pytest.mark.asyncio
+async def test_replay_falls_back_for_unrecorded_requests(tmp_path):
+    path = tmp_path / "empty.jsonl"
+    path.write_text("")
+    async with StubLLMServer(reply="live") as server:
+        transport = ReplayTransport(str(path), fallback=httpx.AsyncHTTPTransport())
+        async with LLMClient(LLMClientConfig(base_url=server.url, api_key="test", transport=transport)) as client:
+            assert await client.chat_completion("anything") == "live"
+    assert transport.misses == 1
+
+
+@pytest.mark.asyncio
+async def test_stub_latency_and_errors_are_seeded():
+    def draws(seed):
+        server = StubLLMServer(latency=0.05, latency_dist="lognormal", jitter=0.5, error_rate=0.3, seed=seed)
+        return [server._sample_latency() for _ in range(20)], [server._throttle() for _ in range(50)]
+
+    latencies, errors = draws(7)
+    assert (latencies, errors) == draws(7)
+    assert len(set(latencies)) == 20 and min(latencies) > 0
+    failed = [status for status, _ in filter(None, errors)]
+    assert 5 < len(failed) < 30 and set(failed) <= {429, 500, 503}
+
+    async with StubLLMServer(error_rate=1.0, error_statuses=(500,)) as server:
+        client = LLMClient(LLMClientConfig(base_url=server.url, api_key="test"))
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.chat_completion("hello")
+        await client.aclose()
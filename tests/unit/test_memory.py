@@ -0,0 +1,168 @@
+import asyncio
+import json
+import sqlite3
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from agents.memory import AgentMemory, _write_behind_queues
+
+
+@pytest.mark.asyncio
+async def test_append_and_paginate(memory_db):
+    memory = AgentMemory("paging", db_path=memory_db)
+    for i in range(12):
+        await memory.add_message("user", f"message {i}")
+
+    page = await memory.get_messages(limit=5, offset=5)
+    assert [m["content"] for m in page] == [f"message {i}" for i in range(5, 10)]
+
+    with sqlite3.connect(memory_db) as conn:
+        count, size = conn.execute(
+            "SELECT message_count, size_bytes FROM conversations WHERE session_id = 'paging'"
+        ).fetchone()
+    assert count == 12
+    assert size == sum(len(f"message {i}") for i in range(12))
+
+
+@pytest.mark.asyncio
+async def test_agent_response_metadata_round_trip(memory_db):
+    from agents.schemas import AgentResponse
+
+    memory = AgentMemory("metadata", db_path=memory_db)
+    await memory.add_message("agent", AgentResponse(response="Sorry!", action="escalate"))
+
+    [message] = await memory.get_messages()
+    assert message["content"] == "Sorry!"
+    assert message["metadata"]["action"] == "escalate"
+
+
+@pytest.mark.asyncio
+async def test_migrates_legacy_history_blob(memory_db):
+    history = [
+        {"role": "user", "content": "hello", "timestamp": "2024-01-01 00:00:00"},
+        {"role": "agent", "content": "hi", "metadata": {"action": "respond"}, "timestamp": "2024-01-01 00:00:01"},
+    ]
+    with sqlite3.connect(memory_db) as conn:
+        conn.execute(
+            "CREATE TABLE conversations (session_id VARCHAR(64) PRIMARY KEY, history TEXT NOT NULL, "
+            "last_updated DATETIME NOT NULL, size_kb VARCHAR(10) NOT NULL)"
+        )
+        conn.execute(
+            "INSERT INTO conversations VALUES ('legacy', ?, '2024-01-01 00:00:01', '0.10')",
+            (json.dumps(history),)
+        )
+
+    memory = AgentMemory("legacy", db_path=memory_db)
+    await memory.add_message("user", "after migration")
+
+    messages = await memory.get_messages(limit=10)
+    assert [m["content"] for m in messages] == ["hello", "hi", "after migration"]
+    assert messages[1]["metadata"] == {"action": "respond"}
+
+
+@pytest.mark.asyncio
+async def test_write_behind_reads_unflushed_and_flushes_on_close(memory_db):
+    memory = AgentMemory("buffered", db_path=memory_db, write_behind=True, flush_interval=60)
+    for i in range(5):
+        await memory.add_message("user", f"message {i}")
+
+    # Visible before anything reached the database
+    assert [m["content"] for m in await memory.get_messages(limit=10)] == [f"message {i}" for i in range(5)]
+    with sqlite3.connect(memory_db) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0] == 0
+
+    await memory.aclose()
+    with sqlite3.connect(memory_db) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0] == 5
+        assert conn.execute("SELECT message_count FROM conversations").fetchone()[0] == 5
+
+
+@pytest.mark.asyncio
+async def test_writers_sharing_a_session_get_distinct_seqs(memory_db):
+    first = AgentMemory("shared", db_path=memory_db, write_behind=True, flush_interval=60)
+    second = AgentMemory("shared", db_path=memory_db, write_behind=True, flush_interval=60)
+    direct = AgentMemory("shared", db_path=memory_db)
+    other = AgentMemory("other", db_path=memory_db, write_behind=True, flush_interval=60)
+    await first.add_message("user", "first")
+    await second.add_message("user", "second")
+    await direct.add_message("user", "direct")
+    await other.add_message("user", "elsewhere")
+    await first.aclose()
+
+    with sqlite3.connect(memory_db) as conn:
+        rows = conn.execute("SELECT seq, content FROM messages WHERE session_id = 'shared' ORDER BY seq").fetchall()
+        assert conn.execute("SELECT content FROM messages WHERE session_id = 'other'").fetchall() == [("elsewhere",)]
+    assert rows == [(0, "direct"), (1, "first"), (2, "second")]
+
+
+@pytest.mark.asyncio
+async def test_write_behind_drops_rows_that_break_constraints(memory_db):
+    memory = AgentMemory("strict", db_path=memory_db, write_behind=True, flush_interval=60)
+    await memory.add_message("user", "kept")
+    queue = _write_behind_queues[memory_db]
+    await queue.put({"session_id": "strict", "role": None, "content": "no role", "metadata": None, "timestamp": None})
+    await memory.add_message("user", "also kept")
+    await memory.aclose()
+
+    assert queue.dropped_rows == 1
+    with sqlite3.connect(memory_db) as conn:
+        assert conn.execute("SELECT content FROM messages ORDER BY seq").fetchall() == [("kept",), ("also kept",)]
+
+
+@pytest.mark.asyncio
+async def test_reads_during_a_flush_see_each_row_once(memory_db, monkeypatch):
+    memory = AgentMemory("racing", db_path=memory_db, write_behind=True, flush_interval=60)
+    for i in range(7):
+        await memory.add_message("user", f"m{i}")
+
+    # Hold the flush after its transaction commits, before it returns
+    committed, release = asyncio.Event(), asyncio.Event()
+    close = AsyncSession.close
+
+    def mark(session):
+        session.info["committed"] = True
+
+    async def gated_close(self):
+        if self.sync_session.info.pop("committed", False):
+            committed.set()
+            await release.wait()
+        await close(self)
+
+    event.listen(Session, "after_commit", mark)
+    monkeypatch.setattr(AsyncSession, "close", gated_close)
+    try:
+        flush = asyncio.create_task(memory.flush())
+        await asyncio.wait_for(committed.wait(), 5)
+        page = await memory.get_messages(limit=100)
+        since = await memory.get_messages_since(-1, limit=-1)
+        release.set()
+        await flush
+    finally:
+        event.remove(Session, "after_commit", mark)
+
+    expected = [(i, f"m{i}") for i in range(7)]
+    assert [(m["seq"], m["content"]) for m in page] == expected
+    assert [(m["seq"], m["content"]) for m in since] == expected
+    await memory.add_message("user", "m7")
+    assert [m["seq"] for m in await memory.get_messages(limit=100)] == list(range(8))
+
+
+@pytest.mark.asyncio
+async def test_write_behind_batches_sessions_by_size(memory_db):
+    memories = [
+        AgentMemory(f"agent{i}", db_path=memory_db, write_behind=True, flush_batch_size=10, flush_interval=60)
+        for i in range(4)
+    ]
+    for turn in range(5):
+        for memory in memories:
+            await memory.add_message("user", f"turn {turn}")
+    queue = _write_behind_queues[memory_db]
+    await memories[0].flush()
+
+    assert queue.flushed_rows == 20
+    assert queue.flushes <= 3
+    resumed = AgentMemory("agent3", db_path=memory_db, write_behind=True)
+    await resumed.add_message("user", "turn 5")
+    assert [m["content"] for m in await resumed.get_messages(limit=10, offset=4)] == ["turn 4", "turn 5"]
+    await resumed.aclose()
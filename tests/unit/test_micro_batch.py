@@ -0,0 +1,110 @@
+import asyncio
+import httpx
+import pytest
+import pytest_asyncio
+from agents.general_agent import GeneralAgent
+from agents.llm_client import LLMClientConfig, shutdown_llm_client, startup_llm_client
+from agents.memory import AgentMemory
+from agents.micro_batch import MicroBatchConfig, MicroBatcher
+from utils.llm_stub import StubLLMServer
+
+
+class EchoStub(StubLLMServer):
+    def _completion_text(self, payload: dict) -> str:
+        if "prompt" in payload:
+            return f"re: {payload['prompt']}"
+        return f"re: {payload['messages'][-1]['content']}"
+
+
+@pytest_asyncio.fixture
+async def echo_llm():
+    async with EchoStub() as server:
+        await startup_llm_client(LLMClientConfig(base_url=server.url, api_key="test"))
+        yield server
+        await shutdown_llm_client()
+
+
+@pytest.mark.asyncio
+async def test_batches_fill_to_max_size(echo_llm):
+    batcher = MicroBatcher(MicroBatchConfig(window=10.0, max_batch=4))
+    replies = await asyncio.gather(*(batcher.submit(f"p{i}") for i in range(8)))
+
+    assert replies == [f"re: p{i}" for i in range(8)]
+    assert echo_llm.requests == 2
+    assert batcher.stats.full == 2
+    assert batcher.stats.mean_size == 4
+    assert batcher.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_window_flushes_partial_batch(echo_llm):
+    batcher = MicroBatcher(MicroBatchConfig(window=0.02, max_batch=32))
+    replies = await asyncio.gather(*(batcher.submit(f"p{i}") for i in range(3)))
+
+    assert replies == ["re: p0", "re: p1", "re: p2"]
+    assert echo_llm.requests == 1
+    assert batcher.stats.full == 0
+
+
+@pytest.mark.asyncio
+async def test_only_identical_params_share_a_batch(echo_llm):
+    batcher = MicroBatcher(MicroBatchConfig(window=0.01))
+    await asyncio.gather(
+        batcher.submit("a", temperature=0), batcher.submit("b", temperature=0), batcher.submit("c", temperature=1)
+    )
+    assert echo_llm.requests == 2
+    assert batcher.stats.batches == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_mode_sends_chat_requests_together(echo_llm):
+    batcher = MicroBatcher(MicroBatchConfig(window=0.01, mode="concurrent"))
+    replies = await asyncio.gather(*(batcher.submit(f"p{i}") for i in range(5)))
+
+    assert replies == [f"re: p{i}" for i in range(5)]
+    assert echo_llm.requests == 5
+    assert batcher.stats.batches == 1
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        MicroBatchConfig(mode="pipelined")
+
+
+@pytest.mark.asyncio
+async def test_batch_errors_reach_every_caller(echo_llm):
+    echo_llm.inject_errors.append(500)
+    batcher = MicroBatcher(MicroBatchConfig(window=0.01))
+    results = await asyncio.gather(*(batcher.submit(f"p{i}") for i in range(3)), return_exceptions=True)
+    assert all(isinstance(result, httpx.HTTPStatusError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_is_left_out_of_the_batch(echo_llm):
+    batcher = MicroBatcher(MicroBatchConfig(window=0.05))
+    kept = asyncio.create_task(batcher.submit("kept"))
+    dropped = asyncio.create_task(batcher.submit("dropped"))
+    await asyncio.sleep(0)
+    dropped.cancel()
+
+    assert await kept == "re: kept"
+    assert dropped.cancelled()
+    assert echo_llm.completions == 1
+    assert batcher.stats.abandoned == 1
+
+
+@pytest.mark.asyncio
+async def test_agents_share_batches(echo_llm, persona_manager, memory_db):
+    batcher = MicroBatcher(MicroBatchConfig(window=0.05))
+    agents = [
+        GeneralAgent(persona_manager, memory=AgentMemory(f"batch_{i}", db_path=memory_db), batch=batcher)
+        for i in range(4)
+    ]
+    for agent in agents:
+        await agent.assign_role("customer_support", "support_agent")
+
+    responses = await asyncio.gather(*(agent.execute(f"order {i} is late") for i, agent in enumerate(agents)))
+
+    assert echo_llm.requests == 1
+    for i, response in enumerate(responses):
+        assert f"order {i} is late" in response.response
@@ -0,0 +1,149 @@
+import asyncio
+import os
+import pytest
+from agents.general_agent import GeneralAgent
+from agents.llm_client import get_llm_client
+from agents.memory import AgentMemory, shutdown_memory
+from agents.micro_batch import MicroBatchConfig, MicroBatcher
+from simulation import ConversationCLI
+from utils.rate_limiter import PrepaidSlot
+
+
+class CountingLimiter:
+    def __init__(self):
+        self.waits = 0
+        self.observed = []
+
+    async def wait(self):
+        self.waits += 1
+
+    def observe(self, status, headers):
+        self.observed.append(status)
+
+
+async def _agent(persona_manager, memory_db, limiter, session_id="prefetch", **options):
+    agent = GeneralAgent(
+        persona_manager, agent_id="ahead", memory=AgentMemory(session_id, db_path=memory_db), **options
+    )
+    await agent.assign_role("customer_support", "support_agent")
+    agent.limiter = limiter
+    return agent
+
+
+@pytest.mark.asyncio
+async def test_prefetched_slot_and_history_are_used_once(stub_llm, persona_manager, memory_db):
+    limiter = CountingLimiter()
+    agent = await _agent(persona_manager, memory_db, limiter)
+    await agent.execute("first message")
+    assert limiter.waits == 1
+
+    await agent.prefetch()
+    assert limiter.waits == 2  # slot taken ahead of the turn
+    await agent.execute("second message")
+    assert limiter.waits == 2  # ...and used by it
+    assert limiter.observed == [200, 200]
+
+    await agent.execute("third message")
+    assert limiter.waits == 3
+
+
+@pytest.mark.asyncio
+async def test_unspent_slot_does_not_pay_for_a_later_turn(stub_llm, persona_manager, memory_db):
+    warm = await _agent(persona_manager, memory_db, CountingLimiter(), "warm", cache=True, force_cache=True)
+    await warm.execute("hello")
+
+    limiter = CountingLimiter()
+    agent = await _agent(persona_manager, memory_db, limiter, "hit", cache=True, force_cache=True)
+    await agent.prefetch()
+    await agent.execute("hello")  # same prompt: answered from the cache
+    assert stub_llm.requests == 1
+    await agent.execute("something new")
+    assert stub_llm.requests == 2
+    assert limiter.waits == 2
+
+
+@pytest.mark.asyncio
+async def test_batched_turn_uses_the_prefetched_slot(stub_llm, persona_manager, memory_db):
+    limiter = CountingLimiter()
+    batcher = MicroBatcher(MicroBatchConfig(window=0.001))
+    agent = await _agent(persona_manager, memory_db, limiter, batch=batcher)
+    await agent.execute("first message")
+    assert limiter.waits == 1
+
+    await agent.prefetch()
+    await agent.execute("second message")
+    assert limiter.waits == 2
+    assert batcher.stats.batches == 2
+
+
+@pytest.mark.parametrize("mode, requests", [("concurrent", 2), ("completions", 1)])
+@pytest.mark.asyncio
+async def test_prefetched_turns_sharing_a_batch(stub_llm, persona_manager, memory_db, mode, requests):
+    limiter = CountingLimiter()
+    batcher = MicroBatcher(MicroBatchConfig(window=0.05, mode=mode))
+    agents = [
+        await _agent(persona_manager, memory_db, limiter, f"batch{i}", batch=batcher) for i in range(2)
+    ]
+    await asyncio.gather(*(agent.prefetch() for agent in agents))
+    assert limiter.waits == 2
+
+    await asyncio.gather(*(agent.execute(f"message {i}") for i, agent in enumerate(agents)))
+    assert batcher.stats.batches == 1
+    assert stub_llm.requests == requests
+    # No turn waited for another slot. A /completions batch spent one of
+    # the two prefetched slots and lost the other
+    assert limiter.waits == 2
+
+
+@pytest.mark.asyncio
+async def test_prefetch_is_dropped_when_memory_changed(stub_llm, persona_manager, memory_db):
+    agent = await _agent(persona_manager, memory_db, CountingLimiter())
+    await agent.prefetch()
+    await agent._remember("user", "written after the prefetch")
+
+    prompts = []
+    send = agent._send
+    agent._send = lambda prompt, params, limiter: prompts.append(prompt) or send(prompt, params, limiter)
+    await agent.execute("next")
+    assert "written after the prefetch" in prompts[0]
+
+
+@pytest.mark.asyncio
+async def test_prepaid_slot_only_covers_the_first_attempt():
+    inner = CountingLimiter()
+    slot = PrepaidSlot(inner)
+    await slot.wait()
+    assert inner.waits == 0
+    await slot.wait()  # a retry
+    assert inner.waits == 1
+    slot.observe(429, {})
+    assert inner.observed == [429]
+
+
+@pytest.mark.asyncio
+async def test_warm_up_opens_pooled_connections(stub_llm):
+    stub_llm.connect_latency = 0.05
+    await get_llm_client().warm_up(2)
+    assert stub_llm.connections == 2
+    await get_llm_client().chat_completion("hello")
+    assert stub_llm.connections == 2
+
+
+@pytest.mark.asyncio
+async def test_pipelined_conversation_matches_sequential(stub_llm, tmp_path, monkeypatch):
+    scenarios = os.path.abspath("scenarios")
+    monkeypatch.chdir(tmp_path)  # ConversationCLI keeps memory in ./agent_memory.db
+    stored = {}
+    for pipeline in (False, True):
+        cli = ConversationCLI(scenario_dir=scenarios, pipeline=pipeline)
+        cli.max_turns = 4
+        await cli.initialize_agents("customer_support", "angry_customer", "support_agent")
+        await cli.start_conversation("Where is my package?")
+        await shutdown_memory()  # flushes write-behind memory
+        stored[pipeline] = [
+            [(m["role"], m["content"]) for m in await agent.memory.get_messages(limit=20)]
+            for agent in (cli.agent1, cli.agent2)
+        ]
+        await shutdown_memory()
+    assert stored[True] == stored[False]
+    assert len(stored[True][0]) == 4
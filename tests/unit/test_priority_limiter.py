@@ -0,0 +1,69 @@
+import asyncio
+import pytest
+from utils.rate_limiter import PriorityRateLimiter, RateLimitConfig
+
+
+@pytest.mark.asyncio
+async def test_interactive_overtakes_queued_background():
+    limiter = PriorityRateLimiter(RateLimitConfig(max_calls=50, period=1.0, burst=1))
+    order = []
+
+    async def call(lane, name):
+        await limiter.wait(lane)
+        order.append(name)
+
+    batch = [asyncio.create_task(call("background", f"bg{i}")) for i in range(20)]
+    await asyncio.sleep(0.05)
+    await asyncio.gather(*(call("interactive", f"live{i}") for i in range(3)))
+    await asyncio.gather(*batch)
+
+    live_positions = [order.index(f"live{i}") for i in range(3)]
+    assert max(live_positions) <= 6
+    assert limiter.stats["interactive"].granted == 3
+    assert limiter.stats["background"].max_depth == 20
+    assert limiter.stats["background"].depth == 0
+
+
+@pytest.mark.asyncio
+async def test_starvation_guard_serves_background():
+    limiter = PriorityRateLimiter(
+        RateLimitConfig(max_calls=50, period=1.0, burst=1),
+        starvation_after={"background": 0.1}
+    )
+    stop = asyncio.Event()
+
+    async def flood():
+        while not stop.is_set():
+            await limiter.wait("interactive")
+
+    flooders = [asyncio.create_task(flood()) for _ in range(5)]
+    await asyncio.sleep(0.02)
+    waited = await asyncio.wait_for(limiter.wait("background"), 1)
+    stop.set()
+    await asyncio.gather(*flooders)
+
+    assert 0.1 <= waited < 0.3
+    assert limiter.stats["background"].promoted == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_consume_a_grant():
+    limiter = PriorityRateLimiter(RateLimitConfig(max_calls=10, period=1.0, burst=1))
+    await limiter.wait("standard")
+    abandoned = asyncio.create_task(limiter.wait("standard"))
+    await asyncio.sleep(0.01)
+    abandoned.cancel()
+    await asyncio.gather(abandoned, return_exceptions=True)
+
+    await asyncio.wait_for(limiter.wait("standard"), 1)
+    assert limiter.stats["standard"].granted == 2
+    assert limiter.stats["standard"].depth == 0
+
+
+@pytest.mark.asyncio
+async def test_lane_view_and_unknown_priority():
+    limiter = PriorityRateLimiter(RateLimitConfig(max_calls=100, period=1.0))
+    await limiter.lane("interactive").wait()
+    assert limiter.stats["interactive"].wait.count == 1
+    with pytest.raises(ValueError):
+        limiter.lane("urgent")
@@ -0,0 +1,76 @@
+import random
+import pydantic
+import pytest
+from agents.rules import KeywordMatcher, Rule, RuleEngine
+from agents.schemas import Scenario
+
+
+def _scenario(**extra):
+    return Scenario(
+        scenario="test",
+        description="rules",
+        personas={
+            "agent": {"role_type": "support", "allowed_actions": ["escalate", "redirect"], "instructions": "Help"},
+            "clerk": {"role_type": "support", "allowed_actions": ["redirect"], "instructions": "Help"},
+        },
+        story_arc=[{"trigger": "demand refund"}, {"trigger": "refund"}, {"trigger": "Threaten Review"}],
+        **extra
+    )
+
+
+@pytest.mark.parametrize("regex_threshold", [0, 1000])
+def test_matcher_agrees_with_substring_search(regex_threshold):
+    rng = random.Random(3)
+    alphabet = "abc !"
+    keywords = {"".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(60)}
+    matcher = KeywordMatcher(keywords, regex_threshold=regex_threshold)
+    assert (matcher._regex is not None) == (regex_threshold == 0)
+    for _ in range(200):
+        text = "".join(rng.choice(alphabet + "ABC") for _ in range(rng.randint(0, 30)))
+        assert matcher.scan(text) == {k for k in keywords if k in text.lower()}
+
+
+def test_overlapping_and_nested_triggers_all_fire():
+    engine = _scenario().rules("agent")
+    assert engine.matched_triggers("I DEMAND REFUND or I'll threaten review") == [
+        "demand refund", "refund", "Threaten Review"
+    ]
+    assert engine.matched_triggers("nothing here") == []
+
+
+def test_default_rules_match_previous_behaviour():
+    scenario = _scenario()
+    agent, clerk = scenario.rules("agent"), scenario.rules("clerk")
+    assert agent.action("Get me your MANAGER", ["escalate"]) == "escalate"
+    assert clerk.action("Get me your manager", ["redirect"]) == "respond"  # escalate not allowed
+    assert clerk.action("please transfer me", ["redirect"]) == "redirect"
+    assert agent.emotion("I'm so sorry!") == "frustrated"
+    assert agent.emotion("Great news!") == "happy"
+    assert agent.emotion("Great news.") == "neutral"  # happy needs the "!"
+    assert agent.emotion("This is unacceptable") == "angry"
+
+
+def test_rules_are_configurable_per_scenario_and_persona():
+    scenario = _scenario(
+        emotions=[{"emotion": "happy", "keywords": ["delighted"]}],
+        action_rules=[{"action": "escalate", "keywords": ["supervisor"]}],
+    )
+    scenario.personas["clerk"]["emotions"] = [{"emotion": "angry", "keywords": ["delighted"]}]
+
+    agent = scenario.rules("agent")
+    assert agent is scenario.rules("agent")  # compiled once per persona
+    assert agent.emotion("Delighted to help") == "happy"
+    assert agent.emotion("So sorry") == "neutral"
+    assert agent.action("your supervisor please", ["escalate"]) == "escalate"
+    assert agent.action("your manager please", ["escalate"]) == "respond"
+    assert scenario.rules("clerk").emotion("Delighted to help") == "angry"
+
+    with pytest.raises(pydantic.ValidationError):
+        _scenario(emotions=[{"emotion": "ecstatic", "keywords": ["wow"]}])
+
+
+def test_engine_scans_each_text_once():
+    engine = RuleEngine(["alpha"], [Rule("escalate", ("alpha",))], [])
+    engine.matched_triggers("alpha beta")
+    engine.action("alpha beta", ["escalate"])
+    assert engine.scan.cache_info().misses == 1
@@ -0,0 +1,79 @@
+import os
+import shutil
+import pydantic
+import pytest
+from agents import memory
+from agents.persona_manager import PersonaManager
+from agents.scenario_registry import ScenarioRegistry
+
+
+@pytest.fixture
+def scenario_dir(tmp_path):
+    directory = tmp_path / "scenarios"
+    shutil.copytree("scenarios", directory)
+    return directory
+
+
+def _edit(path, old, new):
+    text = path.read_text()
+    path.write_text(text.replace(old, new))
+    # Make sure the mtime moves even on coarse-grained filesystems
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_parses_each_file_once_across_managers(scenario_dir):
+    managers = [PersonaManager(str(scenario_dir)) for _ in range(50)]
+    scenarios = [manager.load_scenario("customer_support") for manager in managers]
+
+    registry = managers[0].registry
+    assert all(manager.registry is registry for manager in managers)
+    assert all(scenario is scenarios[0] for scenario in scenarios)
+    assert (registry.stats.parses, registry.stats.hits) == (1, 49)
+
+
+def test_personas_are_validated_and_defaulted(scenario_dir):
+    scenario = ScenarioRegistry(str(scenario_dir)).get("political_debate")
+    persona = scenario.personas["progressive_candidate"]
+    assert persona["role_type"] == "debater" and "response_format" in persona
+    assert scenario.role("progressive_candidate").instructions == persona["instructions"]
+
+    _edit(scenario_dir / "political_debate.yaml", "instructions:", "notes:")
+    with pytest.raises(pydantic.ValidationError):
+        ScenarioRegistry(str(scenario_dir)).get("political_debate")
+
+
+def test_edits_are_picked_up_without_restart(scenario_dir):
+    registry = ScenarioRegistry(str(scenario_dir))
+    before = registry.get("customer_support")
+
+    path = scenario_dir / "customer_support.yaml"
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert registry.get("customer_support") is before  # touched, same content: no re-parse
+
+    _edit(path, "patience: 0.1", "patience: 0.3")
+    after = registry.get("customer_support")
+    assert after.personas["angry_customer"]["traits"]["patience"] == 0.3
+    assert (registry.stats.parses, registry.stats.reloads) == (2, 1)
+
+
+def test_compiled_cache_skips_yaml_on_cold_start(scenario_dir, tmp_path):
+    cache_dir = str(tmp_path / "compiled")
+    warm = ScenarioRegistry(str(scenario_dir), cache_dir=cache_dir)
+    expected = warm.get("philosophical_roundtable")
+    assert warm.stats.parses == 1
+
+    cold = ScenarioRegistry(str(scenario_dir), cache_dir=cache_dir)
+    loaded = cold.get("philosophical_roundtable")
+    assert (cold.stats.parses, cold.stats.disk_hits) == (0, 1)
+    assert loaded.model_dump() == expected.model_dump()
+
+    # A changed file has a new hash, so its stale compiled copy is not used
+    _edit(scenario_dir / "philosophical_roundtable.yaml", "Socrates", "Sokrates")
+    assert cold.get("philosophical_roundtable").model_dump() != expected.model_dump()
+    assert cold.stats.parses == 1
+
+
+def test_memory_reexports_the_persona_manager():
+    assert memory.PersonaManager is PersonaManager
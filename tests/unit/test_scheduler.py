@@ -0,0 +1,118 @@
+import asyncio
+import pytest
+import pytest_asyncio
+from agents.general_agent import GeneralAgent
+from agents.llm_client import LLMClientConfig, shutdown_llm_client, startup_llm_client
+from agents.memory import AgentMemory
+from agents.scheduler import ConversationScheduler
+from utils.llm_stub import StubLLMServer
+
+PHILOSOPHERS = ("socrates", "kant", "chomsky")
+
+
+class NamedStub(StubLLMServer):
+    """Replies with a counter so every transcript entry is distinct.
+
+    Tracks the most requests in flight at once; with ``barrier`` set each
+    request waits there until enough others have arrived.
+    """
+
+    barrier = None
+    in_flight = 0
+    peak = 0
+
+    def _completion_text(self, payload: dict) -> str:
+        return f"reply {self.requests}"
+
+    async def _respond(self, writer, path, body, keep_alive):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            if self.barrier is not None:
+                await asyncio.wait_for(self.barrier.wait(), 5)
+            await super()._respond(writer, path, body, keep_alive)
+        finally:
+            self.in_flight -= 1
+
+
+@pytest_asyncio.fixture
+async def named_llm():
+    async with NamedStub(latency=0.05) as server:
+        await startup_llm_client(LLMClientConfig(base_url=server.url, api_key="test"))
+        yield server
+        await shutdown_llm_client()
+
+
+async def _agents(persona_manager, memory_db, personas=PHILOSOPHERS):
+    agents, inputs = [], {}
+    for persona in personas:
+        agent = GeneralAgent(persona_manager, agent_id=persona, memory=AgentMemory(f"rt_{persona}", db_path=memory_db))
+        await agent.assign_role("philosophical_roundtable", persona)
+        agent.limiter = None  # timing here is about overlap, not the shared quota
+        execute = agent.execute
+
+        async def spy(message, sender_role=None, persona=persona, execute=execute):
+            inputs.setdefault(persona, []).append((message, sender_role))
+            return await execute(message, sender_role=sender_role)
+
+        agent.execute = spy
+        agents.append(agent)
+    return agents, inputs
+
+
+@pytest.mark.asyncio
+async def test_round_robin_hands_each_agent_only_new_entries(named_llm, persona_manager, memory_db):
+    agents, inputs = await _agents(persona_manager, memory_db)
+    transcript = await ConversationScheduler(agents).run("What is justice?", max_rounds=2)
+
+    assert [entry.persona for entry in transcript.entries] == ["user"] + list(PHILOSOPHERS) * 2
+    assert inputs["socrates"][0] == ("What is justice?", "user")
+    assert inputs["kant"][0] == ("user: What is justice?\nsocrates: reply 1", "group")
+    # Second turn: what the other two said since, never its own reply
+    assert inputs["socrates"][1] == ("kant: reply 2\nchomsky: reply 3", "group")
+    assert inputs["kant"][1] == ("chomsky: reply 3\nsocrates: reply 4", "group")
+
+
+@pytest.mark.asyncio
+async def test_parallel_round_overlaps_calls_and_merges_in_order(named_llm, persona_manager, memory_db):
+    agents, inputs = await _agents(persona_manager, memory_db)
+    scheduler = ConversationScheduler(agents, policy="parallel")
+    scheduler.transcript.append("user", "user", "What is justice?")
+
+    # Each request is held until all three are upstream at once; calls
+    # made one after another would time out at the barrier
+    named_llm.barrier = asyncio.Barrier(3)
+    added = await scheduler.run_round()
+    named_llm.barrier = None
+
+    assert [entry.persona for entry in added] == list(PHILOSOPHERS)
+    assert named_llm.peak == 3
+    assert all(calls == [("What is justice?", "user")] for calls in inputs.values())
+
+    await scheduler.run_round()
+    first = {entry.persona: entry.text for entry in added}
+    assert inputs["chomsky"][1][0] == f"socrates: {first['socrates']}\nkant: {first['kant']}"
+
+
+@pytest.mark.asyncio
+async def test_moderator_calls_on_named_participants(named_llm, persona_manager, memory_db):
+    agents, inputs = await _agents(persona_manager, memory_db)
+    moderator, participants = agents[0], agents[1:]
+    scheduler = ConversationScheduler(participants, policy="moderator", moderator=moderator)
+    scheduler.transcript.append("user", "user", "Begin")
+
+    added = await scheduler.run_round()
+    # The stub names nobody, so the first participant in rotation answers
+    assert [entry.persona for entry in added] == ["socrates", "kant"]
+
+    scheduler._addressed = lambda text: participants  # moderator names both
+    added = await scheduler.run_round()
+    assert [entry.persona for entry in added] == ["socrates", "kant", "chomsky"]
+    assert inputs["socrates"][1] == (scheduler.transcript.entries[2].text, "enlightenment_philosopher")
+
+
+def test_policy_is_validated():
+    with pytest.raises(ValueError):
+        ConversationScheduler([], policy="free_for_all")
+    with pytest.raises(ValueError):
+        ConversationScheduler([], policy="moderator")
@@ -0,0 +1,119 @@
+import sqlite3
+import pytest
+from agents.memory import AgentMemory, shutdown_memory
+from agents.search import MessageSearch, backfill, match_expression, search_messages
+
+
+async def _conversation(memory_db, session_id, scenario, lines, **options):
+    memory = AgentMemory(session_id, db_path=memory_db, scenario=scenario, **options)
+    for role, content in lines:
+        await memory.add_message(role, content)
+    return memory
+
+
+@pytest.mark.asyncio
+async def test_search_filters_and_pages(memory_db):
+    support = await _conversation(memory_db, "s1", "customer_service", [
+        ("user", "I was charged twice, I want a refund"),
+        ("support_agent", "Refunds take three days to process"),
+        ("user", "Thanks, that helps"),
+    ])
+    await _conversation(memory_db, "s2", "philosophical_roundtable", [
+        ("socrates", "Is a refund of virtue possible?"),
+    ])
+
+    hits = await search_messages("refund", db_path=memory_db)
+    # Stemmed, so "Refunds" matches too
+    assert sorted((hit.session_id, hit.seq) for hit in hits) == [("s1", 0), ("s1", 1), ("s2", 0)]
+    assert {hit.scenario for hit in hits} == {"customer_service", "philosophical_roundtable"}
+    assert all("[" in hit.snippet for hit in hits)
+
+    roundtable = await search_messages("refund", db_path=memory_db, scenario="philosophical_roundtable")
+    assert [hit.session_id for hit in roundtable] == ["s2"]
+    assert [hit.seq for hit in await search_messages("refund", db_path=memory_db, persona="support_agent")] == [1]
+    assert len(await support.search("refund")) == 2  # own session only
+
+    pages = [
+        await search_messages("refund", db_path=memory_db, order="oldest", limit=2, offset=offset)
+        for offset in (0, 2)
+    ]
+    assert [len(page) for page in pages] == [2, 1]
+    assert pages[0][0].session_id == "s1" and pages[1][0].session_id == "s2"
+
+
+@pytest.mark.asyncio
+async def test_time_range(memory_db):
+    memory = await _conversation(memory_db, "timed", None, [("user", "order one")])
+    [first] = await memory.search("order")
+    await memory.add_message("user", "order two")
+
+    later = await memory.search("order", since=first.timestamp, order="oldest")
+    assert [hit.content for hit in later] == ["order one", "order two"]
+    assert [hit.content for hit in await memory.search("order", until=first.timestamp)] == []
+    assert await memory.search("order", since="2000-01-01", until="2000-01-02") == []
+
+
+@pytest.mark.asyncio
+async def test_index_follows_write_behind_and_compaction(memory_db):
+    memory = await _conversation(
+        memory_db, "compact", "customer_service",
+        [("user", f"ticket {i} about shipping") for i in range(6)],
+        write_behind=True, keep_recent_messages=2
+    )
+    # search() flushes queued messages first
+    assert len(await memory.search("shipping")) == 6
+
+    memory.summarize_after = 4
+    await memory.compact()
+    hits = await memory.search("shipping")
+    assert sorted(hit.seq for hit in hits) == [4, 5]
+    with sqlite3.connect(memory_db) as conn:
+        conn.execute("INSERT INTO message_search (message_search) VALUES ('integrity-check')")
+
+
+@pytest.mark.asyncio
+async def test_scan_matches_index(memory_db):
+    memory = await _conversation(memory_db, "scan", None, [
+        ("user", "where is my parcel?"),
+        ("agent", "your parcel ships today"),
+        ("user", "100% sure?"),
+    ])
+    search = MessageSearch(memory.async_session)
+    for query in ("parcel", "parcel ships", "100%"):
+        indexed = await search.search(query, order="oldest")
+        scanned = await search.search(query, order="oldest", scan=True)
+        assert [hit.seq for hit in indexed] == [hit.seq for hit in scanned]
+
+
+def test_match_expression_quotes_terms():
+    assert match_expression('refund "now" pol*') == '"refund" """now""" "pol"*'
+
+
+@pytest.mark.asyncio
+async def test_invalid_raw_query(memory_db):
+    memory = await _conversation(memory_db, "raw", None, [("user", "hello")])
+    with pytest.raises(ValueError):
+        await memory.search("hello AND", raw=True)
+    with pytest.raises(ValueError):
+        await memory.search("  ")
+
+
+@pytest.mark.asyncio
+async def test_backfill_indexes_existing_database(memory_db):
+    await _conversation(memory_db, "old", None, [("user", "legacy complaint")])
+    await shutdown_memory()
+    # Back to a database from before the index existed
+    with sqlite3.connect(memory_db) as conn:
+        conn.executescript(
+            "DROP TRIGGER messages_search_insert; DROP TRIGGER messages_search_delete; "
+            "DROP TRIGGER messages_search_update; DROP TABLE message_search; "
+            "DROP VIEW message_search_content; DROP TABLE message_search_ids; PRAGMA user_version = 2;"
+        )
+        conn.execute(
+            "INSERT INTO messages (session_id, seq, role, content) VALUES ('old', 1, 'user', 'another complaint')"
+        )
+
+    assert backfill(memory_db) == 2
+    assert backfill(memory_db) == 2
+    assert backfill(memory_db, rebuild=True) == 2
+    assert len(await search_messages("complaint", db_path=memory_db)) == 2
@@ -0,0 +1,76 @@
+import asyncio
+import bisect
+import multiprocessing
+import sqlite3
+import time
+import pytest
+from agents import general_agent, llm_client, support_agent
+from utils.rate_limiter import RateLimitConfig, TokenBucketLimiter
+
+CONFIG = dict(max_calls=20, period=1.0, burst=2)
+
+
+def _worker(path, calls, results):
+    limiter = TokenBucketLimiter(RateLimitConfig(shared_path=path, **CONFIG))
+
+    async def run():
+        import time
+        grants = []
+        for _ in range(calls):
+            await limiter.wait()
+            grants.append(time.time())
+        return grants
+
+    results.put(asyncio.run(run()))
+
+
+def test_workers_share_one_quota(tmp_path):
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    path = str(tmp_path / "limiter.db")
+    workers = [ctx.Process(target=_worker, args=(path, 10, results)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    grants = sorted(t for _ in workers for t in results.get(timeout=60))
+    for worker in workers:
+        worker.join()
+
+    # 40 calls at 20/s with a burst of 2 need at least 1.9s however many
+    # processes ask (more if a worker starts late)
+    assert len(grants) == 40
+    assert grants[-1] - grants[0] >= 1.9 - 0.02
+    in_any_second = max(bisect.bisect_left(grants, t + 1.0) - i for i, t in enumerate(grants))
+    assert in_any_second <= CONFIG["max_calls"] + CONFIG["burst"]
+
+
+@pytest.mark.asyncio
+async def test_limiters_with_same_path_share_state(tmp_path):
+    config = RateLimitConfig(max_calls=10, period=1.0, burst=1, shared_path=str(tmp_path / "l.db"))
+    first, second = TokenBucketLimiter(config), TokenBucketLimiter(config)
+
+    assert await first.wait() is None
+    assert second.next_available() == pytest.approx(0.1, abs=0.02)
+
+
+@pytest.mark.asyncio
+async def test_locked_quota_does_not_block_the_event_loop(tmp_path):
+    path = str(tmp_path / "l.db")
+    limiter = TokenBucketLimiter(RateLimitConfig(shared_path=path, **CONFIG))
+    assert await limiter.wait() is None  # creates the table
+
+    # Another process holding the write lock
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+    waiter = asyncio.create_task(limiter.wait())
+    start = time.monotonic()
+    await asyncio.sleep(0.2)
+    assert time.monotonic() - start < 0.3
+    assert not waiter.done()
+
+    other.execute("COMMIT")
+    other.close()
+    await asyncio.wait_for(waiter, 2)
+
+
+def test_agents_draw_on_one_quota():
+    assert general_agent.DEEPSEEK_LIMITER is support_agent.DEEPSEEK_LIMITER is llm_client.DEEPSEEK_LIMITER
@@ -0,0 +1,128 @@
+import asyncio
+import time
+import pytest
+import pytest_asyncio
+from agents.general_agent import GeneralAgent
+from agents.llm_client import LLMClientConfig, shutdown_llm_client, startup_llm_client
+from agents.memory import AgentMemory
+from agents.single_flight import SingleFlight, get_single_flight
+from utils.llm_stub import StubLLMServer
+
+
+class GatedStub(StubLLMServer):
+    """Holds every request until ``release`` is set"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.release = asyncio.Event()
+
+    async def _respond(self, writer, path, body, keep_alive):
+        await self.release.wait()
+        await super()._respond(writer, path, body, keep_alive)
+
+
+@pytest_asyncio.fixture
+async def gated_llm():
+    async with GatedStub() as server:
+        await startup_llm_client(LLMClientConfig(base_url=server.url, api_key="test"))
+        yield server
+        await shutdown_llm_client()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "done"
+
+    results = await asyncio.gather(*(flight.do("k", call) for _ in range(10)))
+
+    assert results == ["done"] * 10
+    assert len(calls) == 1
+    assert flight.stats.coalesced == 9
+    assert flight.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_caller():
+    flight = SingleFlight()
+
+    async def call():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream")
+
+    results = await asyncio.gather(flight.do("k", call), flight.do("k", call), return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_others_running():
+    flight = SingleFlight()
+    started = asyncio.Event()
+
+    async def call():
+        started.set()
+        await asyncio.sleep(0.05)
+        return "done"
+
+    first = asyncio.create_task(flight.do("k", call))
+    second = asyncio.create_task(flight.do("k", call))
+    await started.wait()
+    first.cancel()
+
+    assert await second == "done"
+    assert first.cancelled()
+    assert flight.stats.abandoned == 1
+    assert flight.stats.cancelled == 0
+
+
+@pytest.mark.asyncio
+async def test_upstream_cancelled_when_last_waiter_leaves():
+    flight = SingleFlight()
+    upstream_cancelled = asyncio.Event()
+
+    async def call():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            upstream_cancelled.set()
+            raise
+
+    waiters = [asyncio.create_task(flight.do("k", call)) for _ in range(2)]
+    await asyncio.sleep(0)
+    for waiter in waiters:
+        waiter.cancel()
+    await asyncio.gather(*waiters, return_exceptions=True)
+
+    await asyncio.wait_for(upstream_cancelled.wait(), 1)
+    assert flight.stats.cancelled == 1
+    assert flight.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_identical_agent_openings_coalesce(gated_llm, memory_db, persona_manager):
+    flight = get_single_flight()
+    before = flight.stats.coalesced
+
+    async def open_conversation(index):
+        agent = GeneralAgent(persona_manager, llm_params={"temperature": 0})
+        agent.memory = AgentMemory(f"fanout_{index}", db_path=memory_db)
+        await agent.assign_role("customer_support", "support_agent")
+        return await agent.execute("Where is my package?")
+
+    opening = asyncio.gather(*(open_conversation(i) for i in range(8)))
+    # The stub holds the first request, so the others join it however long
+    # their set-up takes; answer once all seven are waiting on it
+    deadline = time.monotonic() + 5
+    while flight.stats.coalesced - before < 7 and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+    gated_llm.release.set()
+    responses = await opening
+
+    assert all(response.response == gated_llm.reply for response in responses)
+    assert gated_llm.requests == 1
+    assert flight.stats.coalesced - before == 7
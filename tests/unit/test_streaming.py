@@ -0,0 +1,32 @@
+import pytest
+from agents.general_agent import GeneralAgent
+from agents.memory import AgentMemory
+from agents.schemas import AgentResponse
+
+
+@pytest.mark.asyncio
+async def test_execute_stream_yields_tokens_then_response(stub_llm, memory_db, persona_manager):
+    stub_llm.reply = "I am so sorry about the delay"
+    agent = GeneralAgent(persona_manager, agent_id="streamer")
+    agent.memory = AgentMemory("stream_test", db_path=memory_db)
+    await agent.assign_role("customer_support", "support_agent")
+
+    items = [item async for item in agent.execute_stream("Where is my package?")]
+
+    *tokens, final = items
+    assert len(tokens) > 1
+    assert all(isinstance(token, str) for token in tokens)
+    assert "".join(tokens) == stub_llm.reply
+    assert isinstance(final, AgentResponse)
+    assert final.response == stub_llm.reply
+    assert final.emotion == "frustrated"
+
+
+@pytest.mark.asyncio
+async def test_execute_matches_stream(stub_llm, memory_db, persona_manager):
+    agent = GeneralAgent(persona_manager)
+    agent.memory = AgentMemory("execute_test", db_path=memory_db)
+    await agent.assign_role("customer_support", "support_agent")
+
+    response = await agent.execute("Hello")
+    assert response.response == stub_llm.reply
@@ -0,0 +1,93 @@
+import sqlite3
+import pytest
+from agents.context import ContextBuilder
+from agents.memory import AgentMemory
+from agents.summarizer import ExtractiveSummarizer
+
+
+def test_extractive_summary_is_deterministic_and_bounded():
+    messages = [
+        {"role": "user", "content": "My order never arrived. The order number is 42. Weather is nice."},
+        {"role": "agent", "content": "I will check order 42 with the courier. Thanks for waiting!"},
+    ]
+    summarizer = ExtractiveSummarizer(max_chars=80)
+
+    summary = summarizer.summarize_sync(messages)
+
+    assert summary == summarizer.summarize_sync(messages)
+    assert len(summary) <= 80
+    assert "order" in summary
+    assert all(line.split(": ", 1)[0] in ("user", "agent") for line in summary.splitlines())
+
+
+@pytest.mark.asyncio
+async def test_compaction_bounds_live_messages_and_bytes(memory_db):
+    memory = AgentMemory("long", db_path=memory_db, summarize_after=30, keep_recent_messages=10)
+    for i in range(200):
+        await memory.add_message("user" if i % 2 else "agent", f"Turn {i} talks about refunds. " * 5)
+        await memory.flush()
+
+    messages = await memory.get_messages_since(-1, limit=-1)
+    summaries = await memory.get_summaries()
+    assert len(messages) <= 31
+    assert messages[-1]["seq"] == 199
+    assert summaries and summaries[-1]["end_seq"] == messages[0]["seq"] - 1
+    assert len(summaries) <= memory.max_summaries
+
+    with sqlite3.connect(memory_db) as conn:
+        count, size = conn.execute(
+            "SELECT message_count, size_bytes FROM conversations WHERE session_id = 'long'"
+        ).fetchone()
+    assert count == 200
+    assert size == (
+        sum(len(m["content"].encode()) for m in messages) + sum(len(s["content"].encode()) for s in summaries)
+    )
+
+
+@pytest.mark.asyncio
+async def test_oldest_summaries_merge_into_higher_level(memory_db):
+    memory = AgentMemory("merge", db_path=memory_db, summarize_after=4, keep_recent_messages=2, max_summaries=3)
+    for i in range(60):
+        await memory.add_message("user", f"Message {i} mentions shipping.")
+        await memory.flush()
+
+    summaries = await memory.get_summaries()
+    assert len(summaries) <= 3
+    assert summaries[0]["start_seq"] == 0
+    assert summaries[0]["level"] >= 1
+    assert all(a["end_seq"] < b["start_seq"] for a, b in zip(summaries, summaries[1:]))
+
+
+@pytest.mark.asyncio
+async def test_context_uses_summaries_and_recent_tail(memory_db):
+    memory = AgentMemory("ctx", db_path=memory_db, summarize_after=10, keep_recent_messages=4)
+    builder = ContextBuilder(memory, max_tokens=10_000)
+    for i in range(30):
+        await memory.add_message("user", f"Message {i} about the refund.")
+        await memory.flush()
+        context = await builder.build()
+
+    assert context.startswith("[Summary of messages 0-")
+    assert context.splitlines()[-1] == "user: Message 29 about the refund."
+    assert context == await ContextBuilder(memory, max_tokens=10_000).build()
+
+
+@pytest.mark.asyncio
+async def test_paging_and_seqs_after_compaction(memory_db):
+    memory = AgentMemory("paged", db_path=memory_db, keep_recent_messages=1)
+    for i in range(14):
+        await memory.add_message("user", f"Message {i}")
+    memory.summarize_after = 2
+    assert await memory.compact() == 13
+
+    # Page 0 starts at the oldest live message, not at seq 0
+    assert [m["content"] for m in await memory.get_messages(limit=10)] == ["Message 13"]
+    await memory.add_message("user", "Message 14")
+    assert [m["seq"] for m in await memory.get_messages(limit=10)] == [13, 14]
+    memory.summarize_after = 1
+    assert await memory.compact() == 1  # no seq reused, so no summary clash
+
+
+def test_keep_recent_messages_must_keep_one():
+    with pytest.raises(ValueError):
+        AgentMemory("empty", keep_recent_messages=0)
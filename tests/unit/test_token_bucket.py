@@ -0,0 +1,51 @@
+import asyncio
+import time
+import pytest
+from utils.rate_limiter import RateLimitConfig, RateLimitExceededError, TokenBucketLimiter
+
+
+@pytest.mark.asyncio
+async def test_burst_then_spaced_calls():
+    limiter = TokenBucketLimiter(RateLimitConfig(max_calls=10, period=0.5, burst=3))
+
+    assert [await limiter.wait() for _ in range(3)] == [None, None, None]
+    waited = await limiter.wait()
+    assert waited == pytest.approx(0.05, abs=0.01)
+
+
+@pytest.mark.asyncio
+async def test_waiters_served_in_arrival_order_at_rate():
+    limiter = TokenBucketLimiter(RateLimitConfig(max_calls=100, period=1.0, burst=1))
+    granted = []
+
+    async def caller(index):
+        await limiter.wait()
+        granted.append((index, time.monotonic()))
+
+    start = time.monotonic()
+    await asyncio.gather(*(caller(i) for i in range(20)))
+
+    assert [index for index, _ in granted] == list(range(20))
+    assert granted[-1][1] - start == pytest.approx(0.19, abs=0.03)
+
+
+@pytest.mark.asyncio
+async def test_max_wait_raises_without_taking_a_slot():
+    limiter = TokenBucketLimiter(RateLimitConfig(max_calls=1, period=1.0, max_wait=0.5))
+    await limiter.wait()
+    with pytest.raises(RateLimitExceededError):
+        await limiter.wait()
+    assert limiter.next_available() == pytest.approx(1.0, abs=0.05)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_returns_its_slot():
+    limiter = TokenBucketLimiter(RateLimitConfig(max_calls=10, period=1.0, burst=1))
+    await limiter.wait()
+    waiter = asyncio.create_task(limiter.wait())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    assert limiter.next_available() <= 0.1
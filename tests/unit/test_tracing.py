@@ -0,0 +1,91 @@
+import json
+import pytest
+from agents.general_agent import GeneralAgent
+from agents.memory import AgentMemory
+from utils import tracing
+from utils.tracing import NOOP_SPAN, HistogramExporter, JSONLExporter, configure_tracing
+
+
+@pytest.fixture
+def traced(tmp_path):
+    histograms = HistogramExporter()
+    dump = JSONLExporter(str(tmp_path / "trace.jsonl"))
+    configure_tracing([histograms, dump])
+    yield histograms, dump
+    configure_tracing()
+
+
+def _records(dump):
+    dump.flush()
+    with open(dump.path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_disabled_tracing_is_a_noop():
+    configure_tracing()
+    assert tracing.span("turn") is NOOP_SPAN
+    with tracing.span("turn") as span:
+        span.set("ignored", True)
+    tracing.count("cache.hit")
+    tracing.record("llm_call", 0.1)
+
+
+@pytest.mark.asyncio
+async def test_execute_records_each_phase(traced, stub_llm, memory_db, persona_manager):
+    histograms, dump = traced
+    agent = GeneralAgent(persona_manager, agent_id="a1", memory=AgentMemory("trace", db_path=memory_db))
+    await agent.assign_role("customer_support", "support_agent")
+
+    await agent.execute("Where is my package?")
+
+    snapshot = histograms.snapshot()
+    assert {name: stats["count"] for name, stats in snapshot["spans"].items()} == {
+        "turn": 1, "prompt_build": 1, "memory_write": 2, "limiter_wait": 1,
+        "llm_call": 1, "scoring": 1, "validation": 1,
+    }
+    assert snapshot["counters"]["tokens.completion"] > 0
+    assert snapshot["counters"]["tokens.prompt"] > 0
+
+    spans = [r for r in _records(dump) if r["type"] == "span"]
+    [turn] = [s for s in spans if s["name"] == "turn"]
+    assert turn["attrs"] == {"agent": "a1", "persona": "support_agent"}
+    # Every phase hangs off the turn, and phases fit inside it
+    assert all(s["trace"] == turn["span"] for s in spans)
+    assert {s["parent"] for s in spans if s is not turn} == {turn["span"]}
+    assert sum(s["duration"] for s in spans if s is not turn) <= turn["duration"]
+    [call] = [s for s in spans if s["name"] == "llm_call"]
+    assert call["attrs"] == {"attempt": 0, "status": 200}
+
+
+@pytest.mark.asyncio
+async def test_retries_and_cache_hits_are_counted(traced, stub_llm, memory_db, persona_manager):
+    histograms, _ = traced
+    stub_llm.inject_errors.append(429)
+    stub_llm.retry_after = 0
+    agent = GeneralAgent(
+        persona_manager, memory=AgentMemory("trace", db_path=memory_db), cache=True, force_cache=True
+    )
+    await agent.assign_role("customer_support", "support_agent")
+
+    prompt = agent._build_prompt("same question")
+    await agent._query_llm(prompt, agent.limiter)
+    await agent._query_llm(prompt, agent.limiter)
+
+    counters = histograms.snapshot()["counters"]
+    assert counters["llm.retries"] == 1
+    assert counters["cache.miss"] == 1 and counters["cache.hit"] == 1
+    assert histograms.spans["llm_call"].count == 2
+
+
+@pytest.mark.asyncio
+async def test_streamed_turn_is_recorded(traced, stub_llm, memory_db, persona_manager):
+    histograms, dump = traced
+    agent = GeneralAgent(persona_manager, memory=AgentMemory("trace", db_path=memory_db))
+    await agent.assign_role("customer_support", "support_agent")
+
+    async for _ in agent.execute_stream("Hello"):
+        pass
+
+    [call] = [r for r in _records(dump) if r["type"] == "span" and r["name"] == "llm_call"]
+    assert call["attrs"]["stream"] is True and call["attrs"]["ttft"] is not None
+    assert histograms.spans["turn"].count == 1
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Local OpenAI/DeepSeek-compatible stub server for tests and benchmarks
+"""
+
+import asyncio
+import contextlib
+import json
+import math
+import random
+import threading
+import time
+from collections import deque
+from typing import Deque, Iterator, Optional, Sequence
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal", "exponential")
+
+
+class StubLLMServer:
+    """Minimal HTTP/1.1 server answering POST /v1/chat/completions and
+    batched /v1/completions (a list of prompts per request)"""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        connect_latency: float = 0.0,
+        token_interval: float = 0.0,
+        prompt_token_latency: float = 0.0,
+        reply: str = "Stub reply from the local LLM server.",
+        rate_limit: Optional[int] = None,
+        rate_period: float = 1.0,
+        latency_dist: str = "fixed",
+        jitter: float = 0.0,
+        tokens_per_sec: Optional[float] = None,
+        error_rate: float = 0.0,
+        error_statuses: Sequence[int] = (429, 500, 503),
+        seed: Optional[int] = None,
+        slots: Optional[int] = None,
+        batch_item_latency: float = 0.0,
+    ):
+        if latency_dist not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"latency_dist must be one of {LATENCY_DISTRIBUTIONS}, got {latency_dist!r}")
+        self.host = host
+        self.port = port
+        # Per-request latency drawn from latency_dist around `latency`:
+        # uniform is latency +/- jitter, normal has sigma=jitter, lognormal
+        # has median latency and sigma=jitter, exponential has mean latency
+        self.latency = latency
+        self.latency_dist = latency_dist
+        self.jitter = jitter
+        # Seeded so latency and error draws repeat run to run
+        self._rng = random.Random(seed)
+        # Extra delay on the first request of each connection, standing in
+        # for the TCP + TLS handshake a real provider would cost us
+        self.connect_latency = connect_latency
+        # Delay between streamed tokens when the client asks for stream=true
+        self.token_interval = 1.0 / tokens_per_sec if tokens_per_sec else token_interval
+        # Prefill cost: extra delay per (estimated) prompt token
+        self.prompt_token_latency = prompt_token_latency
+        self.prompt_tokens = 0
+        self.reply = reply
+        # Provider-side quota: more than rate_limit requests in any
+        # rate_period gets a 429 with a precise Retry-After
+        self.rate_limit = rate_limit
+        self.rate_period = rate_period
+        self._accepted: Deque[float] = deque()
+        self.quota_headers = True  # send x-ratelimit-* headers on success
+        # Status codes (e.g. 429, 503) returned by the next requests, in order
+        self.inject_errors: Deque[int] = deque()
+        self.retry_after: Optional[float] = None  # sent with injected errors
+        # Fraction of requests failed at random with one of error_statuses
+        self.error_rate = error_rate
+        self.error_statuses = tuple(error_statuses)
+        # Like a local inference server: at most `slots` requests are worked
+        # on at once (the rest queue), and each extra prompt in a batched
+        # /completions request adds batch_item_latency rather than a request
+        self.slots = slots
+        self.batch_item_latency = batch_item_latency
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.connections = 0
+        self.requests = 0
+        self.completions = 0  # prompts answered, counting each in a batch
+        self.throttled = 0
+        self._server: Optional[asyncio.base_events.Server] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    async def start(self) -> "StubLLMServer":
+        self._slots = asyncio.Semaphore(self.slots) if self.slots else None
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        first_request = True
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                self.requests += 1
+
+                if first_request and self.connect_latency:
+                    await asyncio.sleep(self.connect_latency)
+                first_request = False
+
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await self._respond(writer, path, body, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return None
+
+        lines = head.decode("latin-1").split("\r\n")
+        method, path, _ = lines[0].split(" ", 2)
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                key, value = line.split(":", 1)
+                headers[key.strip().lower()] = value.strip()
+
+        length = int(headers.get("content-length", 0))
+        body = await reader.readexactly(length) if length else b""
+        return method, path, headers, body
+
+    def _throttle(self):
+        """(status, headers) when this request should be rejected, else None"""
+        if self.inject_errors:
+            headers = {"Retry-After": f"{self.retry_after:g}"} if self.retry_after is not None else {}
+            return self.inject_errors.popleft(), headers
+        if self.error_rate and self._rng.random() < self.error_rate:
+            headers = {"Retry-After": f"{self.retry_after:g}"} if self.retry_after is not None else {}
+            return self._rng.choice(self.error_statuses), headers
+        if self.rate_limit is None:
+            return None
+        now = time.monotonic()
+        while self._accepted and self._accepted[0] <= now - self.rate_period:
+            self._accepted.popleft()
+        if len(self._accepted) >= self.rate_limit:
+            retry_after = self._accepted[0] + self.rate_period - now
+            return 429, {"Retry-After": f"{retry_after:.3f}", "x-ratelimit-remaining-requests": "0"}
+        self._accepted.append(now)
+        return None
+
+    def _quota_headers(self) -> dict:
+        if self.rate_limit is None or not self.quota_headers:
+            return {}
+        reset = self._accepted[0] + self.rate_period - time.monotonic() if self._accepted else 0.0
+        return {
+            "x-ratelimit-limit-requests": str(self.rate_limit),
+            "x-ratelimit-remaining-requests": str(max(0, self.rate_limit - len(self._accepted))),
+            "x-ratelimit-reset-requests": f"{max(0.0, reset) * 1000:.0f}ms",
+        }
+
+    def _sample_latency(self) -> float:
+        if self.latency_dist == "fixed" or not self.latency:
+            return self.latency
+        if self.latency_dist == "uniform":
+            return max(0.0, self._rng.uniform(self.latency - self.jitter, self.latency + self.jitter))
+        if self.latency_dist == "normal":
+            return max(0.0, self._rng.gauss(self.latency, self.jitter))
+        if self.latency_dist == "lognormal":
+            return self._rng.lognormvariate(math.log(self.latency), self.jitter)
+        return self._rng.expovariate(1.0 / self.latency)
+
+    def _completion_text(self, payload: dict) -> str:
+        return self.reply
+
+    async def _respond(self, writer: asyncio.StreamWriter, path: str, body: bytes, keep_alive: bool):
+        chat = path.endswith("/chat/completions")
+        if not chat and not path.endswith("/completions"):
+            self._write(writer, 404, {"error": {"message": f"Unknown path {path}"}}, keep_alive)
+            await writer.drain()
+            return
+
+        throttle = self._throttle()
+        if throttle is not None:
+            status, headers = throttle
+            self.throttled += 1
+            message = "Rate limit reached" if status == 429 else "Injected error"
+            self._write(writer, status, {"error": {"message": message}}, keep_alive, headers)
+            await writer.drain()
+            return
+
+        payload = json.loads(body or b"{}")
+        if chat:
+            prompts = ["".join(str(m.get("content", "")) for m in payload.get("messages", []))]
+        else:
+            prompts = payload.get("prompt", "")
+            prompts = [prompts] if isinstance(prompts, str) else prompts
+        prompt_tokens = sum(len(prompt) for prompt in prompts) // 4
+        self.prompt_tokens += prompt_tokens
+        self.completions += len(prompts)
+        delay = (
+            self._sample_latency()
+            + self.prompt_token_latency * prompt_tokens
+            + self.batch_item_latency * (len(prompts) - 1)
+        )
+        async with self._slots or contextlib.nullcontext():
+            if delay:
+                await asyncio.sleep(delay)
+
+            texts = [self._completion_text(payload if chat else {**payload, "prompt": prompt}) for prompt in prompts]
+            text = texts[0]
+            if chat and payload.get("stream"):
+                await self._stream(writer, payload, text, keep_alive)
+                return
+
+            if self.token_interval:
+                # A blocking completion still costs the full generation time
+                await asyncio.sleep(self.token_interval * (len(text.split(" ")) - 1))
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": sum(len(t.split()) for t in texts)}
+        if chat:
+            self._write(writer, 200, {
+                "id": f"stub-{self.requests}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": payload.get("model", "deepseek-chat"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": text},
+                    "finish_reason": "stop"
+                }],
+                "usage": usage
+            }, keep_alive, self._quota_headers())
+        else:
+            self._write(writer, 200, {
+                "id": f"stub-{self.requests}",
+                "object": "text_completion",
+                "created": int(time.time()),
+                "model": payload.get("model", "deepseek-chat"),
+                "choices": [
+                    {"index": index, "text": text, "finish_reason": "stop"} for index, text in enumerate(texts)
+                ],
+                "usage": usage
+            }, keep_alive, self._quota_headers())
+        await writer.drain()
+
+    async def _stream(self, writer: asyncio.StreamWriter, payload: dict, text: str, keep_alive: bool):
+        """Send the completion as SSE chunks over chunked transfer encoding"""
+        head = [
+            "HTTP/1.1 200 OK",
+            "Content-Type: text/event-stream",
+            "Transfer-Encoding: chunked",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode())
+
+        tokens = [word + " " for word in text.split(" ")]
+        tokens[-1] = tokens[-1].rstrip(" ")
+        for index, token in enumerate(tokens):
+            if index and self.token_interval:
+                await asyncio.sleep(self.token_interval)
+            chunk = {
+                "id": f"stub-{self.requests}",
+                "object": "chat.completion.chunk",
+                "model": payload.get("model", "deepseek-chat"),
+                "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]
+            }
+            self._write_chunk(writer, f"data: {json.dumps(chunk)}\n\n".encode())
+            await writer.drain()
+
+        self._write_chunk(writer, b"data: [DONE]\n\n")
+        self._write_chunk(writer, b"")
+        await writer.drain()
+
+    def _write_chunk(self, writer: asyncio.StreamWriter, data: bytes):
+        writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+    def _write(self, writer: asyncio.StreamWriter, status: int, data: dict, keep_alive: bool, headers: dict = None):
+        body = json.dumps(data).encode()
+        reason = {
+            200: "OK", 404: "Not Found", 429: "Too Many Requests",
+            500: "Internal Server Error", 503: "Service Unavailable"
+        }.get(status, "Error")
+        head = [
+            f"HTTP/1.1 {status} {reason}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        for key, value in (headers or {}).items():
+            head.append(f"{key}: {value}")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + body)
+
+
+@contextlib.contextmanager
+def serve_in_thread(**kwargs) -> Iterator[StubLLMServer]:
+    """Run a stub on a background thread's loop, for callers that block
+    (e.g. while waiting on worker processes)"""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    server = asyncio.run_coroutine_threadsafe(StubLLMServer(**kwargs).start(), loop).result()
+    try:
+        yield server
+    finally:
+        asyncio.run_coroutine_threadsafe(server.stop(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+async def _serve_forever(port: int, **kwargs):
+    server = await StubLLMServer(port=port, **kwargs).start()
+    print(f"Stub LLM listening on {server.url}")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a local stub LLM server")
+    parser.add_argument("--port", type=int, default=8808)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per request (mean/median)")
+    parser.add_argument("--latency-dist", choices=LATENCY_DISTRIBUTIONS, default="fixed")
+    parser.add_argument("--jitter", type=float, default=0.0, help="spread of the latency distribution")
+    parser.add_argument("--token-interval", type=float, default=0.0)
+    parser.add_argument("--tokens-per-sec", type=float, help="streaming rate; overrides --token-interval")
+    parser.add_argument("--rate-limit", type=int, help="requests per --rate-period before 429s")
+    parser.add_argument("--rate-period", type=float, default=1.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests failed at random")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--slots", type=int, help="requests processed at once; the rest queue")
+    parser.add_argument("--batch-item-latency", type=float, default=0.0,
+                        help="extra seconds per additional prompt in a batched /completions request")
+    parser.add_argument("--reply", default="Stub reply from the local LLM server.")
+    args = parser.parse_args()
+    try:
+        asyncio.run(_serve_forever(
+            args.port, latency=args.latency, latency_dist=args.latency_dist, jitter=args.jitter,
+            token_interval=args.token_interval, tokens_per_sec=args.tokens_per_sec,
+            rate_limit=args.rate_limit, rate_period=args.rate_period,
+            error_rate=args.error_rate, seed=args.seed, reply=args.reply,
+            slots=args.slots, batch_item_latency=args.batch_item_latency
+        ))
+    except KeyboardInterrupt:
+        pass
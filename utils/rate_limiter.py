@@ -1,20 +1,66 @@
 import asyncio
+import os
+import re
+import sqlite3
+import threading
 import time
-from typing import Optional, List
-from dataclasses import dataclass
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Callable, Deque, Dict, Mapping, Optional, List, Set, Tuple
+from dataclasses import dataclass, field
 import logging
+from utils.metrics import Histogram
 from tenacity import retry, stop_after_attempt, wait_exponential
 
+
 @dataclass
 class RateLimitConfig:
     max_calls: int = 5
     period: float = 1.0  # in seconds
     max_retries: int = 3
     backoff_base: float = 1.5
+    burst: Optional[int] = None  # calls allowed back to back, defaults to max_calls
+    max_wait: Optional[float] = None  # raise instead of queueing longer than this
+    # SQLite file shared by every process using the same quota (None = this process only)
+    shared_path: Optional[str] = None
+    shared_key: str = "default"
+    # Adaptive mode (AIMD): add `increase` calls/s per success, multiply by
+    # `decrease` on a 429/503, staying within [min_rate, max_rate]
+    adaptive: bool = False
+    min_rate: float = 0.1
+    max_rate: Optional[float] = None  # defaults to max_calls / period
+    increase: float = 0.05
+    decrease: float = 0.5
+
 
 class RateLimitExceededError(Exception):
     pass
 
+
+THROTTLE_STATUSES = (429, 503)
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Seconds from "2", "1.5", "250ms", "1m30s" or an HTTP date; None if unparseable"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if parts and "".join(n + u for n, u in parts) == value:
+        return sum(float(n) * _DURATION_UNITS[u] for n, u in parts)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
 class EnhancedRateLimiter:
     def __init__(self, config: RateLimitConfig = RateLimitConfig()):
         self.config = config
@@ -61,8 +107,434 @@ class EnhancedRateLimiter:
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         pass
 
+
+# A GCRA step: (stored arrival time, now) -> (new arrival time or None, result)
+BucketStep = Callable[[float, float], Tuple[Optional[float], object]]
+
+
+class LocalBucketState:
+    """Bucket state for limiters that only live in this process"""
+
+    def __init__(self):
+        self.tat = 0.0
+
+    def now(self) -> float:
+        return time.monotonic()
+
+    def transact(self, step: BucketStep):
+        new_tat, result = step(self.tat, time.monotonic())
+        if new_tat is not None:
+            self.tat = new_tat
+        return result
+
+    async def atransact(self, step: BucketStep):
+        return self.transact(step)
+
+
+class SQLiteBucketState:
+    """Bucket state in a SQLite file so processes on one host share a quota.
+
+    Every update is a short ``BEGIN IMMEDIATE`` transaction, which SQLite
+    serialises across processes. Times are wall-clock so they compare
+    between processes. ``atransact`` runs the transaction in a worker
+    thread, since waiting out another process's lock can take up to
+    ``busy_timeout``.
+    """
+
+    def __init__(self, path: str, key: str = "default", busy_timeout: float = 5.0):
+        self.path = path
+        self.key = key
+        self.busy_timeout = busy_timeout
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # A connection must not cross a fork
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(
+                self.path, timeout=self.busy_timeout, isolation_level=None, check_same_thread=False
+            )
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, tat REAL NOT NULL)"
+            )
+            self._pid = os.getpid()
+        return self._conn
+
+    def now(self) -> float:
+        return time.time()
+
+    def transact(self, step: BucketStep):
+        # One connection, used from whichever thread runs the transaction
+        with self._lock:
+            conn = self.conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT tat FROM rate_limits WHERE key = ?", (self.key,)).fetchone()
+                new_tat, result = step(row[0] if row else 0.0, time.time())
+                if new_tat is not None:
+                    conn.execute(
+                        "INSERT INTO rate_limits (key, tat) VALUES (?, ?) "
+                        "ON CONFLICT(key) DO UPDATE SET tat = excluded.tat",
+                        (self.key, new_tat)
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            return result
+
+    async def atransact(self, step: BucketStep):
+        return await asyncio.to_thread(self.transact, step)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+
+class TokenBucketLimiter:
+    """Constant-time GCRA (token bucket) limiter with FIFO-fair waiting.
+
+    Each call reserves the next slot by advancing a single theoretical
+    arrival time and then sleeps until its slot, so waiters are served in
+    arrival order and nothing is held across the sleep. Up to ``burst``
+    calls pass back to back, after which calls are spaced
+    ``period / max_calls`` apart. With ``config.shared_path`` set the
+    arrival time lives in SQLite and every process shares the quota.
+
+    ``observe`` feeds upstream responses back: a ``Retry-After`` or an
+    exhausted remaining-quota header holds every caller until it passes,
+    and with ``config.adaptive`` the rate is adjusted AIMD-style.
+    """
+
+    def __init__(self, config: RateLimitConfig = RateLimitConfig(), state=None):
+        self.config = config
+        self.burst = config.burst or config.max_calls
+        self.max_rate = config.max_rate or config.max_calls / config.period
+        self._set_rate(config.max_calls / config.period)
+        self.throttled = 0
+        self._blocked_until = 0.0
+        if state is None:
+            state = (
+                SQLiteBucketState(config.shared_path, config.shared_key)
+                if config.shared_path else LocalBucketState()
+            )
+        self.state = state
+        self._writes: Set[asyncio.Task] = set()
+        self.logger = logging.getLogger("rate_limiter")
+
+    @property
+    def effective_rate(self) -> float:
+        """Calls per second currently permitted"""
+        return 1.0 / self.interval
+
+    def _set_rate(self, rate: float):
+        self.interval = 1.0 / rate
+        self.tolerance = (self.burst - 1) * self.interval
+
+    def block_for(self, seconds: float):
+        """Hold every caller, including already queued ones, for ``seconds``"""
+        until = self.state.now() + seconds
+        self._blocked_until = max(self._blocked_until, until)
+        # The first call after the pause passes, the rest resume at the normal spacing
+        step = lambda tat, now: (max(tat, until + self.tolerance), None)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is None or isinstance(self.state, LocalBucketState):
+            self.state.transact(step)
+            return
+        # _blocked_until already holds this process's callers; other
+        # processes see the pause once the shared write lands
+        write = loop.create_task(self.state.atransact(step))
+        self._writes.add(write)
+        write.add_done_callback(self._writes.discard)
+
+    def observe(self, status: int, headers: Mapping[str, str]):
+        """Adjust to an upstream response's status and rate-limit headers"""
+        headers = {key.lower(): value for key, value in headers.items()}
+        if status in THROTTLE_STATUSES:
+            self.throttled += 1
+            if self.config.adaptive:
+                self._set_rate(max(self.config.min_rate, self.effective_rate * self.config.decrease))
+            retry_after = parse_duration(headers.get("retry-after"))
+            self.block_for(retry_after if retry_after is not None else self.interval)
+            self.logger.debug(
+                f"Upstream throttled ({status}), retry after {retry_after}, rate {self.effective_rate:.2f}/s"
+            )
+            return
+
+        remaining = headers.get("x-ratelimit-remaining-requests", headers.get("ratelimit-remaining"))
+        if remaining is not None and remaining.strip() == "0":
+            reset = parse_duration(headers.get("x-ratelimit-reset-requests", headers.get("ratelimit-reset")))
+            if reset:
+                self.block_for(reset)
+            return
+        if self.config.adaptive and status < 400:
+            self._set_rate(min(self.max_rate, self.effective_rate + self.config.increase))
+
+    def next_available(self) -> float:
+        """Seconds until a call made now would be allowed through"""
+        return self.state.transact(
+            lambda tat, now: (None, max(0.0, max(tat, now) - self.tolerance - now))
+        )
+
+    def _reserve(self, tat: float, now: float):
+        tat = max(tat, now)
+        delay = max(0.0, tat - self.tolerance - now)
+        if self.config.max_wait is not None and delay > self.config.max_wait:
+            return None, (None, delay)
+        return tat + self.interval, (tat + self.interval, delay)
+
+    @staticmethod
+    def _reserved(reservation: Tuple[Optional[float], float]) -> Tuple[float, float]:
+        slot_end, delay = reservation
+        if slot_end is None:
+            raise RateLimitExceededError(f"Next slot in {delay:.2f}s exceeds max_wait")
+        return slot_end, delay
+
+    def reserve(self) -> Tuple[float, float]:
+        """Claim the next slot; returns (slot end, seconds to wait for it)"""
+        return self._reserved(self.state.transact(self._reserve))
+
+    def _release(self, slot_end: float):
+        # Only the newest reservation can be handed back without
+        # disturbing the slots already promised to later callers
+        return lambda tat, now: (tat - self.interval if tat == slot_end else None, None)
+
+    async def wait(self) -> Optional[float]:
+        """Wait for a slot; returns the time waited, or None if it was free"""
+        waited = 0.0
+        while True:
+            slot_end, delay = self._reserved(await self.state.atransact(self._reserve))
+            if delay <= 0 and self.state.now() >= self._blocked_until:
+                return waited or None
+            delay = max(delay, self._blocked_until - self.state.now())
+            self.logger.debug(f"Rate limit hit, waiting {delay:.3f}s")
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                await self.state.atransact(self._release(slot_end))
+                raise
+            waited += delay
+            if self.state.now() >= self._blocked_until:
+                return waited
+            # Upstream throttled us while we slept: queue again after the pause
+            await self.state.atransact(self._release(slot_end))
+
+    async def __aenter__(self):
+        await self.wait()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+PRIORITIES = ("interactive", "standard", "background")
+
+
+@dataclass
+class LaneStats:
+    depth: int = 0
+    max_depth: int = 0
+    granted: int = 0
+    promoted: int = 0  # served ahead of higher lanes by the starvation guard
+    wait: Histogram = field(default_factory=Histogram)
+
+    def as_dict(self) -> Dict:
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "granted": self.granted,
+            "promoted": self.promoted,
+            "wait": self.wait.as_dict(),
+        }
+
+
+class _Waiter:
+    __slots__ = ("future", "enqueued")
+
+    def __init__(self, future: asyncio.Future, enqueued: float):
+        self.future = future
+        self.enqueued = enqueued
+
+
+class LimiterLane:
+    """A limiter bound to one priority, for APIs that just call ``wait()``"""
+
+    def __init__(self, limiter: "PriorityRateLimiter", priority: str):
+        self.limiter = limiter
+        self.priority = priority
+
+    async def wait(self) -> Optional[float]:
+        return await self.limiter.wait(self.priority)
+
+    def observe(self, status: int, headers: Mapping[str, str]):
+        self.limiter.observe(status, headers)
+
+    # Lanes are made per agent; two for the same limiter and priority are one lane
+    def __eq__(self, other) -> bool:
+        return isinstance(other, LimiterLane) and (other.limiter, other.priority) == (self.limiter, self.priority)
+
+    def __hash__(self) -> int:
+        return hash((id(self.limiter), self.priority))
+
+    async def __aenter__(self):
+        await self.wait()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+class PrepaidSlot:
+    """Wraps a limiter whose slot for the next call was taken ahead of time.
+
+    The first ``wait`` returns at once; retries wait on the wrapped limiter.
+    """
+
+    def __init__(self, limiter):
+        self.limiter = limiter
+        self.paid = True
+
+    async def wait(self) -> Optional[float]:
+        if self.paid:
+            self.paid = False
+            return None
+        return await self.limiter.wait()
+
+    def observe(self, status: int, headers: Mapping[str, str]):
+        self.limiter.observe(status, headers)
+
+
+class PriorityRateLimiter(TokenBucketLimiter):
+    """Token bucket whose slots go to the highest waiting priority lane.
+
+    Callers queue per lane (``PRIORITIES``, highest first). Each time a slot
+    frees up it goes to the oldest caller of the highest non-empty lane,
+    unless a lower lane's oldest caller has waited past that lane's
+    ``starvation_after``, in which case the longest-starved caller goes
+    first.
+    """
+
+    def __init__(
+        self,
+        config: RateLimitConfig = RateLimitConfig(),
+        state=None,
+        starvation_after: Dict[str, float] = None
+    ):
+        super().__init__(config, state)
+        self.starvation_after = {"interactive": float("inf"), "standard": 10.0, "background": 30.0}
+        self.starvation_after.update(starvation_after or {})
+        self.stats: Dict[str, LaneStats] = {lane: LaneStats() for lane in PRIORITIES}
+        self._queues: Dict[str, Deque[_Waiter]] = {lane: deque() for lane in PRIORITIES}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    def lane(self, priority: str) -> LimiterLane:
+        if priority not in self._queues:
+            raise ValueError(f"Unknown priority {priority!r}, expected one of {PRIORITIES}")
+        return LimiterLane(self, priority)
+
+    def _ensure_dispatcher(self):
+        loop = asyncio.get_running_loop()
+        if self._dispatcher is None or self._dispatcher.done() or self._dispatcher.get_loop() is not loop:
+            # Waiters queued on an earlier event loop can never be served
+            for queue in self._queues.values():
+                queue.clear()
+            for stats in self.stats.values():
+                stats.depth = 0
+            self._wakeup = asyncio.Event()
+            self._dispatcher = loop.create_task(self._dispatch())
+
+    async def wait(self, priority: str = "standard") -> Optional[float]:
+        """Wait for a slot in ``priority``'s lane; returns the time waited or None"""
+        if priority not in self._queues:
+            raise ValueError(f"Unknown priority {priority!r}, expected one of {PRIORITIES}")
+        self._ensure_dispatcher()
+        stats = self.stats[priority]
+        waiter = _Waiter(asyncio.get_running_loop().create_future(), time.monotonic())
+        self._queues[priority].append(waiter)
+        stats.depth += 1
+        stats.max_depth = max(stats.max_depth, stats.depth)
+        self._wakeup.set()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if not waiter.future.done() or waiter.future.cancelled():
+                stats.depth -= 1
+            raise
+        waited = time.monotonic() - waiter.enqueued
+        stats.wait.record(waited)
+        return waited if waited > 0.001 else None
+
+    def _next_waiter(self) -> Optional[Tuple[str, _Waiter]]:
+        for queue in self._queues.values():
+            while queue and queue[0].future.done():
+                queue.popleft()
+
+        now = time.monotonic()
+        starving = [
+            (queue[0].enqueued, lane) for lane, queue in self._queues.items()
+            if queue and now - queue[0].enqueued >= self.starvation_after[lane]
+        ]
+        if starving:
+            lane = min(starving)[1]
+            if any(self._queues[higher] for higher in PRIORITIES[:PRIORITIES.index(lane)]):
+                self.stats[lane].promoted += 1
+            return lane, self._queues[lane].popleft()
+        for lane, queue in self._queues.items():
+            if queue:
+                return lane, queue.popleft()
+        return None
+
+    async def _dispatch(self):
+        have_slot = False
+        while True:
+            if not any(self._queues.values()):
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            if not have_slot:
+                try:
+                    await TokenBucketLimiter.wait(self)
+                except Exception as e:
+                    # e.g. max_wait exceeded: the caller next in line gets the error
+                    chosen = self._next_waiter()
+                    if chosen is not None:
+                        self.stats[chosen[0]].depth -= 1
+                        chosen[1].future.set_exception(e)
+                    continue
+                have_slot = True
+            # Choose only once the slot is ours, so late high-priority
+            # arrivals still go first
+            chosen = self._next_waiter()
+            if chosen is None:
+                continue  # everyone queued gave up; keep the slot for the next caller
+            lane, waiter = chosen
+            self.stats[lane].depth -= 1
+            self.stats[lane].granted += 1
+            waiter.future.set_result(None)
+            have_slot = False
+
+    def lane_stats(self) -> Dict[str, Dict]:
+        return {lane: stats.as_dict() for lane, stats in self.stats.items()}
+
+    async def aclose(self):
+        """Stop the dispatcher task; the next ``wait`` starts a new one"""
+        if self._dispatcher is not None and not self._dispatcher.done():
+            self._dispatcher.cancel()
+            await asyncio.gather(self._dispatcher, return_exceptions=True)
+        self._dispatcher = None
+
+
 # Pre-configured limiters for different agent types
-SUPPORT_AGENT_LIMITER = EnhancedRateLimiter(
+SUPPORT_AGENT_LIMITER = TokenBucketLimiter(
     RateLimitConfig(
         max_calls=10,
         period=1.0,
@@ -70,7 +542,7 @@ SUPPORT_AGENT_LIMITER = EnhancedRateLimiter(
     )
 )
 
-PREMIUM_AGENT_LIMITER = EnhancedRateLimiter(
+PREMIUM_AGENT_LIMITER = TokenBucketLimiter(
     RateLimitConfig(
         max_calls=20,
         period=1.0,
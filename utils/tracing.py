@@ -0,0 +1,296 @@
+"""
+Lightweight per-turn tracing: spans for each phase of a turn plus counters
+
+    from utils import tracing
+
+    with tracing.span("llm_call", attempt=1) as s:
+        ...
+        s.set("status", 200)
+    tracing.count("cache.hit")
+
+Tracing is off until ``configure_tracing`` installs exporters (or
+``AGENT_TRACE_FILE`` names a JSONL file); while off, ``span`` returns a
+shared no-op and ``count`` returns at once. Exporters receive finished
+spans and counter increments:
+
+- ``HistogramExporter``: in-process aggregation, one Histogram per span name
+- ``JSONLExporter``: one JSON line per span/counter, for offline analysis
+- ``OpenTelemetryExporter``: forwards to the OpenTelemetry API (optional dependency)
+"""
+
+import contextvars
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+from utils.metrics import Histogram
+
+logger = logging.getLogger("tracing")
+
+_current: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+_ids = itertools.count(1)
+
+
+class Span:
+    """A timed phase; use as a context manager so children nest under it"""
+
+    __slots__ = ("tracer", "name", "attrs", "span_id", "parent", "trace_id",
+                 "start_time", "duration", "_start", "_token", "exporter_state")
+
+    def __init__(self, tracer: "Tracer", name: str, attrs: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.span_id = next(_ids)
+        self.parent = _current.get()
+        self.trace_id = self.parent.trace_id if self.parent else self.span_id
+        self.duration = 0.0
+        self._token = None
+        self.exporter_state: Dict[int, Any] = {}
+
+    @property
+    def parent_id(self) -> Optional[int]:
+        return self.parent.span_id if self.parent else None
+
+    def set(self, key: str, value: Any):
+        self.attrs[key] = value
+
+    def __enter__(self) -> "Span":
+        self.start_time = time.time()
+        self._token = _current.set(self)
+        for exporter in self.tracer.exporters:
+            exporter.on_start(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.duration = time.perf_counter() - self._start
+        _current.reset(self._token)
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.tracer._finish(self)
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set(self, key: str, value: Any):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Exporter:
+    """Receives spans and counters; override what you need"""
+
+    def on_start(self, span: Span):
+        pass
+
+    def on_end(self, span: Span):
+        pass
+
+    def on_count(self, name: str, value: float, span: Optional[Span]):
+        pass
+
+    def close(self):
+        pass
+
+
+class HistogramExporter(Exporter):
+    """In-process aggregation: a latency Histogram per span name and counter totals"""
+
+    def __init__(self):
+        self.spans: Dict[str, Histogram] = {}
+        self.counters: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def on_end(self, span: Span):
+        with self._lock:
+            histogram = self.spans.get(span.name)
+            if histogram is None:
+                histogram = self.spans[span.name] = Histogram()
+            histogram.record(span.duration)
+
+    def on_count(self, name: str, value: float, span: Optional[Span]):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "spans": {name: histogram.as_dict() for name, histogram in self.spans.items()},
+                "counters": dict(self.counters),
+            }
+
+    def reset(self):
+        with self._lock:
+            self.spans.clear()
+            self.counters.clear()
+
+
+class JSONLExporter(Exporter):
+    """Append one JSON object per finished span or counter increment to ``path``"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "a", buffering=1 << 16)
+        self._lock = threading.Lock()
+
+    def _write(self, record: Dict):
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            self._file.write(line)
+
+    def on_end(self, span: Span):
+        self._write({
+            "type": "span",
+            "name": span.name,
+            "trace": span.trace_id,
+            "span": span.span_id,
+            "parent": span.parent_id,
+            "start": span.start_time,
+            "duration": round(span.duration, 6),
+            "attrs": span.attrs,
+        })
+
+    def on_count(self, name: str, value: float, span: Optional[Span]):
+        self._write({
+            "type": "counter",
+            "name": name,
+            "value": value,
+            "trace": span.trace_id if span else None,
+            "span": span.span_id if span else None,
+            "time": time.time(),
+        })
+
+    def flush(self):
+        with self._lock:
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class OpenTelemetryExporter(Exporter):
+    """Bridge spans and counters into OpenTelemetry (``pip install opentelemetry-api``).
+
+    Uses the globally configured tracer and meter providers, so any OTel
+    SDK/exporter setup in the application applies.
+    """
+
+    def __init__(self, name: str = "agents"):
+        try:
+            from opentelemetry import metrics, trace
+        except ImportError as e:
+            raise ImportError("OpenTelemetryExporter needs the opentelemetry-api package") from e
+        self._trace = trace
+        self._tracer = trace.get_tracer(name)
+        self._meter = metrics.get_meter(name)
+        self._counters: Dict[str, Any] = {}
+
+    def on_start(self, span: Span):
+        parent = None
+        if span.parent is not None and id(self) in span.parent.exporter_state:
+            parent = self._trace.set_span_in_context(span.parent.exporter_state[id(self)])
+        span.exporter_state[id(self)] = self._tracer.start_span(
+            span.name, context=parent, start_time=int(span.start_time * 1e9)
+        )
+
+    def on_end(self, span: Span):
+        if id(self) not in span.exporter_state:
+            self.on_start(span)  # a span reported after the fact via Tracer.record
+        otel_span = span.exporter_state.pop(id(self))
+        for key, value in span.attrs.items():
+            otel_span.set_attribute(key, value if isinstance(value, (str, bool, int, float)) else str(value))
+        otel_span.end(end_time=int((span.start_time + span.duration) * 1e9))
+
+    def on_count(self, name: str, value: float, span: Optional[Span]):
+        counter = self._counters.get(name)
+        if counter is None:
+            counter = self._counters[name] = self._meter.create_counter(name)
+        counter.add(value)
+
+
+class Tracer:
+    def __init__(self, exporters: Sequence[Exporter] = ()):
+        self.exporters: List[Exporter] = list(exporters)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.exporters)
+
+    def span(self, name: str, **attrs):
+        if not self.exporters:
+            return NOOP_SPAN
+        return Span(self, name, attrs)
+
+    def record(self, name: str, duration: float, **attrs):
+        """Report a span measured by the caller (e.g. one spanning async-generator yields)"""
+        if not self.exporters:
+            return
+        span = Span(self, name, attrs)
+        span.start_time = time.time() - duration
+        span.duration = duration
+        self._finish(span)
+
+    def count(self, name: str, value: float = 1):
+        if not self.exporters:
+            return
+        span = _current.get()
+        for exporter in self.exporters:
+            exporter.on_count(name, value, span)
+
+    def _finish(self, span: Span):
+        for exporter in self.exporters:
+            try:
+                exporter.on_end(span)
+            except Exception as e:
+                logger.warning(f"Trace exporter {type(exporter).__name__} failed: {e}")
+
+    def close(self):
+        for exporter in self.exporters:
+            exporter.close()
+
+
+_tracer: Optional[Tracer] = None
+
+
+def get_tracer() -> Tracer:
+    """Return the process-wide tracer; AGENT_TRACE_FILE enables a JSONL dump"""
+    global _tracer
+    if _tracer is None:
+        path = os.getenv("AGENT_TRACE_FILE")
+        _tracer = Tracer([JSONLExporter(path)] if path else [])
+    return _tracer
+
+
+def configure_tracing(exporters: Sequence[Exporter] = ()) -> Tracer:
+    """Replace the process-wide tracer; no exporters turns tracing off"""
+    global _tracer
+    if _tracer is not None:
+        _tracer.close()
+    _tracer = Tracer(exporters)
+    return _tracer
+
+
+def span(name: str, **attrs):
+    return get_tracer().span(name, **attrs)
+
+
+def record(name: str, duration: float, **attrs):
+    get_tracer().record(name, duration, **attrs)
+
+
+def count(name: str, value: float = 1):
+    get_tracer().count(name, value)